@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for HwGDReqs hot paths
+
+Each benchmark prints one JSON document so results can be diffed between
+releases:
+
+    python benchmark.py index --history 1000 10000 100000
+    python benchmark.py sync --queue 100 1000 5000 --rate 50
+    python benchmark.py startup --runs 5
+    python benchmark.py filter --entries 100000
+    python benchmark.py pick --entries 1000 10000 50000
+    python benchmark.py records --entries 10000 50000
+"""
+
+import os
+import sys
+import json
+import random
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+
+import main
+import devserver
+
+
+def per_op(fn, items):
+    """Average seconds per call of fn over items"""
+    items = list(items)
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / max(1, len(items))
+
+
+def summarize(samples, scale=1.0, digits=3):
+    """Median, p95 and max of a list of samples"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        'median': round(statistics.median(ordered) * scale, digits),
+        'p95': round(p95 * scale, digits),
+        'max': round(ordered[-1] * scale, digits),
+    }
+
+
+def peak_rss_kib():
+    """Peak resident set size of this process in KiB, None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+@contextmanager
+def isolated_home(path):
+    """Point ConfigManager's config directory at a scratch folder"""
+    saved = {key: os.environ.get(key) for key in ('HOME', 'APPDATA')}
+    os.environ['HOME'] = os.environ['APPDATA'] = str(path)
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def make_levels(count, start=0, rng=random):
+    """Lightweight level entries for storage benchmarks"""
+    return [
+        {
+            'id': level_id,
+            'name': f"Level {level_id}",
+            'author': f"Creator{rng.randint(1, 500)}",
+            'difficulty': rng.choice(['Easy', 'Normal', 'Hard', 'Harder', 'Insane']),
+            'length': rng.choice(['Tiny', 'Short', 'Medium', 'Long', 'XL'])
+        }
+        for level_id in range(start, start + count)
+    ]
+
+
+def bench_index(args):
+    """Duplicate / played-before lookups at growing history sizes"""
+    rng = random.Random(args.seed)
+    results = []
+    for history_size in args.history:
+        with tempfile.TemporaryDirectory() as tmp:
+            history = main.HistoryStore(Path(tmp) / 'history.db')
+            history.extend(make_levels(history_size, rng=rng), played_at=0)
+            
+            queue = make_levels(args.queue, start=history_size - args.queue // 2, rng=rng)
+            index = main.LevelIndex(history)
+            index.rebuild(queue)
+            
+            queued_ids = [rng.choice(queue)['id'] for _ in range(args.lookups)]
+            missing_ids = [-1 - i for i in range(args.lookups)]
+            played_ids = [rng.randrange(history_size) for _ in range(args.lookups)]
+            
+            added = make_levels(100, start=10 ** 9, rng=rng)
+            new_queue = queue + added
+            start = time.perf_counter()
+            index.update(new_queue, {'added': added, 'removed': [], 'changed': []})
+            update_time = time.perf_counter() - start
+            
+            results.append({
+                'history': history_size,
+                'queue': args.queue,
+                'position_hit_ns': round(per_op(index.position, queued_ids) * 1e9, 1),
+                'position_miss_ns': round(per_op(index.position, missing_ids) * 1e9, 1),
+                'is_duplicate_ns': round(per_op(index.is_duplicate, queued_ids) * 1e9, 1),
+                'played_before_cold_ns': round(per_op(index.played_before, played_ids) * 1e9, 1),
+                'played_before_warm_ns': round(per_op(index.played_before, played_ids) * 1e9, 1),
+                'append_100_update_us': round(update_time * 1e6, 1),
+            })
+            history.close()
+    return {'benchmark': 'index', 'results': results}
+
+
+def run_sync(app, size, mode, args, rng):
+    """One simulated raid against a local fake api.php, in virtual time"""
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import QListView
+    
+    with tempfile.TemporaryDirectory() as tmp, isolated_home(tmp):
+        server = devserver.DevServer().start()
+        for level_id in range(size):
+            server.queue.add(devserver.make_level(level_id, rng))
+        
+        config_manager = main.ConfigManager()
+        config_manager.config['app_id'] = 'benchmark'
+        config_manager.config['push_updates'] = False
+        if args.write_behind:
+            config_manager.start_persistence()
+        
+        api = main.ApiClient(server.base_url)
+        scheduler = main.PollScheduler(jitter=0, rng=rng)
+        sync = main.QueueSyncThread(config_manager, api, scheduler)
+        
+        model = main.QueueModel(level_index=config_manager.index)
+        view = QListView()
+        view.setModel(model)
+        view.setUniformItemSizes(True)
+        view.resize(400, 600)
+        view.show()
+        
+        # Time saves as the sync path sees them, including the index update
+        save_times = []
+        update_queue = config_manager.update_queue
+        
+        def timed_update_queue(new_queue, delta=None):
+            start = time.perf_counter()
+            update_queue(new_queue, delta)
+            save_times.append(time.perf_counter() - start)
+        
+        config_manager.update_queue = timed_update_queue
+        
+        # Stamp the emit directly, then repaint through a queued connection like the GUI does
+        emitted = []
+        paint_latencies = []
+        
+        def on_queue_updated(levels):
+            model.set_levels(levels)
+            model.refresh_notes()
+            view.viewport().repaint()
+            paint_latencies.append(time.perf_counter() - emitted[-1])
+        
+        sync.queue_updated.connect(lambda _: emitted.append(time.perf_counter()), Qt.DirectConnection)
+        sync.queue_updated.connect(on_queue_updated, Qt.QueuedConnection)
+        
+        sync.sync_once()
+        app.processEvents()
+        del save_times[:], paint_latencies[:]
+        
+        tick_walls = []
+        tick_cpus = []
+        equality_times = []
+        payloads = []
+        clock = 0.0
+        next_arrival = rng.expovariate(args.rate) if args.rate > 0 else float('inf')
+        next_id = size
+        rss_before = peak_rss_kib()
+        
+        for _ in range(args.ticks):
+            clock += scheduler.next_fetch_delay()
+            while next_arrival <= clock:
+                server.queue.add(devserver.make_level(next_id, rng))
+                next_id += 1
+                next_arrival += rng.expovariate(args.rate)
+            if mode == 'snapshot':
+                sync.change_log.reset()
+            
+            bytes_before = server.queue.bytes_sent
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            changed = sync.sync_once()
+            tick_cpus.append(time.thread_time() - cpu_start)
+            tick_walls.append(time.perf_counter() - wall_start)
+            payloads.append(server.queue.bytes_sent - bytes_before)
+            scheduler.record_fetch(changed)
+            app.processEvents()
+            
+            # What comparing an unchanged full snapshot costs at this queue size
+            snapshot = main.LevelRecord.decode(
+                json.loads(json.dumps(config_manager.queue, default=main.json_default)))
+            start = time.perf_counter()
+            snapshot == config_manager.queue
+            equality_times.append(time.perf_counter() - start)
+        
+        # Ticks with no new submissions, the common case between raids
+        idle_cpus = []
+        for _ in range(10):
+            if mode == 'snapshot':
+                sync.change_log.reset()
+            cpu_start = time.thread_time()
+            sync.sync_once()
+            idle_cpus.append(time.thread_time() - cpu_start)
+        
+        rss_after = peak_rss_kib()
+        result = {
+            'mode': mode,
+            'initial_queue': size,
+            'final_queue': len(config_manager.queue),
+            'submissions': next_id - size,
+            'ticks': args.ticks,
+            'virtual_seconds': round(clock, 1),
+            'tick_wall_ms': summarize(tick_walls, 1e3),
+            'tick_cpu_ms': summarize(tick_cpus, 1e3),
+            'idle_tick_cpu_ms': summarize(idle_cpus, 1e3),
+            'payload_bytes': summarize(payloads, digits=0),
+            'equality_check_us': summarize(equality_times, 1e6, 1),
+            'save_ms': summarize(save_times, 1e3),
+            'signal_to_paint_ms': summarize(paint_latencies, 1e3),
+            'peak_rss_growth_kib': rss_after - rss_before if rss_before is not None else None,
+        }
+        
+        view.close()
+        api.close()
+        config_manager.close()
+        server.stop()
+        return result
+
+
+def bench_sync(args):
+    """Sync ticks under a synthetic submission stream, against the dev server"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    
+    modes = ['delta', 'snapshot'] if args.mode == 'both' else [args.mode]
+    results = []
+    for size in args.queue:
+        for mode in modes:
+            results.append(run_sync(app, size, mode, args, random.Random(args.seed)))
+    return {
+        'benchmark': 'sync',
+        'python': platform.python_version(),
+        'platform': sys.platform,
+        'rate_per_second': args.rate,
+        'write_behind': args.write_behind,
+        'results': results,
+    }
+
+
+def time_process(command, env=None, cwd=None, timeout=60):
+    """Wall seconds from spawn to exit of a command, and its stdout"""
+    start = time.time()
+    result = subprocess.run(command, env=env, cwd=cwd, capture_output=True, text=True,
+                            timeout=timeout, check=True)
+    return time.time() - start, start, result.stdout
+
+
+def bench_startup(args):
+    """Import time and time to first paint of fresh app processes"""
+    app_dir = Path(main.__file__).resolve().parent
+    command = args.command or [sys.executable, str(app_dir / 'main.py')]
+    levels = [devserver.make_level(level_id, random.Random(args.seed)) for level_id in range(args.queue)]
+    
+    interpreter = []
+    imports = []
+    first_paint = []
+    data_loaded = []
+    with tempfile.TemporaryDirectory() as tmp:
+        server = devserver.DevServer().start()
+        for level in levels:
+            server.queue.add(level)
+        
+        config_dir = Path(tmp) / '.hwgdreqs'
+        appdata_dir = Path(tmp) / 'HwGDReqs'
+        for directory in (config_dir, appdata_dir):
+            directory.mkdir()
+            (directory / 'config.json').write_text(json.dumps({
+                'app_id': 'benchmark', 'show_donate': False, 'push_updates': False
+            }))
+            (directory / 'queue.json').write_text(json.dumps(levels))
+        env = {**os.environ, 'HOME': tmp, 'APPDATA': tmp, 'HWGDREQS_API_BASE': server.base_url}
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        
+        for _ in range(args.runs):
+            if not args.command:
+                interpreter.append(time_process([sys.executable, '-c', 'pass'], env)[0])
+                imports.append(time_process([sys.executable, '-c', 'import main'], env, app_dir)[0])
+            
+            _, start, stdout = time_process(command + ['--startup-probe'], env, app_dir)
+            marks = json.loads(stdout.strip().splitlines()[-1])
+            first_paint.append(marks['first_paint'] - start)
+            data_loaded.append(marks['data_loaded'] - start)
+        
+        server.stop()
+    
+    paint_summary = summarize(first_paint, 1e3, 1)
+    return {
+        'benchmark': 'startup',
+        'python': platform.python_version(),
+        'platform': sys.platform,
+        'command': command,
+        'queue': args.queue,
+        'runs': args.runs,
+        'interpreter_ms': summarize(interpreter, 1e3, 1),
+        'import_main_ms': summarize(imports, 1e3, 1),
+        'first_paint_ms': paint_summary,
+        'data_loaded_ms': summarize(data_loaded, 1e3, 1),
+        'target_first_paint_ms': args.target,
+        'meets_target': paint_summary['median'] <= args.target,
+    }
+
+
+def naive_accepts(level, filters):
+    """Straightforward list-membership filter check, the baseline for FilterEngine"""
+    stars = level.get('stars') or 0
+    rated = filters['rated']
+    return (level.get('length') in filters['length']
+            and level.get('difficulty') in filters['difficulty']
+            and (rated == 'both' or (rated == 'rated') == (stars > 0)))
+
+
+def elapsed_ms(fn, *args):
+    """Run fn once, returning (milliseconds, result)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return round((time.perf_counter() - start) * 1e3, 2), result
+
+
+def bench_filter(args):
+    """Filter compile, bulk evaluation and row hiding over a large queue"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PySide6.QtWidgets import QApplication, QListView
+    app = QApplication.instance() or QApplication([])
+    
+    rng = random.Random(args.seed)
+    levels = [devserver.make_level(level_id, rng) for level_id in range(args.entries)]
+    filters = {
+        'length': ['Short', 'Medium', 'Long', 'XL'],
+        'difficulty': ['Easy', 'Normal', 'Hard', 'Harder', 'Insane', 'Easy Demon', 'Medium Demon'],
+        'rated': 'rated',
+    }
+    relaxed = {**filters, 'length': list(main.FilterEngine.LENGTHS), 'rated': 'both'}
+    
+    naive_ms, expected = elapsed_ms(lambda: [naive_accepts(level, filters) for level in levels])
+    engine = main.FilterEngine()
+    compile_us = per_op(engine.compile, [filters] * 1000) * 1e6
+    cold_ms, accepted = elapsed_ms(engine.evaluate, levels)
+    warm_ms, _ = elapsed_ms(engine.evaluate, levels)
+    codes = engine.encode(levels)
+    recheck_ms, _ = elapsed_ms(engine.check, codes)
+    
+    model = main.QueueModel(filter_engine=engine)
+    view = QListView()
+    view.setModel(model)
+    view.setUniformItemSizes(True)
+    view.resize(400, 600)
+    view.show()
+    set_levels_ms, _ = elapsed_ms(model.set_levels, levels)
+    app.processEvents()
+    
+    row_filter = main.RowFilter(view, model, engine)
+    hide_ms, hidden = elapsed_ms(row_filter.apply, True)
+    unchanged_ms, _ = elapsed_ms(row_filter.apply, True)
+    engine.compile(relaxed)
+    relax_ms, relaxed_hidden = elapsed_ms(row_filter.apply, True)
+    show_all_ms, _ = elapsed_ms(row_filter.apply, False)
+    app.processEvents()
+    view.close()
+    
+    return {
+        'benchmark': 'filter',
+        'entries': args.entries,
+        'matches_naive': accepted == expected,
+        'rejected': hidden,
+        'naive_evaluate_ms': naive_ms,
+        'compile_us': round(compile_us, 2),
+        'evaluate_cold_ms': cold_ms,
+        'evaluate_warm_ms': warm_ms,
+        'recheck_encoded_ms': recheck_ms,
+        'accepts_ns': round(per_op(engine.accepts, levels[:20000]) * 1e9, 1),
+        'model_set_levels_ms': set_levels_ms,
+        'hide_rejected_ms': hide_ms,
+        'reapply_unchanged_ms': unchanged_ms,
+        'filter_change_ms': relax_ms,
+        'rejected_after_change': relaxed_hidden,
+        'show_all_ms': show_all_ms,
+    }
+
+
+def bench_pick(args):
+    """LevelPicker sync and per-strategy pick cost against naive O(n) picks"""
+    rng = random.Random(args.seed)
+    results = []
+    for entries in args.entries:
+        now = time.time()
+        levels = make_levels(entries, rng=rng)
+        for level in levels:
+            # Half the queue comes from one spammer, the rest from many viewers
+            level['submitter'] = 'spammer' if rng.random() < 0.5 else f"viewer{rng.randrange(entries // 10 + 1)}"
+            level['submitted_at'] = now - rng.uniform(0, 3600)
+        keys = main.level_keys(levels)
+        picker = main.LevelPicker(rng=random.Random(args.seed))
+        sync_ms, _ = elapsed_ms(picker.sync, keys, levels)
+        
+        # One submission in, one level played: the common steady-state change
+        churned = levels[1:] + make_levels(1, start=entries, rng=rng)
+        churned_keys = main.level_keys(churned)
+        resync_ms, _ = elapsed_ms(picker.sync, churned_keys, churned)
+        
+        strategies = {}
+        for strategy in main.LevelPicker.STRATEGIES:
+            rows = [picker.pick(strategy) for _ in range(args.picks)]
+            strategies[strategy] = {
+                'pick_us': round(per_op(picker.pick, [strategy] * args.picks) * 1e6, 2),
+                'spammer_share': round(sum(churned[row].get('submitter') == 'spammer'
+                                           for row in rows) / len(rows), 3),
+            }
+        
+        naive_picks = max(1, min(args.picks, 200000 // entries))
+        weights = [now - level.get('submitted_at', now) for level in churned]
+        results.append({
+            'entries': entries,
+            'initial_sync_ms': sync_ms,
+            'incremental_sync_ms': resync_ms,
+            'strategies': strategies,
+            'naive_choice_then_index_us': round(per_op(
+                lambda _: churned.index(rng.choice(churned)), range(naive_picks)) * 1e6, 2),
+            'naive_weighted_choices_us': round(per_op(
+                lambda _: rng.choices(churned, weights), range(naive_picks)) * 1e6, 2),
+        })
+    return {'benchmark': 'pick', 'picks': args.picks, 'results': results}
+
+
+def traced_kib(build):
+    """Bytes still allocated by what build() returns, in KiB"""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return round(size / 1024, 1), result
+
+
+def bench_records(args):
+    """LevelRecord against plain dicts: memory, decode, field access, JSON round-trip"""
+    rng = random.Random(args.seed)
+    results = []
+    for entries in args.entries:
+        full = [devserver.make_level(level_id, rng) for level_id in range(entries)]
+        for shape, levels in (('full', full), ('row', [devserver.slim_level(level) for level in full])):
+            raw = json.dumps(levels)
+            dict_kib, dicts = traced_kib(lambda: json.loads(raw))
+            record_kib, records = traced_kib(lambda: main.LevelRecord.decode(json.loads(raw)))
+            loads_ms, _ = elapsed_ms(json.loads, raw)
+            decode_ms, _ = elapsed_ms(main.LevelRecord.decode, dicts)
+            results.append({
+                'entries': entries,
+                'shape': shape,
+                'dict_kib': dict_kib,
+                'record_kib': record_kib,
+                'bytes_per_dict': round(dict_kib * 1024 / entries),
+                'bytes_per_record': round(record_kib * 1024 / entries),
+                'json_loads_ms': loads_ms,
+                'decode_ms': decode_ms,
+                'dict_get_ns': round(per_op(lambda level: level.get('difficulty'), dicts) * 1e9, 1),
+                'record_get_ns': round(per_op(lambda level: level.get('difficulty'), records) * 1e9, 1),
+                'record_attribute_ns': round(per_op(lambda level: level.difficulty, records) * 1e9, 1),
+                'round_trip': json.loads(json.dumps(records, default=main.json_default)) == levels,
+            })
+    return {'benchmark': 'records', 'results': results}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="HwGDReqs benchmarks")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="also write the JSON result to this file")
+    sub = parser.add_subparsers(dest='benchmark', required=True)
+    
+    index_parser = sub.add_parser('index', help=bench_index.__doc__)
+    index_parser.add_argument('--history', type=int, nargs='+', default=[1000, 10000, 100000])
+    index_parser.add_argument('--queue', type=int, default=5000)
+    index_parser.add_argument('--lookups', type=int, default=20000)
+    index_parser.set_defaults(func=bench_index)
+    
+    sync_parser = sub.add_parser('sync', help=bench_sync.__doc__)
+    sync_parser.add_argument('--queue', type=int, nargs='+', default=[100, 1000, 5000],
+                             help="queue sizes to start from")
+    sync_parser.add_argument('--rate', type=float, default=50.0,
+                             help="submissions per virtual second")
+    sync_parser.add_argument('--ticks', type=int, default=100)
+    sync_parser.add_argument('--mode', choices=['delta', 'snapshot', 'both'], default='both',
+                             help="fetch revision deltas, full snapshots, or compare both")
+    sync_parser.add_argument('--write-behind', action='store_true',
+                             help="buffer saves in the persistence worker instead of writing each tick")
+    sync_parser.set_defaults(func=bench_sync)
+    
+    startup_parser = sub.add_parser('startup', help=bench_startup.__doc__)
+    startup_parser.add_argument('--runs', type=int, default=5)
+    startup_parser.add_argument('--queue', type=int, default=1000,
+                                help="levels in the saved queue the app loads")
+    startup_parser.add_argument('--target', type=float, default=300.0,
+                                help="first paint budget in milliseconds")
+    startup_parser.add_argument('--command', nargs='+',
+                                help="launch this instead of main.py, e.g. a Nuitka build")
+    startup_parser.set_defaults(func=bench_startup)
+    
+    filter_parser = sub.add_parser('filter', help=bench_filter.__doc__)
+    filter_parser.add_argument('--entries', type=int, default=100000)
+    filter_parser.set_defaults(func=bench_filter)
+    
+    pick_parser = sub.add_parser('pick', help=bench_pick.__doc__)
+    pick_parser.add_argument('--entries', type=int, nargs='+', default=[1000, 10000, 50000])
+    pick_parser.add_argument('--picks', type=int, default=20000)
+    pick_parser.set_defaults(func=bench_pick)
+    
+    records_parser = sub.add_parser('records', help=bench_records.__doc__)
+    records_parser.add_argument('--entries', type=int, nargs='+', default=[10000, 50000])
+    records_parser.set_defaults(func=bench_records)
+    
+    args = parser.parse_args()
+    result = args.func(args)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the hwgdreqs.rf.gd api.php, for offline development
+
+Run it and point the app at it:
+
+    python devserver.py --port 8765 --rate 2
+    HWGDREQS_API_BASE=http://127.0.0.1:8765 python main.py
+"""
+
+import sys
+import json
+import random
+import threading
+import time
+import argparse
+import gzip
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+DIFFICULTIES = ['NA', 'Easy', 'Normal', 'Hard', 'Harder', 'Insane',
+                'Easy Demon', 'Medium Demon', 'Hard Demon', 'Insane Demon', 'Extreme Demon']
+LENGTHS = ['Tiny', 'Short', 'Medium', 'Long', 'XL']
+# What fields=row keeps of each queue entry, the rest comes from action=details.
+# Submitter and submission time feed the app's weighted and fair random picks.
+ROW_FIELDS = ('id', 'name', 'author', 'difficulty', 'difficultyFace', 'length', 'stars',
+              'flagged', 'flag_reason', 'submitter', 'submitted_at')
+
+
+def slim_level(level):
+    """Strip a level down to the fields a queue row needs"""
+    return {key: level[key] for key in ROW_FIELDS if key in level}
+
+
+def make_level(level_id, rng=random):
+    """Build a fake level entry shaped like the real api.php queue items"""
+    difficulty = rng.choice(DIFFICULTIES)
+    return {
+        'id': level_id,
+        'name': f"Level {level_id}",
+        'author': f"Creator{rng.randint(1, 500)}",
+        'difficulty': difficulty,
+        'difficultyFace': difficulty,
+        'length': rng.choice(LENGTHS),
+        'stars': rng.choice([0, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]),
+        'downloads': rng.randint(0, 1000000),
+        'likes': rng.randint(0, 50000),
+        'description': 'A level submitted by the dev server',
+        'submitter': f"viewer{rng.randint(1, 200)}",
+        'submitted_at': time.time()
+    }
+
+
+class FakeQueue:
+    """Revisioned in-memory queue with a change history for delta fetches"""
+    
+    def __init__(self, max_history=1000):
+        self.lock = threading.Condition()
+        self.levels = []
+        self.known = {}
+        self.revision = 0
+        self.modified = time.time()
+        self.changes = []
+        self.max_history = max_history
+        self.heartbeats = 0
+        self.config = {}
+        self.reports = []
+        self.op_keys = set()
+        self.duplicate_ops = 0
+        self.requests = 0
+        self.bytes_sent = 0
+        self.not_modified = 0
+    
+    def _record(self, kind, payload):
+        self.revision += 1
+        self.modified = time.time()
+        self.changes.append((self.revision, kind, payload))
+        if len(self.changes) > self.max_history:
+            del self.changes[:len(self.changes) - self.max_history]
+        self.lock.notify_all()
+    
+    def wait_for_change(self, since, timeout):
+        """Block until the queue moves past `since` or the timeout runs out"""
+        with self.lock:
+            return self.lock.wait_for(lambda: self.revision != since, timeout)
+    
+    def add(self, level):
+        """Append a submission to the queue"""
+        with self.lock:
+            self.levels.append(level)
+            self.known[level.get('id')] = level
+            self._record('added', level)
+    
+    def change(self, level):
+        """Replace a queued level with an edited copy"""
+        with self.lock:
+            for i, existing in enumerate(self.levels):
+                if existing.get('id') == level.get('id'):
+                    self.levels[i] = level
+                    self.known[level.get('id')] = level
+                    self._record('changed', level)
+                    break
+    
+    def clear(self):
+        """Remove every queued level"""
+        with self.lock:
+            for level in self.levels:
+                self._record('removed', level.get('id'))
+            self.levels = []
+    
+    def remove_submitted(self, level_ids, before):
+        """Remove levels by id, sparing submissions made after `before`"""
+        level_ids = set(level_ids)
+        with self.lock:
+            kept = []
+            for level in self.levels:
+                if str(level.get('id')) in level_ids and not level.get('submitted_at', 0) > before:
+                    self._record('removed', level.get('id'))
+                else:
+                    kept.append(level)
+            self.levels = kept
+    
+    def apply_ops(self, ops):
+        """Apply outbound operations in order, each idempotency key at most once
+        
+        Returns the keys applied (or seen before) and the keys rejected.
+        """
+        applied = []
+        rejected = []
+        with self.lock:
+            for op in ops:
+                key = op.get('key')
+                if key in self.op_keys:
+                    self.duplicate_ops += 1
+                    applied.append(key)
+                    continue
+                kind = op.get('op')
+                if kind in ('delete', 'clear'):
+                    self.remove_submitted(op.get('ids') or [], op.get('created_at') or time.time())
+                elif kind == 'report':
+                    self.reports.append((op.get('level_id'), op.get('reason')))
+                elif kind == 'update_config':
+                    self.config = json.loads(op.get('config') or '{}')
+                else:
+                    rejected.append(key)
+                    continue
+                self.op_keys.add(key)
+                applied.append(key)
+        return applied, rejected
+    
+    def details(self, level_ids):
+        """Full entries for every known level among `level_ids`"""
+        with self.lock:
+            return [self.known[level_id] for level_id in level_ids if level_id in self.known]
+    
+    def fetch(self, since=None, fields=None):
+        """Build a fetch response, as a delta when the revision is known"""
+        shape = slim_level if fields == 'row' else dict
+        with self.lock:
+            oldest = self.changes[0][0] - 1 if self.changes else self.revision
+            if since is None or since > self.revision or since < oldest:
+                return {'success': True, 'revision': self.revision,
+                        'queue': [shape(level) for level in self.levels]}
+            
+            added = {}
+            removed = []
+            changed = {}
+            for revision, kind, payload in self.changes:
+                if revision <= since:
+                    continue
+                if kind == 'added':
+                    added[payload.get('id')] = payload
+                elif kind == 'changed':
+                    if payload.get('id') in added:
+                        added[payload.get('id')] = payload
+                    else:
+                        changed[payload.get('id')] = payload
+                elif payload in added:
+                    del added[payload]
+                else:
+                    changed.pop(payload, None)
+                    removed.append(payload)
+            
+            return {
+                'success': True,
+                'since': since,
+                'revision': self.revision,
+                'added': [shape(level) for level in added.values()],
+                'removed': removed,
+                'changed': [shape(level) for level in changed.values()]
+            }
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Serves the api.php actions the desktop app uses"""
+    
+    server_version = 'HwGDReqsDev/1.0'
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes, don't let Nagle stall the body
+    disable_nagle_algorithm = True
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def do_GET(self):
+        self.handle_api(parse_qs(urlparse(self.path).query))
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+        params = parse_qs(urlparse(self.path).query)
+        params.update(parse_qs(body))
+        self.handle_api(params)
+    
+    def handle_api(self, params):
+        """Dispatch a request on its action parameter"""
+        params = {key: values[-1] for key, values in params.items()}
+        path = urlparse(self.path).path
+        queue = self.server.queue
+        queue.requests += 1
+        
+        if path.endswith('fuck-it.php'):
+            self.send_json({'success': True})
+            return
+        
+        action = params.get('action')
+        if action == 'events' and self.server.push_enabled:
+            since = params.get('since')
+            self.stream_events(int(since) if since and since.isdigit() else None, params.get('fields'))
+        elif action == 'fetch':
+            since = params.get('since')
+            self.send_fetch(int(since) if since and since.isdigit() else None, params.get('fields'))
+        elif action == 'details':
+            ids = [int(level_id) for level_id in (params.get('ids') or '').split(',') if level_id.isdigit()]
+            self.send_json({'success': True, 'levels': queue.details(ids)})
+        elif action == 'heartbeat':
+            ids = [app_id for app_id in (params.get('ids') or '').split(',') if app_id]
+            if ids:
+                queue.heartbeats += len(ids)
+                self.send_json({'success': True, 'ids': ids})
+            else:
+                queue.heartbeats += 1
+                self.send_json({'success': True})
+        elif action == 'update_config':
+            queue.config = json.loads(params.get('config') or '{}')
+            self.send_json({'success': True})
+        elif action == 'ops':
+            applied, rejected = queue.apply_ops(json.loads(params.get('ops') or '[]'))
+            self.send_json({'success': True, 'applied': applied, 'rejected': rejected})
+        else:
+            self.send_json({'success': False, 'error': 'Unknown action'}, status=400)
+    
+    def stream_events(self, since, fields=None):
+        """Serve queue changes as a Server-Sent Events stream"""
+        queue = self.server.queue
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        
+        try:
+            if since is None:
+                since = queue.revision
+            while not self.server.stopping:
+                if queue.wait_for_change(since, self.server.keepalive_interval):
+                    data = queue.fetch(since, fields)
+                    since = data['revision']
+                    chunk = f"event: queue\ndata: {json.dumps(data)}\n\n"
+                else:
+                    chunk = ": keep-alive\n\n"
+                body = chunk.encode('utf-8')
+                queue.bytes_sent += len(body)
+                self.wfile.write(body)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def send_fetch(self, since, fields):
+        """Answer a fetch, or 304 when the client's ETag or date is still current"""
+        queue = self.server.queue
+        with queue.lock:
+            # A fetch response only depends on these while the revision stands still
+            etag = f'"{queue.revision}-{since}-{fields}"'
+            modified = queue.modified
+            data = None if self.is_not_modified(etag, modified) else queue.fetch(since, fields)
+        headers = {'ETag': etag, 'Last-Modified': formatdate(modified, usegmt=True)}
+        if data is None:
+            queue.not_modified += 1
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+        else:
+            self.send_json(data, headers=headers)
+    
+    def is_not_modified(self, etag, modified):
+        """Check the conditional request headers, If-None-Match taking precedence"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')]
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+    
+    def send_json(self, data, status=200, headers=None):
+        """Write a JSON response, compressed when the client accepts it"""
+        body = json.dumps(data).encode('utf-8')
+        headers = dict(headers or {})
+        accepted = [coding.split(';')[0].strip()
+                    for coding in self.headers.get('Accept-Encoding', '').split(',')]
+        if self.server.compress and len(body) > 1024:
+            if brotli is not None and 'br' in accepted:
+                body = brotli.compress(body, quality=5)
+                headers['Content-Encoding'] = 'br'
+            elif 'gzip' in accepted:
+                body = gzip.compress(body, compresslevel=6)
+                headers['Content-Encoding'] = 'gzip'
+        self.server.queue.bytes_sent += len(body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class DevServer(ThreadingHTTPServer):
+    """Threaded HTTP server wrapping a FakeQueue"""
+    
+    daemon_threads = True
+    
+    def __init__(self, host='127.0.0.1', port=0, queue=None, verbose=False,
+                 push_enabled=True, keepalive_interval=15.0, compress=True):
+        super().__init__((host, port), ApiHandler)
+        self.queue = queue or FakeQueue()
+        self.verbose = verbose
+        self.push_enabled = push_enabled
+        self.compress = compress
+        self.keepalive_interval = keepalive_interval
+        self.stopping = False
+        self.thread = None
+    
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self):
+        """Serve in a background thread"""
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.stopping = True
+        with self.queue.lock:
+            self.queue.lock.notify_all()
+        self.shutdown()
+        self.server_close()
+
+
+def generate_submissions(queue, rate, stop_event, rng=random, start_id=1):
+    """Feed synthetic submissions into a queue at roughly `rate` per second"""
+    level_id = start_id
+    while not stop_event.wait(rng.expovariate(rate)):
+        queue.add(make_level(level_id, rng))
+        level_id += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake api.php for HwGDReqs")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help="synthetic submissions per second (0 disables)")
+    parser.add_argument('--prefill', type=int, default=0,
+                        help="number of levels to start the queue with")
+    parser.add_argument('--no-push', action='store_true',
+                        help="answer action=events like a server without push support")
+    parser.add_argument('--no-compress', action='store_true',
+                        help="never gzip/brotli-compress responses")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+    
+    server = DevServer(args.host, args.port, verbose=args.verbose,
+                       push_enabled=not args.no_push, compress=not args.no_compress)
+    for level_id in range(1, args.prefill + 1):
+        server.queue.add(make_level(level_id))
+    
+    stop_event = threading.Event()
+    if args.rate > 0:
+        threading.Thread(
+            target=generate_submissions,
+            args=(server.queue, args.rate, stop_event, random, args.prefill + 1),
+            daemon=True
+        ).start()
+    
+    print(f"Serving fake api.php on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,23 +9,1123 @@ import json
 import os
 import random
 import time
-import requests
+import uuid
+import hashlib
+import tempfile
+import threading
+import queue
+import argparse
+import csv
+import html
+import io
+import itertools
+import operator
+import re
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QListWidget, QPushButton, QLabel, QTextEdit, QDialog, QLineEdit,
+    QListView, QPushButton, QLabel, QTextEdit, QDialog, QLineEdit,
     QCheckBox, QComboBox, QGroupBox, QSplashScreen, QMessageBox,
-    QInputDialog, QFileDialog, QGridLayout
+    QInputDialog, QFileDialog, QGridLayout, QProgressBar, QDateEdit
 )
-from PySide6.QtCore import Qt, QTimer, QThread, Signal
-from PySide6.QtGui import QPixmap, QIcon, QFont
+from PySide6.QtCore import (
+    Qt, QTimer, QThread, QObject, Signal, QAbstractListModel, QModelIndex, QSize, QEvent, QDate,
+    QCoreApplication
+)
+from PySide6.QtGui import QPixmap, QIcon, QFont, QShortcut, QKeySequence
+
+
+API_BASE = os.getenv('HWGDREQS_API_BASE', 'https://hwgdreqs.rf.gd').rstrip('/')
+
+# Queue fetches only ask for what a list row shows, the rest is loaded on demand
+QUEUE_FIELDS = 'row'
+
+
+class NullSpan:
+    """Shared do-nothing span handed out while profiling is off"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Span:
+    """Times one `with` block into a Profiler"""
+    
+    __slots__ = ('profiler', 'name', 'start')
+    
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """Opt-in timers and counters for the app's hot paths
+    
+    While disabled, span() returns one shared no-op context manager and
+    count() returns straight away, so instrumented code costs a single
+    attribute check. While enabled, each span name keeps a rolling window of
+    recent durations for the debug dialog, and every sample is also kept as
+    a trace event for export in the Chrome trace format.
+    """
+    
+    NULL_SPAN = NullSpan()
+    # Histogram bucket upper bounds in milliseconds, the last one is open
+    BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+    
+    def __init__(self, window=500, max_events=50000):
+        self.enabled = False
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.counters = {}
+        self.threads = {}
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+    
+    def span(self, name):
+        """Context manager timing a block under `name`"""
+        if not self.enabled:
+            return self.NULL_SPAN
+        return Span(self, name)
+    
+    def record(self, name, start, duration):
+        """Record a finished span that started at perf_counter() `start`"""
+        if not self.enabled:
+            return
+        tid = threading.get_ident()
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(duration)
+            self.events.append(('X', name, start, duration, tid))
+            if tid not in self.threads:
+                self.threads[tid] = threading.current_thread().name
+    
+    def count(self, name, amount=1):
+        """Add to a named counter"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            value = self.counters[name] = self.counters.get(name, 0) + amount
+            self.events.append(('C', name, now, value, None))
+    
+    def reset(self):
+        """Drop all samples, counters and trace events"""
+        with self.lock:
+            self.samples.clear()
+            self.counters.clear()
+            self.events.clear()
+            self.origin = time.perf_counter()
+    
+    def summary(self):
+        """Count, median, p95 and max in milliseconds for every span name"""
+        with self.lock:
+            windows = {name: sorted(samples) for name, samples in self.samples.items()}
+        summary = {}
+        for name, ordered in sorted(windows.items()):
+            summary[name] = {
+                'count': len(ordered),
+                'p50': ordered[len(ordered) // 2] * 1000,
+                'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'max': ordered[-1] * 1000,
+            }
+        return summary
+    
+    def histogram(self, name):
+        """Bucket counts of a span's rolling window, one more than BUCKETS"""
+        with self.lock:
+            samples = list(self.samples.get(name, ()))
+        counts = [0] * (len(self.BUCKETS) + 1)
+        for duration in samples:
+            milliseconds = duration * 1000
+            for i, bound in enumerate(self.BUCKETS):
+                if milliseconds <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return counts
+    
+    def chrome_trace(self):
+        """All recorded events as a Chrome trace (chrome://tracing, Perfetto)"""
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+            origin = self.origin
+        trace = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in threads.items()
+        ]
+        for phase, name, start, value, tid in events:
+            ts = round((start - origin) * 1e6, 1)
+            if phase == 'X':
+                trace.append({'name': name, 'cat': name.split('.', 1)[0], 'ph': 'X', 'ts': ts,
+                              'dur': round(value * 1e6, 1), 'pid': pid, 'tid': tid})
+            else:
+                trace.append({'name': name, 'ph': 'C', 'ts': ts, 'pid': pid, 'args': {name: value}})
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+    
+    def export_chrome_trace(self, path):
+        """Write the Chrome trace JSON to a file"""
+        atomic_write(path, json.dumps(self.chrome_trace(), separators=(',', ':')).encode('utf-8'))
+
+
+PROFILER = Profiler()
+
+
+def atomic_write(path, data):
+    """Replace a file with new bytes so readers never see a partial write"""
+    path = Path(path)
+    PROFILER.count('disk.bytes', len(data))
+    with PROFILER.span('disk.write'):
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix='.tmp', dir=path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+
+class LevelRecord:
+    """Compact, read-only queue entry, decoded once from the API's JSON
+    
+    Known fields live in __slots__ instead of a per-entry dict, and the
+    difficulty and length names are interned so every entry shares one
+    string object per value. A field the server didn't send reads as None,
+    so hot paths can use plain attribute access (`level.difficulty`). Keys
+    the record doesn't know about, and known ones explicitly sent as null,
+    go to `extra`, so to_dict() reproduces the original JSON object exactly.
+    The read side of the dict API (get, [], in, keys, items, ** unpacking,
+    ==) is supported, so code written against plain level dicts keeps
+    working.
+    """
+    
+    FIELDS = ('id', 'name', 'author', 'difficulty', 'difficultyFace', 'length', 'stars',
+              'flagged', 'flag_reason', 'submitter', 'submitted_at', 'description',
+              'downloads', 'likes')
+    INTERNED = ('difficulty', 'difficultyFace', 'length')
+    __slots__ = FIELDS + ('extra',)
+    
+    def __init__(self, data):
+        set_field = object.__setattr__
+        get = data.get
+        for name in self.FIELDS:
+            set_field(self, name, get(name))
+        for name in self.INTERNED:
+            value = get(name)
+            if type(value) is str:
+                set_field(self, name, sys.intern(value))
+        extra = None
+        if data.keys() - _LEVEL_FIELDS or None in data.values():
+            extra = {key: value for key, value in data.items()
+                     if value is None or key not in _LEVEL_FIELDS}
+        set_field(self, 'extra', extra)
+    
+    @classmethod
+    def decode(cls, levels):
+        """Records for a list of wire dicts, passing existing records through"""
+        return [level if type(level) is cls else cls(level) for level in levels]
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("LevelRecord is read-only")
+    
+    def get(self, key, default=None):
+        if key in _LEVEL_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        extra = self.extra
+        return default if extra is None else extra.get(key, default)
+    
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def keys(self):
+        keys = [name for name in self.FIELDS if getattr(self, name) is not None]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+    
+    def __iter__(self):
+        return iter(self.keys())
+    
+    def __len__(self):
+        return len(self.keys())
+    
+    def items(self):
+        return self.to_dict().items()
+    
+    def to_dict(self):
+        """The entry as a plain dict in the API's JSON schema"""
+        data = {name: value for name, value in zip(self.FIELDS, _level_values(self))
+                if value is not None}
+        if self.extra:
+            data.update(self.extra)
+        return data
+    
+    def __eq__(self, other):
+        if type(other) is LevelRecord:
+            return _level_values(self) == _level_values(other) and self.extra == other.extra
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return f"LevelRecord({self.to_dict()!r})"
+    
+    def __reduce__(self):
+        return LevelRecord, (self.to_dict(),)
+
+
+_MISSING = object()
+_LEVEL_FIELDS = frozenset(LevelRecord.FIELDS)
+_level_values = operator.attrgetter(*LevelRecord.FIELDS)
+
+
+def json_default(value):
+    """json.dumps fallback that writes LevelRecords in the API's schema"""
+    if isinstance(value, LevelRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def apply_queue_delta(queue, added=(), removed=(), changed=()):
+    """Return a new queue with removed ids dropped, changed entries replaced and added appended"""
+    removed = set(removed)
+    changed = {level.get('id'): level for level in changed}
+    new_queue = [
+        changed.get(level.get('id'), level)
+        for level in queue
+        if level.get('id') not in removed
+    ]
+    new_queue.extend(added)
+    return new_queue
+
+
+class JournalStore:
+    """A JSON snapshot plus an append-only JSONL journal of mutations
+    
+    Each mutation costs one appended line instead of a rewrite of the whole
+    file. Once `compact_every` operations have piled up the caller's current
+    data is written as a new snapshot (atomically) and the journal starts
+    over. The journal's first line carries a digest of the snapshot it
+    extends, so a crash between writing the snapshot and truncating the
+    journal can never replay operations twice.
+    """
+    
+    def __init__(self, snapshot_path, journal_path, apply_op, compact_every=500, indent=None):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path)
+        self.apply_op = apply_op
+        self.compact_every = compact_every
+        self.indent = indent
+        self.pending_ops = 0
+        self.base_digest = None
+        self.compact_pending = False
+    
+    @staticmethod
+    def digest(data):
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+    
+    def load(self, default):
+        """Load the snapshot and replay the journal on top of it"""
+        raw = b''
+        data = default
+        if self.snapshot_path.exists():
+            try:
+                raw = self.snapshot_path.read_bytes()
+                data = json.loads(raw)
+            except (OSError, ValueError):
+                raw = b''
+                data = default
+        self.base_digest = self.digest(raw)
+        self.pending_ops = 0
+        
+        if not self.journal_path.exists():
+            return data
+        
+        good_end = 0
+        torn = False
+        try:
+            with open(self.journal_path, 'rb') as f:
+                lines = iter(f)
+                header = next(lines, b'')
+                if json.loads(header or b'{}').get('base') != self.base_digest:
+                    # Journal predates the current snapshot, already folded in
+                    return data
+                good_end = len(header)
+                for line in lines:
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('unterminated journal line')
+                        op = json.loads(line)
+                    except ValueError:
+                        torn = True  # torn final write
+                        break
+                    data = self.apply_op(data, op)
+                    self.pending_ops += 1
+                    good_end += len(line)
+        except (OSError, ValueError):
+            return data
+        if torn:
+            # Cut the fragment off, or later appends would land on its line and be lost
+            try:
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(good_end)
+            except OSError:
+                self.compact_pending = True
+        return data
+    
+    def due(self, count):
+        """Whether journaling `count` more operations writes a snapshot instead"""
+        return self.compact_pending or self.pending_ops + count > self.compact_every
+    
+    def append(self, ops, current):
+        """Journal operations in one write, compacting into `current` when due
+        
+        `current` must already include the effect of `ops`.
+        """
+        if not ops:
+            return
+        if self.due(len(ops)):
+            self.compact(current)
+            return
+        
+        new_journal = not self.journal_path.exists() or self.pending_ops == 0
+        with PROFILER.span('serialize.journal'):
+            lines = [json.dumps(op, separators=(',', ':'), default=json_default) + '\n' for op in ops]
+        if new_journal:
+            lines.insert(0, json.dumps({'base': self.base_digest}) + '\n')
+        with PROFILER.span('disk.journal'):
+            with open(self.journal_path, 'w' if new_journal else 'a', encoding='utf-8') as f:
+                f.write(''.join(lines))
+        self.pending_ops += len(ops)
+    
+    def compact(self, current):
+        """Write `current` as the new snapshot and start an empty journal"""
+        with PROFILER.span('serialize.snapshot'):
+            raw = json.dumps(current, indent=self.indent, default=json_default,
+                             separators=None if self.indent else (',', ':')).encode('utf-8')
+        atomic_write(self.snapshot_path, raw)
+        self.base_digest = self.digest(raw)
+        self.pending_ops = 0
+        self.compact_pending = False
+        try:
+            self.journal_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class HistoryStore:
+    """SQLite-backed history of played levels
+    
+    Opening the store costs the same however long the history is; entries
+    are read in pages on demand and lookups by level id, author, difficulty
+    or play time go through indexes. The full level entry is kept as JSON
+    next to the indexed columns.
+    """
+    
+    COLUMNS = ('seq', 'level_id', 'name', 'author', 'difficulty', 'played_at', 'data')
+    
+    def __init__(self, db_path):
+        import sqlite3  # deferred, the history is opened off the startup path
+        
+        self.db_path = Path(db_path)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS history (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                level_id TEXT,
+                name TEXT,
+                author TEXT,
+                difficulty TEXT,
+                played_at REAL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS history_level_id ON history (level_id);
+            CREATE INDEX IF NOT EXISTS history_author ON history (author);
+            CREATE INDEX IF NOT EXISTS history_difficulty ON history (difficulty);
+            CREATE INDEX IF NOT EXISTS history_played_at ON history (played_at);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._count = None
+    
+    @staticmethod
+    def _row(level, played_at):
+        level_id = level.get('id')
+        return (
+            None if level_id is None else str(level_id),
+            level.get('name'),
+            level.get('author'),
+            level.get('difficulty'),
+            played_at,
+            json.dumps(level, separators=(',', ':'), default=json_default)
+        )
+    
+    def _insert(self, levels, played_at):
+        # Caller holds the lock and the transaction, and counts the rows once it commits
+        rows = [self._row(level, level.get('played_at', played_at)) for level in levels]
+        self.conn.executemany(
+            'INSERT INTO history (level_id, name, author, difficulty, played_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            rows
+        )
+        return len(rows)
+    
+    def _counted(self, added):
+        if self._count is not None:
+            self._count += added
+    
+    def extend(self, levels, played_at=None):
+        """Record levels as played"""
+        played_at = time.time() if played_at is None else played_at
+        if not levels:
+            return
+        with self.lock, PROFILER.span('disk.history'):
+            with self.conn:
+                added = self._insert(levels, played_at)
+            self._counted(added)
+    
+    def append(self, level, played_at=None):
+        """Record one level as played"""
+        self.extend([level], played_at)
+    
+    def __len__(self):
+        with self.lock:
+            if self._count is None:
+                self._count = self.conn.execute('SELECT COUNT(*) FROM history').fetchone()[0]
+            return self._count
+    
+    def has_played(self, level_id):
+        """Check whether a level id has ever been played"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT 1 FROM history WHERE level_id = ? LIMIT 1', (str(level_id),)
+            ).fetchone()
+        return row is not None
+    
+    def _where(self, level_id=None, author=None, difficulty=None, since=None, until=None):
+        clauses = []
+        params = []
+        if level_id is not None:
+            clauses.append('level_id = ?')
+            params.append(str(level_id))
+        if author is not None:
+            clauses.append('author = ?')
+            params.append(author)
+        if difficulty is not None:
+            if isinstance(difficulty, (list, tuple, set)):
+                clauses.append(f"difficulty IN ({', '.join('?' * len(difficulty))})")
+                params.extend(difficulty)
+            else:
+                clauses.append('difficulty = ?')
+                params.append(difficulty)
+        if since is not None:
+            clauses.append('played_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('played_at < ?')
+            params.append(until)
+        return clauses, params
+    
+    def page(self, offset=0, limit=100, newest_first=True, **filters):
+        """Return one page of history entries, newest first by default"""
+        clauses, params = self._where(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        order = 'DESC' if newest_first else 'ASC'
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT data FROM history {where} ORDER BY seq {order} LIMIT ? OFFSET ?",
+                (*params, limit, offset)
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+    
+    def count(self, **filters):
+        """Count history entries matching the filters"""
+        if not filters:
+            return len(self)
+        clauses, params = self._where(**filters)
+        with self.lock:
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM history WHERE {' AND '.join(clauses)}", params
+            ).fetchone()[0]
+    
+    def iter_entries(self, batch_size=500, **filters):
+        """Lazily iterate history entries oldest first, one batch per query"""
+        clauses, params = self._where(**filters)
+        last_seq = 0
+        while True:
+            where = ' AND '.join(clauses + ['seq > ?'])
+            with self.lock:
+                rows = self.conn.execute(
+                    f"SELECT seq, played_at, data FROM history WHERE {where} ORDER BY seq LIMIT ?",
+                    (*params, last_seq, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for seq, played_at, data in rows:
+                level = json.loads(data)
+                level.setdefault('played_at', played_at)
+                yield level
+            last_seq = rows[-1][0]
+    
+    def __iter__(self):
+        return self.iter_entries()
+    
+    def import_legacy(self, history_file, journal_file):
+        """One-time import of history.json (and its journal) into the database
+        
+        A marker row is committed in the same transaction as the imported
+        entries, so the import never runs twice even if the process dies
+        before the files are renamed with an .imported suffix.
+        """
+        history_file = Path(history_file)
+        journal_file = Path(journal_file)
+        if not history_file.exists() and not journal_file.exists():
+            return 0
+        
+        levels = []
+        with self.lock:
+            imported = self.conn.execute(
+                "SELECT 1 FROM meta WHERE key = 'legacy_imported'"
+            ).fetchone() is not None
+            if not imported:
+                legacy = JournalStore(history_file, journal_file, ConfigManager.apply_history_op)
+                levels = legacy.load([])
+                if not isinstance(levels, list):
+                    levels = []
+                played_at = history_file.stat().st_mtime if history_file.exists() else time.time()
+                with PROFILER.span('disk.history'):
+                    with self.conn:
+                        added = self._insert(levels, played_at)
+                        self.conn.execute(
+                            "INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)",
+                            (str(time.time()),)
+                        )
+                self._counted(added)
+        
+        # Only once the import is committed; leftovers from an interrupted rename are just moved
+        for path in (history_file, journal_file):
+            if path.exists():
+                os.replace(path, path.with_name(path.name + '.imported'))
+        return len(levels)
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class LevelStore:
+    """SQLite-backed level metadata keyed by GD level id
+    
+    Filled from queue fetches, detail loads and the history, so anything the
+    app has seen about a level once is there across restarts without asking
+    the server again. Writes merge into the stored entry field by field;
+    `complete` marks levels whose full details (not just the queue row
+    fields) are known. Per-submission fields are never stored.
+    """
+    
+    TRANSIENT = frozenset(('submitter', 'submitted_at', 'played_at'))
+    
+    # Ids per SELECT, well below SQLite's bound parameter limit
+    BATCH_SIZE = 500
+    
+    def __init__(self, db_path):
+        import sqlite3  # deferred, the store is opened off the startup path
+        
+        self.db_path = Path(db_path)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS levels (
+                id TEXT PRIMARY KEY,
+                complete INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL,
+                data TEXT NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        self.hits = 0
+        self.misses = 0
+    
+    @classmethod
+    def _row(cls, level, complete, updated_at):
+        data = {key: value for key, value in level.items()
+                if value is not None and key not in cls.TRANSIENT}
+        return (str(level['id']), int(complete), updated_at,
+                json.dumps(data, separators=(',', ':'), default=json_default))
+    
+    def put_many(self, levels, complete=False):
+        """Merge levels into the store, returning how many were written"""
+        updated_at = time.time()
+        rows = [self._row(level, complete, updated_at) for level in levels
+                if level.get('id') is not None]
+        if not rows:
+            return 0
+        with self.lock, PROFILER.span('disk.levels'):
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT INTO levels (id, complete, updated_at, data) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (id) DO UPDATE SET data = json_patch(data, excluded.data), '
+                    'complete = max(complete, excluded.complete), updated_at = excluded.updated_at',
+                    rows
+                )
+        return len(rows)
+    
+    def get_many(self, level_ids, complete=False):
+        """Stored metadata for many ids in batched queries, as {str(id): entry}"""
+        keys = list(dict.fromkeys(str(level_id) for level_id in level_ids if level_id is not None))
+        found = {}
+        where = ' AND complete = 1' if complete else ''
+        with self.lock:
+            for start in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[start:start + self.BATCH_SIZE]
+                rows = self.conn.execute(
+                    f"SELECT id, data FROM levels WHERE id IN ({', '.join('?' * len(batch))}){where}",
+                    batch
+                ).fetchall()
+                found.update((key, json.loads(data)) for key, data in rows)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+    
+    def get(self, level_id, complete=False):
+        """Stored metadata for one level, or None"""
+        return self.get_many([level_id], complete).get(str(level_id))
+    
+    def enrich(self, levels, batch_size=BATCH_SIZE):
+        """Lazily fill the gaps in level entries from the store, one query per batch
+        
+        Fields the entries carry themselves win over stored ones.
+        """
+        levels = iter(levels)
+        while True:
+            batch = list(itertools.islice(levels, batch_size))
+            if not batch:
+                return
+            stored = self.get_many(level.get('id') for level in batch)
+            for level in batch:
+                known = stored.get(str(level.get('id')))
+                yield {**known, **level} if known else level
+    
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM levels').fetchone()[0]
+    
+    def backfill(self, history):
+        """Seed an empty store from the play history, returning how many entries were read"""
+        if len(self) or not len(history):
+            return 0
+        total = 0
+        entries = history.iter_entries()
+        while True:
+            batch = list(itertools.islice(entries, self.BATCH_SIZE))
+            if not batch:
+                return total
+            self.put_many(batch)
+            total += len(batch)
+    
+    def summary(self):
+        """Human readable store counters"""
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0.0
+        return f"level store: {lookups} lookups, {hit_rate:.0f}% hits"
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class LevelIndex:
+    """Hash index from level id to queue rows and played-before status
+    
+    Queue positions are kept up to date from sync deltas: appended levels
+    are indexed in O(added), while removals only mark the positions stale so
+    they're rebuilt on the next lookup. Played-before answers are cached per
+    id on top of the history database's level id index, so repeated checks
+    don't touch SQLite at all.
+    """
+    
+    def __init__(self, history):
+        self.history = history
+        self.lock = threading.Lock()
+        self.queue = []
+        self.positions = {}
+        self.played = {}
+        self.stale = False
+    
+    @staticmethod
+    def key(level_id):
+        return str(level_id)
+    
+    def rebuild(self, queue):
+        """Index a whole queue"""
+        with self.lock:
+            self.queue = queue
+            self._rebuild()
+    
+    def _rebuild(self):
+        positions = {}
+        for row, level in enumerate(self.queue):
+            positions.setdefault(self.key(level.get('id')), []).append(row)
+        self.positions = positions
+        self.stale = False
+    
+    def update(self, queue, delta=None):
+        """Follow a queue change, incrementally when only levels were appended"""
+        with self.lock:
+            self.queue = queue
+            if delta is None or delta.get('removed') or self.stale:
+                self.stale = True
+                return
+            added = delta.get('added') or []
+            start = len(queue) - len(added)
+            for row, level in enumerate(added, start):
+                self.positions.setdefault(self.key(level.get('id')), []).append(row)
+    
+    def invalidate(self, queue):
+        """Mark positions stale after an in-place queue edit"""
+        with self.lock:
+            self.queue = queue
+            self.stale = True
+    
+    def rows(self, level_id):
+        """Queue rows holding a level id"""
+        with self.lock:
+            if self.stale:
+                self._rebuild()
+            return self.positions.get(self.key(level_id), [])
+    
+    def position(self, level_id):
+        """First queue row holding a level id, or -1"""
+        rows = self.rows(level_id)
+        return rows[0] if rows else -1
+    
+    def is_duplicate(self, level_id):
+        """Check whether a level id is queued more than once"""
+        return len(self.rows(level_id)) > 1
+    
+    def played_before(self, level_id):
+        """Check whether a level id is already in the play history"""
+        key = self.key(level_id)
+        played = self.played.get(key)
+        if played is None:
+            if self.history is None:
+                return False  # history not opened yet
+            played = self.history.has_played(key)
+            self.played[key] = played
+        return played
+    
+    def mark_played(self, levels):
+        """Record levels that were just moved to the history"""
+        for level in levels:
+            self.played[self.key(level.get('id'))] = True
+
+
+class Outbox:
+    """Durable, ordered log of changes waiting to reach the server
+    
+    Deletes, clears, reports and settings updates are recorded here first
+    and sent by the sync thread in order, in batches, whenever the server is
+    reachable. Each entry carries an idempotency key the server applies at
+    most once, so an entry whose acknowledgement got lost is safe to send
+    again. Only the newest pending settings update is kept.
+    
+    Deleted level ids are tombstoned until the server answers the delete,
+    which keeps fetches from bringing them back. A tombstone gives way to a
+    re-submission made after the delete; the server applies a delete only
+    to submissions older than the entry for the same reason. A delete the
+    server rejects drops its tombstone too, as the server will keep listing
+    the level. Past MAX_TOMBSTONES the oldest tombstones not backing a
+    pending entry are trimmed.
+    
+    The state lives in outbox.json plus a journal, written when the owning
+    ConfigManager flushes.
+    """
+    
+    KINDS = ('delete', 'clear', 'report', 'update_config')
+    BATCH_SIZE = 50
+    MAX_TOMBSTONES = 1000
+    
+    def __init__(self, snapshot_path, journal_path):
+        self.journal = JournalStore(snapshot_path, journal_path, self.apply_op, compact_every=100)
+        self.lock = threading.RLock()
+        self.pending_ops = []
+        self.snapshot_due = False
+        self.applied = 0
+        self.rejected = 0
+        state = self.journal.load(self.empty())
+        self.state = state if isinstance(state, dict) else self.empty()
+    
+    @staticmethod
+    def empty():
+        return {'entries': [], 'tombstones': {}}
+    
+    @classmethod
+    def apply_op(cls, state, op):
+        """Replay one journaled outbox operation"""
+        kind = op.get('op')
+        tombstones = state['tombstones']
+        if kind == 'add':
+            entry = op['entry']
+            if entry['kind'] == 'update_config':
+                state['entries'] = [
+                    pending for pending in state['entries']
+                    if not (pending['kind'] == 'update_config' and pending['app_id'] == entry['app_id'])
+                ]
+            state['entries'].append(entry)
+            for level_id in entry.get('ids', ()):
+                tombstones.pop(str(level_id), None)  # re-insert as the newest
+                tombstones[str(level_id)] = entry['created_at']
+            excess = len(tombstones) - cls.MAX_TOMBSTONES
+            if excess > 0:
+                # Pending deletes must keep hiding their levels, trim only the rest
+                pending = {level_id for entry in state['entries'] for level_id in entry.get('ids', ())}
+                for level_id in [key for key in tombstones if key not in pending][:excess]:
+                    del tombstones[level_id]
+        elif kind == 'done':
+            done = set(op.get('applied', ())).union(op.get('rejected', ()))
+            for entry in state['entries']:
+                if entry['key'] not in done:
+                    continue
+                for level_id in entry.get('ids', ()):
+                    if tombstones.get(str(level_id)) == entry['created_at']:
+                        del tombstones[str(level_id)]
+            state['entries'] = [entry for entry in state['entries'] if entry['key'] not in done]
+        elif kind == 'forget':
+            for level_id in op.get('ids', ()):
+                tombstones.pop(level_id, None)
+        return state
+    
+    def _record(self, op):
+        with self.lock:
+            self.state = self.apply_op(self.state, op)
+            self.pending_ops.append(op)
+    
+    def add(self, kind, app_id, ids=(), **data):
+        """Queue a change for the server, returning its entry"""
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown outbound operation: {kind}")
+        entry = {
+            'key': uuid.uuid4().hex,
+            'kind': kind,
+            'app_id': app_id,
+            'created_at': time.time(),
+            'ids': [str(level_id) for level_id in ids if level_id is not None],
+            'data': data
+        }
+        self._record({'op': 'add', 'entry': entry})
+        return entry
+    
+    def batch(self):
+        """The oldest pending entries that can go out in one request, all for one APP-ID"""
+        with self.lock:
+            entries = self.state['entries']
+            if not entries:
+                return []
+            app_id = entries[0]['app_id']
+            return list(itertools.takewhile(lambda entry: entry['app_id'] == app_id,
+                                            entries[:self.BATCH_SIZE]))
+    
+    def done(self, applied, rejected=()):
+        """Drop entries the server has applied or turned down"""
+        applied = list(applied)
+        rejected = list(rejected)
+        if applied or rejected:
+            self._record({'op': 'done', 'applied': applied, 'rejected': rejected})
+            self.applied += len(applied)
+            self.rejected += len(rejected)
+    
+    def __len__(self):
+        return len(self.state['entries'])
+    
+    def resolve(self, data):
+        """A fetch response without the levels deleted here that the server still lists"""
+        with self.lock:
+            tombstones = self.state['tombstones']
+            if not tombstones:
+                return data
+            resubmitted = []
+            
+            def keep(level):
+                level_id = str(level.get('id'))
+                deleted_at = tombstones.get(level_id)
+                if deleted_at is None:
+                    return True
+                try:
+                    submitted_at = float(level.get('submitted_at'))
+                except (TypeError, ValueError):
+                    return False  # without a usable submission time it's not a re-submission
+                if submitted_at > deleted_at:
+                    resubmitted.append(level_id)
+                    return True
+                return False
+            
+            resolved = dict(data)
+            for field in ('queue', 'added', 'changed'):
+                if data.get(field):
+                    resolved[field] = [level for level in data[field] if keep(level)]
+            if resubmitted:
+                self._record({'op': 'forget', 'ids': resubmitted})
+        return resolved
+    
+    def flush(self):
+        """Journal pending operations, returning True if anything was written
+        
+        After a failed write the next flush writes a full snapshot instead,
+        as the journal may hold part of the failed append.
+        """
+        with self.lock:
+            ops = self.pending_ops
+            if not ops and not self.snapshot_due:
+                return False
+            self.pending_ops = []
+            snapshot_due = self.snapshot_due
+            self.snapshot_due = False
+            current = None
+            if snapshot_due or self.journal.due(len(ops)):
+                current = {'entries': list(self.state['entries']),
+                           'tombstones': dict(self.state['tombstones'])}
+        try:
+            if snapshot_due:
+                self.journal.compact(current)
+            else:
+                self.journal.append(ops, current)
+        except Exception:
+            with self.lock:
+                self.snapshot_due = True
+            raise
+        return True
+    
+    def summary(self):
+        """Human readable outbox counters"""
+        return f"Outbox: {len(self)} pending, {self.applied} applied, {self.rejected} rejected"
+
+
+class PersistenceWorker(threading.Thread):
+    """Write-behind flushing for ConfigManager
+    
+    Every change pokes the worker, which waits until changes have been quiet
+    for `debounce` seconds (but never longer than `max_delay` after the
+    first one) and then flushes everything in one go, so a burst of
+    submissions costs a single disk write. Failed writes stay pending and
+    are retried with backoff.
+    """
+    
+    MAX_RETRY_DELAY = 30.0
+    
+    def __init__(self, config_manager, debounce=0.5, max_delay=2.0):
+        super().__init__(daemon=True, name='hwgdreqs-persist')
+        self.config_manager = config_manager
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.wake_event = threading.Event()
+        self.stopping = False
+        self.flushes = 0
+        self.errors = 0
+        self.last_error = ''
+    
+    def poke(self):
+        """Note that something changed"""
+        self.wake_event.set()
+    
+    def run(self):
+        while not self.stopping:
+            self.wake_event.wait()
+            if self.stopping:
+                break
+            
+            deadline = time.monotonic() + self.max_delay
+            while not self.stopping:
+                self.wake_event.clear()
+                remaining = min(self.debounce, deadline - time.monotonic())
+                if remaining <= 0 or not self.wake_event.wait(remaining):
+                    break
+            
+            if not self.flush() and not self.stopping:
+                # The failed writes are still pending, retry them with backoff
+                self.wake_event.wait(min(self.MAX_RETRY_DELAY, self.debounce * 2 ** self.errors))
+                self.wake_event.set()
+    
+    def flush(self):
+        """Write out everything pending now, returning False if that failed"""
+        try:
+            if self.config_manager.flush():
+                self.flushes += 1
+        except Exception as e:
+            # e.g. a database locked by another instance, or a file held open on Windows
+            self.errors += 1
+            self.last_error = str(e)
+            return False
+        self.errors = 0
+        return True
+    
+    def stop(self):
+        """Stop the worker and drain pending writes"""
+        self.stopping = True
+        self.wake_event.set()
+        if self.is_alive():
+            self.join(timeout=5)
+        self.flush()
 
 
 class ConfigManager:
-    """Handles all configuration and data persistence"""
+    """Handles all configuration and data persistence
     
-    def __init__(self):
-        if sys.platform == "win32":
+    Changes are written synchronously unless start_persistence() has been
+    called, after which they're buffered and flushed by a PersistenceWorker.
+    With `load_data=False` only the config is read up front; the queue and
+    history stay empty until load_data() runs, typically on a worker thread
+    once the window is on screen. Extra channels get their own ConfigManager
+    rooted at `channels/<name>-<hash of app_id>` inside the main config
+    directory.
+    """
+    
+    def __init__(self, load_data=True, config_dir=None, level_store=None):
+        if config_dir is not None:
+            self.config_dir = Path(config_dir)
+        elif sys.platform == "win32":
             self.config_dir = Path(os.getenv('APPDATA')) / 'HwGDReqs'
         else:
             self.config_dir = Path.home() / '.hwgdreqs'
@@ -34,10 +1134,80 @@ class ConfigManager:
         self.config_file = self.config_dir / 'config.json'
         self.queue_file = self.config_dir / 'queue.json'
         self.history_file = self.config_dir / 'history.json'
+        self.queue_journal = JournalStore(self.queue_file, self.config_dir / 'queue.journal.jsonl',
+                                          self.apply_queue_op, compact_every=200)
+        self.history_db_file = self.config_dir / 'history.db'
+        self.level_db_file = self.config_dir / 'levels.db'
+        self.outbox = Outbox(self.config_dir / 'outbox.json', self.config_dir / 'outbox.journal.jsonl')
+        
+        self.lock = threading.RLock()
+        self.flush_lock = threading.Lock()
+        self.persistence = None
+        self.changes = 0
+        self.pending_config = None
+        self.pending_queue_ops = []
+        self.queue_snapshot_due = False
+        self.pending_history = []
+        self.pending_levels = []
+        self.outbound_listener = None  # called when something is added to the outbox
+        self.loaded = threading.Event()
         
         self.config = self.load_config()
-        self.queue = self.load_queue()
-        self.history = self.load_history()
+        self.queue = []
+        self.history = None
+        self.level_store = level_store  # shared with extra channels, closed by its owner
+        self.owns_level_store = level_store is None
+        self.index = LevelIndex(None)
+        if load_data:
+            self.load_data()
+    
+    def load_data(self):
+        """Load the queue and open the history, safe to run on a worker thread"""
+        queue = self.load_queue()
+        history = self.load_history()
+        level_store = self.level_store
+        if level_store is None:
+            level_store = LevelStore(self.level_db_file)
+            level_store.backfill(history)
+        with self.lock:
+            self.queue = queue
+            self.history = history
+            self.level_store = level_store
+            self.index.history = history
+            self.index.rebuild(queue)
+        self.loaded.set()
+        return queue
+    
+    @staticmethod
+    def safe_name(app_id):
+        return ''.join(c if c.isalnum() or c in '-_' else '_' for c in str(app_id))
+    
+    @classmethod
+    def channel_dir_name(cls, app_id):
+        """Directory name for a channel: readable, but told apart by a hash of the exact id"""
+        digest = hashlib.blake2b(str(app_id).encode('utf-8'), digest_size=8).hexdigest()
+        return f"{cls.safe_name(app_id)[:32]}-{digest}"
+    
+    def open_channel(self, app_id, load_data=True):
+        """ConfigManager for an extra channel, stored under channels/<channel_dir_name>"""
+        channels_dir = self.config_dir / 'channels'
+        channel_dir = channels_dir / self.channel_dir_name(app_id)
+        # Earlier versions used the sanitized id alone, which could collide
+        legacy_dir = channels_dir / self.safe_name(app_id)
+        if not channel_dir.exists() and legacy_dir.is_dir():
+            try:
+                legacy_id = json.loads((legacy_dir / 'config.json').read_text()).get('app_id')
+            except (OSError, ValueError):
+                legacy_id = None
+            if legacy_id == app_id:
+                os.replace(legacy_dir, channel_dir)
+        channel = ConfigManager(load_data, channel_dir, self.level_store)
+        if channel.config.get('app_id') != app_id:
+            channel.config['app_id'] = app_id
+            channel.save_config()
+        if self.persistence is not None:
+            channel.start_persistence()
+        return channel
     
     def load_config(self):
         """Load configuration from file"""
@@ -56,7 +1226,13 @@ class ConfigManager:
             'bg_image': '',
             'submit_message': 'Okay! {levelname} submitted to {streamername}',
             'offline_message': 'he doesnt have the app on btw :<',
-            'show_donate': True
+            'show_donate': True,
+            'push_updates': True,
+            'profiling': False,
+            'filter_mode': 'hide',  # 'hide' or 'mark' queued levels the filters reject
+            'channels': [],  # extra APP-IDs synced alongside app_id
+            'random_mode': 'uniform',  # LevelPicker strategy: 'uniform', 'wait' or 'fair'
+            'random_skip_played': False
         }
         
         if self.config_file.exists():
@@ -69,93 +1245,2276 @@ class ConfigManager:
         
         return default_config
     
-    def save_config(self):
-        """Save configuration to file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
+    def save_config(self):
+        """Save configuration to file"""
+        with self.lock, PROFILER.span('serialize.config'):
+            self.pending_config = json.dumps(self.config, separators=(',', ':')).encode('utf-8')
+        self.changed()
+    
+    def load_queue(self):
+        """Load queue from its snapshot and journal"""
+        queue = self.queue_journal.load([])
+        return LevelRecord.decode(queue) if isinstance(queue, list) else []
+    
+    def save_queue(self):
+        """Save a full queue snapshot"""
+        with self.lock:
+            self.queue_snapshot_due = True
+            self.pending_queue_ops = []
+        self.changed()
+    
+    @staticmethod
+    def apply_queue_op(queue, op):
+        """Replay one journaled queue operation"""
+        kind = op.get('op')
+        if kind == 'delta':
+            return apply_queue_delta(queue, op.get('added', []), op.get('removed', []),
+                                     op.get('changed', []))
+        if kind == 'remove':
+            index = op.get('index', -1)
+            if 0 <= index < len(queue) and queue[index].get('id') == op.get('id'):
+                del queue[index]
+            return queue
+        if kind == 'clear':
+            return []
+        return queue
+    
+    def _queue_op(self, op):
+        with self.lock:
+            if not self.queue_snapshot_due:
+                self.pending_queue_ops.append(op)
+        self.changed()
+    
+    def update_queue(self, new_queue, delta=None):
+        """Replace the queue, journaling just the delta when one is known"""
+        with self.lock:
+            if delta is not None:
+                self.pending_levels.extend(delta.get('added', ()))
+                self.pending_levels.extend(delta.get('changed', ()))
+            else:
+                # Unchanged entries are the same objects across fetches
+                known = set(map(id, self.queue))
+                self.pending_levels.extend(level for level in new_queue if id(level) not in known)
+            self.queue = new_queue
+            self.index.update(new_queue, delta)
+        if delta is None:
+            self.save_queue()
+        else:
+            self._queue_op({'op': 'delta', **delta})
+    
+    def remove_from_queue(self, index):
+        """Remove and return the level at a queue position"""
+        with self.lock:
+            level = self.queue.pop(index)
+            self.index.invalidate(self.queue)
+        self._queue_op({'op': 'remove', 'index': index, 'id': level.get('id')})
+        return level
+    
+    def clear_queue(self):
+        """Empty the queue"""
+        with self.lock:
+            self.queue = []
+            self.index.rebuild(self.queue)
+        self._queue_op({'op': 'clear'})
+    
+    def load_history(self):
+        """Open the history database, importing history.json on first run"""
+        history = HistoryStore(self.history_db_file)
+        history.import_legacy(self.history_file, self.config_dir / 'history.journal.jsonl')
+        return history
+    
+    @staticmethod
+    def apply_history_op(history, op):
+        """Replay one journaled history operation (legacy history.json import)"""
+        if op.get('op') == 'append':
+            history.extend(op.get('levels', []))
+        return history
+    
+    def add_history(self, levels):
+        """Append played levels to the history"""
+        levels = list(levels)
+        played_at = time.time()
+        with self.lock:
+            self.pending_history.extend({**level, 'played_at': played_at} for level in levels)
+            self.pending_levels.extend(levels)
+        self.index.mark_played(levels)
+        self.changed()
+    
+    def record_outbound(self, kind, ids=(), **data):
+        """Queue a change for the server in the outbox, see Outbox"""
+        entry = self.outbox.add(kind, self.config.get('app_id'), ids, **data)
+        self.changed()
+        if self.outbound_listener is not None:
+            self.outbound_listener()
+        return entry
+    
+    def outbound_done(self, applied, rejected=()):
+        """Drop outbox entries the server has answered"""
+        self.outbox.done(applied, rejected)
+        self.changed()
+    
+    def changed(self):
+        """Flush now, or hand off to the persistence worker when it runs"""
+        self.changes += 1
+        if self.persistence is not None:
+            self.persistence.poke()
+        else:
+            self.flush()
+    
+    def flush(self):
+        """Write all pending changes, returning True if anything was written"""
+        with self.flush_lock, PROFILER.span('disk.flush'):
+            with self.lock:
+                config = self.pending_config
+                snapshot = list(self.queue) if self.queue_snapshot_due else None
+                queue_ops = self.pending_queue_ops
+                current_queue = (list(self.queue)
+                                 if queue_ops and self.queue_journal.due(len(queue_ops)) else None)
+                history = self.pending_history
+                levels = self.pending_levels if self.level_store is not None else []
+                self.pending_config = None
+                self.queue_snapshot_due = False
+                self.pending_queue_ops = []
+                self.pending_history = []
+                if levels:
+                    self.pending_levels = []
+            
+            written = bool(config is not None or snapshot is not None or queue_ops or history or levels)
+            try:
+                if config is not None:
+                    atomic_write(self.config_file, config)
+                    config = None
+                if snapshot is not None:
+                    self.queue_journal.compact(snapshot)
+                    snapshot = None
+                elif queue_ops:
+                    self.queue_journal.append(queue_ops, current_queue)
+                queue_ops = []
+                if history:
+                    self.history.extend(history)
+                    history = []
+                if levels:
+                    self.level_store.put_many(levels)
+                    levels = []
+                return self.outbox.flush() or written
+            except Exception:
+                self.restore_pending(config, snapshot is not None or bool(queue_ops), history, levels)
+                raise
+    
+    def restore_pending(self, config, queue_snapshot, history, levels):
+        """Put back the writes a failed flush didn't get to, for the next one to retry"""
+        with self.lock:
+            if config is not None and self.pending_config is None:
+                self.pending_config = config
+            if queue_snapshot:
+                # A snapshot also covers journal ops whose append may have been cut short
+                self.queue_snapshot_due = True
+                self.pending_queue_ops = []
+            self.pending_history[:0] = history
+            self.pending_levels[:0] = levels
+    
+    def start_persistence(self, debounce=0.5, max_delay=2.0):
+        """Switch to debounced background writes"""
+        if self.persistence is None:
+            self.persistence = PersistenceWorker(self, debounce, max_delay)
+            self.persistence.start()
+    
+    def persistence_summary(self):
+        """Human readable write coalescing counters"""
+        if self.persistence is None:
+            return f"Disk: {self.changes} changes written synchronously"
+        flushes = self.persistence.flushes
+        summary = (f"Disk: {self.changes} changes in {flushes} flushes "
+                   f"({max(0, self.changes - flushes)} writes coalesced)")
+        if self.persistence.errors:
+            summary += f", write failing: {self.persistence.last_error}"
+        return summary
+    
+    def close(self):
+        """Flush pending writes and release open storage handles"""
+        if self.persistence is not None:
+            self.persistence.stop()
+            self.persistence = None
+        else:
+            self.flush()
+        if self.history is not None:
+            self.history.close()
+        if self.level_store is not None and self.owns_level_store:
+            self.level_store.close()
+
+
+# Columns of the tabular export formats
+EXPORT_COLUMNS = ('id', 'name', 'author', 'difficulty', 'length', 'played_at')
+
+
+def format_timestamp(timestamp):
+    """Local date and time for a unix timestamp, empty when unknown"""
+    if not timestamp:
+        return ''
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
+
+
+def export_value(level, column):
+    """One export cell of a level entry"""
+    if column == 'played_at':
+        return format_timestamp(level.get('played_at'))
+    value = level.get(column)
+    return '' if value is None else value
+
+
+def export_text(records, title):
+    """Plain text export, one block per level"""
+    yield f"HwGDReqs {title} Export\n"
+    yield "=" * 50 + "\n\n"
+    for i, level in enumerate(records, 1):
+        chunk = (f"{i}. {level.get('name')} (ID: {level.get('id')})\n"
+                 f"   Author: {level.get('author')}\n"
+                 f"   Difficulty: {level.get('difficulty')}\n"
+                 f"   Length: {level.get('length')}\n")
+        if level.get('played_at'):
+            chunk += f"   Played: {format_timestamp(level['played_at'])}\n"
+        yield chunk + "\n"
+
+
+def export_csv(records, title):
+    """CSV export with a header row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    
+    def take():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+    
+    writer.writerow(('position',) + EXPORT_COLUMNS)
+    yield take()
+    for i, level in enumerate(records, 1):
+        writer.writerow([i] + [export_value(level, column) for column in EXPORT_COLUMNS])
+        yield take()
+
+
+def export_jsonl(records, title):
+    """JSON Lines export, the full entry of each level"""
+    for level in records:
+        yield json.dumps(level, ensure_ascii=False, default=json_default) + "\n"
+
+
+def export_html(records, title):
+    """Standalone HTML table export"""
+    yield (f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+           f"<title>HwGDReqs {html.escape(title)} Export</title>\n</head>\n<body>\n"
+           f"<h1>HwGDReqs {html.escape(title)} Export</h1>\n<table border=\"1\">\n<tr><th>#</th>"
+           + ''.join(f"<th>{column}</th>" for column in EXPORT_COLUMNS) + "</tr>\n")
+    for i, level in enumerate(records, 1):
+        yield (f"<tr><td>{i}</td>"
+               + ''.join(f"<td>{html.escape(str(export_value(level, column)))}</td>"
+                         for column in EXPORT_COLUMNS)
+               + "</tr>\n")
+    yield "</table>\n</body>\n</html>\n"
+
+
+# Format name -> (file extension, file dialog filter, writer)
+EXPORT_FORMATS = {
+    'Text': ('txt', 'Text Files (*.txt)', export_text),
+    'CSV': ('csv', 'CSV Files (*.csv)', export_csv),
+    'JSON Lines': ('jsonl', 'JSON Lines (*.jsonl)', export_jsonl),
+    'HTML': ('html', 'HTML Files (*.html)', export_html),
+}
+
+
+class ExportThread(QThread):
+    """Streams records through an export writer into a file
+    
+    `source` runs on the thread and returns `(records, total)`, where
+    records is an iterable consumed lazily, so exports of any size run in
+    constant memory. The file is written next to its destination and only
+    moved into place once complete.
+    """
+    
+    progress = Signal(int, int)
+    exported = Signal(str, int)
+    failed = Signal(str)
+    
+    PROGRESS_EVERY = 250
+    
+    def __init__(self, path, writer, title, source, parent=None):
+        super().__init__(parent)
+        self.path = Path(path)
+        self.writer = writer
+        self.title = title
+        self.source = source
+        self.written = 0
+        self.total = 0
+    
+    def counted(self, records):
+        """Pass records through, reporting progress along the way"""
+        for level in records:
+            if self.isInterruptionRequested():
+                return
+            yield level
+            self.written += 1
+            if self.written % self.PROGRESS_EVERY == 0:
+                self.progress.emit(self.written, self.total)
+    
+    def run(self):
+        part_path = self.path.with_name(self.path.name + '.part')
+        try:
+            records, self.total = self.source()
+            self.progress.emit(0, self.total)
+            with open(part_path, 'w', encoding='utf-8') as f:
+                for chunk in self.writer(self.counted(records), self.title):
+                    f.write(chunk)
+            if self.isInterruptionRequested():
+                part_path.unlink()
+                self.failed.emit("Export cancelled")
+                return
+            os.replace(part_path, self.path)
+            self.progress.emit(self.written, self.total)
+            self.exported.emit(str(self.path), self.written)
+        except Exception as e:
+            try:
+                part_path.unlink()
+            except OSError:
+                pass
+            self.failed.emit(str(e))
+
+
+class EndpointStats:
+    """Latency, failure and transfer counters for one API endpoint
+    
+    `bytes_received` counts what came over the wire and `bytes_decoded` the
+    bodies after gzip/brotli decoding, so their difference is what
+    compression saved. `bytes_not_resent` is the size of the full responses
+    that 304 Not Modified answers stood in for.
+    """
+    
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+        self.last_error = ''
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.not_modified = 0
+        self.bytes_not_resent = 0
+    
+    @property
+    def bytes_saved(self):
+        return self.bytes_decoded - self.bytes_received + self.bytes_not_resent
+    
+    @property
+    def average_latency(self):
+        return self.total_latency / self.requests if self.requests else 0.0
+    
+    def record(self, latency, error=None):
+        """Record one finished request"""
+        self.requests += 1
+        self.total_latency += latency
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        if error is not None:
+            self.failures += 1
+            self.last_error = str(error)
+    
+    def record_transfer(self, received, decoded):
+        """Record one response body's wire and decoded size"""
+        self.bytes_received += received
+        self.bytes_decoded += decoded
+
+
+class ConditionalState:
+    """Validators from the last full response to one request
+    
+    The ETag and Last-Modified headers are only replayed (as If-None-Match /
+    If-Modified-Since) for a request with exactly the same parameters.
+    `size` is what that response cost on the wire, which is what a later
+    304 saves.
+    """
+    
+    def __init__(self):
+        self.params = None
+        self.etag = None
+        self.last_modified = None
+        self.size = 0
+    
+    def headers(self, params):
+        """Conditional request headers for `params`, empty if they differ"""
+        if params != self.params:
+            return {}
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+    
+    def update(self, params, response):
+        """Remember a full response's validators"""
+        self.params = dict(params)
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        self.size = ApiClient.wire_size(response)
+    
+    def clear(self):
+        self.params = None
+
+
+class ApiClient:
+    """Shared HTTP client for every hwgdreqs.rf.gd call
+    
+    One pooled keep-alive session is reused for all requests, so sync ticks
+    don't pay a fresh TCP+TLS handshake each time. Connection failures are
+    retried with backoff for every endpoint; read failures and 5xx responses
+    are only retried for GETs, which are safe to repeat. Once close() runs,
+    new requests fail straight away and requests in flight stop retrying, so
+    a sync thread waiting on the network finishes within one timeout.
+    """
+    
+    # (connect, read) timeouts per endpoint, in seconds
+    TIMEOUTS = {
+        'fetch': (3.05, 5),
+        'heartbeat': (3.05, 5),
+        'update_config': (3.05, 10),
+        'report': (3.05, 10),
+        'details': (3.05, 5),
+        'ops': (3.05, 5),
+    }
+    DEFAULT_TIMEOUT = (3.05, 5)
+    
+    def __init__(self, base_url=API_BASE, workers=4):
+        self.base_url = base_url
+        self.workers = workers
+        self.started = time.time()
+        self.stats = {}
+        self.stats_lock = threading.Lock()
+        self.executor = None
+        self._session = None
+        self.session_lock = threading.Lock()
+        self.closing = threading.Event()
+    
+    @property
+    def session(self):
+        """The pooled session, built on first use to keep requests off the startup path"""
+        if self._session is None:
+            with self.session_lock:
+                if self._session is None:
+                    self._session = self._make_session()
+        return self._session
+    
+    def _make_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.exceptions import ProtocolError
+        from urllib3.util.retry import Retry
+        
+        closing = self.closing
+        
+        class ClosingRetry(Retry):
+            """Backoff that gives up as soon as the client closes"""
+            
+            def increment(self, *args, **kwargs):
+                if closing.is_set():
+                    raise ProtocolError("API client closed")
+                return super().increment(*args, **kwargs)
+            
+            def sleep(self, response=None):
+                delay = None
+                if response is not None and self.respect_retry_after_header:
+                    delay = self.get_retry_after(response)
+                if closing.wait(self.get_backoff_time() if delay is None else delay):
+                    raise ProtocolError("API client closed")
+        
+        retry = ClosingRetry(
+            total=3,
+            connect=2,
+            read=1,
+            status=2,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.workers * 2, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['User-Agent'] = 'HwGDReqs'
+        return session
+    
+    def request(self, method, endpoint, path='api.php', **kwargs):
+        """Send a request, recording latency and failures under `endpoint`"""
+        if self.closing.is_set():
+            raise RuntimeError("API client closed")
+        kwargs.setdefault('timeout', self.TIMEOUTS.get(endpoint, self.DEFAULT_TIMEOUT))
+        start = time.perf_counter()
+        error = None
+        response = None
+        try:
+            response = self.session.request(method, f"{self.base_url}/{path}", **kwargs)
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code}"
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            PROFILER.record(f"http.{endpoint}", start, elapsed)
+            if error is not None:
+                PROFILER.count('http.errors')
+            with self.stats_lock:
+                stats = self.stats.setdefault(endpoint, EndpointStats())
+                stats.record(elapsed, error)
+                if response is not None and not kwargs.get('stream'):
+                    stats.record_transfer(self.wire_size(response), len(response.content))
+    
+    @staticmethod
+    def wire_size(response):
+        """Bytes a response body took on the wire, before content decoding"""
+        try:
+            return response.raw.tell()
+        except Exception:
+            return len(response.content)
+    
+    def record_not_modified(self, endpoint, size):
+        """Count a 304 answer that stood in for a `size`-byte response"""
+        with self.stats_lock:
+            stats = self.stats.setdefault(endpoint, EndpointStats())
+            stats.not_modified += 1
+            stats.bytes_not_resent += size
+    
+    def get(self, endpoint, params=None, **kwargs):
+        """GET an api.php action"""
+        return self.request('GET', endpoint, params=params, **kwargs)
+    
+    def post(self, endpoint, data=None, **kwargs):
+        """POST to an api.php action"""
+        return self.request('POST', endpoint, data=data, **kwargs)
+    
+    def submit(self, fn, *args, **kwargs):
+        """Run a call on the shared worker pool and return its Future"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                               thread_name_prefix='hwgdreqs-api')
+        return self.executor.submit(fn, *args, **kwargs)
+    
+    def stats_summary(self):
+        """Human readable per-endpoint counters"""
+        with self.stats_lock:
+            lines = [
+                f"{endpoint}: {stats.requests} requests, {stats.failures} failed, "
+                f"avg {stats.average_latency * 1000:.0f} ms, max {stats.max_latency * 1000:.0f} ms, "
+                f"{stats.bytes_received / 1024:.0f} KiB received"
+                + (f", {stats.not_modified} not modified" if stats.not_modified else '')
+                for endpoint, stats in sorted(self.stats.items())
+            ]
+        if not lines:
+            return 'No requests yet'
+        lines.append(self.transfer_summary())
+        return '\n'.join(lines)
+    
+    def transfer_summary(self):
+        """Bytes saved per hour by compression and 304 answers, over the client's lifetime"""
+        with self.stats_lock:
+            compressed = sum(stats.bytes_decoded - stats.bytes_received for stats in self.stats.values())
+            not_resent = sum(stats.bytes_not_resent for stats in self.stats.values())
+        hours = max(time.time() - self.started, 1.0) / 3600
+        return (f"Saved {(compressed + not_resent) / hours / 1048576:.1f} MiB/h: "
+                f"{compressed / hours / 1048576:.1f} MiB/h compression, "
+                f"{not_resent / hours / 1048576:.1f} MiB/h not modified")
+    
+    def close(self):
+        """Shut down the worker pool and close pooled connections, failing further requests"""
+        self.closing.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self._session is not None:
+            self._session.close()
+
+
+class DetailCache:
+    """Size-bounded LRU cache of full level details with a TTL
+    
+    Safe to use from worker threads. Expired entries are dropped when they
+    are next looked at; the least recently used entry is evicted once the
+    cache is full.
+    """
+    
+    def __init__(self, max_entries=256, ttl=600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def _fresh(self, key):
+        # Caller holds the lock
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if self.clock() - entry[0] > self.ttl:
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        return entry
+    
+    def get(self, level_id):
+        """Cached details for a level, or None"""
+        key = str(level_id)
+        with self.lock:
+            entry = self._fresh(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, level_id, details):
+        """Store details for a level"""
+        key = str(level_id)
+        with self.lock:
+            self.entries[key] = (self.clock(), details)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def missing(self, level_ids):
+        """The ids without fresh details, without counting hits or misses"""
+        with self.lock:
+            return [level_id for level_id in level_ids if self._fresh(str(level_id)) is None]
+    
+    def clear(self):
+        """Drop every cached entry"""
+        with self.lock:
+            self.entries.clear()
+    
+    def summary(self):
+        """Human readable cache counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            hit_rate = self.hits / lookups * 100 if lookups else 0.0
+            return (f"details cache: {len(self.entries)}/{self.max_entries} entries, "
+                    f"{hit_rate:.0f}% hits, {self.evictions} evicted, {self.expirations} expired")
+
+
+class DetailLoader:
+    """Fetches full level details into a DetailCache with action=details
+    
+    Details already in the LevelStore returned by `store_provider` are taken
+    from there; only the gaps go to the server, in batches of BATCH_SIZE ids
+    per request, and whatever comes back is written to the store for next
+    time. Servers that don't know the action are remembered as unsupported,
+    after which the fields embedded in queue entries are all the details
+    there are.
+    """
+    
+    BATCH_SIZE = 100
+    
+    def __init__(self, api, cache, params_provider, store_provider=lambda: None):
+        self.api = api
+        self.cache = cache
+        self.params_provider = params_provider
+        self.store_provider = store_provider
+        self.supported = True
+    
+    def pending(self, level_ids):
+        """Ids that a load would actually have to fetch"""
+        if not self.supported:
+            return []
+        return self.cache.missing([level_id for level_id in level_ids if level_id is not None])
+    
+    def load(self, level_ids):
+        """Cache details for the ids not cached yet, runs on a worker thread"""
+        missing = self.pending(level_ids)
+        if not missing:
+            return 0
+        
+        loaded = 0
+        store = self.store_provider()
+        if store is not None:
+            stored = store.get_many(missing, complete=True)
+            for key, details in stored.items():
+                self.cache.put(key, details)
+            missing = [level_id for level_id in missing if str(level_id) not in stored]
+            loaded = len(stored)
+        
+        params = self.params_provider()
+        if params is None:
+            return loaded
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            levels = self.fetch(params, missing[start:start + self.BATCH_SIZE])
+            if levels is None:
+                break
+            for details in levels:
+                self.cache.put(details['id'], details)
+            if store is not None:
+                store.put_many(levels, complete=True)
+            loaded += len(levels)
+        return loaded
+    
+    def fetch(self, params, level_ids):
+        """Details for a batch of ids from the server, None if it doesn't support them"""
+        response = self.api.get('details', params={
+            **params,
+            'action': 'details',
+            'ids': ','.join(str(level_id) for level_id in level_ids)
+        })
+        if response.status_code in (400, 404, 501):
+            self.supported = False
+            return None
+        response.raise_for_status()
+        
+        data = response.json()
+        if not data.get('success'):
+            self.supported = False
+            return None
+        return [details for details in data.get('levels') or [] if details.get('id') is not None]
+
+
+class BackgroundTask:
+    """A call handed to TaskRunner, with its completion callbacks"""
+    
+    def __init__(self, key, on_success=None, on_error=None):
+        self.key = key
+        self.on_success = on_success
+        self.on_error = on_error
+        self.future = None
+        self.cancelled = False
+    
+    def cancel(self):
+        """Drop the task's callbacks and stop it if it hasn't started yet"""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class TaskRunner(QObject):
+    """Runs blocking calls off the GUI thread and reports back through signals
+    
+    Tasks are keyed: running a key that is already in flight returns the
+    existing task instead of starting a duplicate, unless `replace` is set,
+    in which case the old task's callbacks are dropped in favour of the new
+    one. Callbacks always run on the thread that owns the runner.
+    """
+    
+    task_finished = Signal(object, object, object)
+    busy_changed = Signal(int)
+    
+    def __init__(self, submit, parent=None):
+        super().__init__(parent)
+        self.submit = submit
+        self.tasks = {}
+        self.task_finished.connect(self._on_task_finished)
+    
+    def run(self, key, fn, on_success=None, on_error=None, replace=False):
+        """Run `fn` in the background and call back with its result or error"""
+        existing = self.tasks.get(key)
+        if existing is not None:
+            if not replace:
+                return existing
+            existing.cancel()
+        
+        task = BackgroundTask(key, on_success, on_error)
+        self.tasks[key] = task
+        task.future = self.submit(fn)
+        task.future.add_done_callback(lambda future: self._on_future_done(task, future))
+        self.busy_changed.emit(len(self.tasks))
+        return task
+    
+    def cancel(self, key):
+        """Cancel an in-flight task by key"""
+        task = self.tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+            self.busy_changed.emit(len(self.tasks))
+    
+    def cancel_all(self):
+        """Cancel every in-flight task"""
+        for key in list(self.tasks):
+            self.cancel(key)
+    
+    def _on_future_done(self, task, future):
+        # Called on the worker thread, hop back to the runner's thread
+        if future.cancelled():
+            result, error = None, None
+        else:
+            result, error = None, future.exception()
+            if error is None:
+                result = future.result()
+        self.task_finished.emit(task, result, error)
+    
+    def _on_task_finished(self, task, result, error):
+        if self.tasks.get(task.key) is task:
+            del self.tasks[task.key]
+            self.busy_changed.emit(len(self.tasks))
+        if task.cancelled:
+            return
+        if error is not None:
+            if task.on_error:
+                task.on_error(error)
+        elif task.on_success:
+            task.on_success(result)
+
+
+class QueueChangeLog:
+    """Tracks the server queue revision and applies incremental deltas
+    
+    A fetch sent with ``since=<revision>`` may be answered with either a full
+    snapshot ({"queue": [...], "revision": N}) or a delta
+    ({"since": M, "revision": N, "added": [...], "removed": [ids],
+    "changed": [...]}). Servers that don't know about revisions just send the
+    queue, in which case the log stays empty and full snapshots are compared.
+    """
+    
+    def __init__(self, max_entries=200):
+        self.revision = None
+        self.last_delta = None
+        self.entries = deque(maxlen=max_entries)
+    
+    def fetch_params(self):
+        """Extra fetch parameters asking for changes since the last revision"""
+        if self.revision is None:
+            return {}
+        return {'since': self.revision}
+    
+    def reset(self):
+        """Forget the revision so the next fetch returns a full snapshot"""
+        self.revision = None
+    
+    def apply(self, queue, data):
+        """Apply a fetch response to a queue
+        
+        Returns the new queue list, or None if nothing changed. The passed
+        queue is never modified in place. After a delta was applied it is
+        kept in `last_delta`, which is None after a full snapshot.
+        """
+        revision = data.get('revision')
+        self.last_delta = None
+        
+        if 'queue' in data:
+            server_queue = LevelRecord.decode(data.get('queue') or [])
+            self.revision = revision
+            if server_queue == queue:
+                return None
+            self.entries.append((revision, 'snapshot', len(server_queue)))
+            return server_queue
+        
+        if data.get('since') != self.revision:
+            # Delta is relative to a revision we never saw, start over
+            self.reset()
+            return None
+        
+        self.revision = revision
+        added = LevelRecord.decode(data.get('added') or [])
+        removed = data.get('removed') or []
+        changed = LevelRecord.decode(data.get('changed') or [])
+        if not (added or removed or changed):
+            return None
+        
+        self.last_delta = {'added': added, 'removed': removed, 'changed': changed}
+        self.entries.append((revision, 'delta', len(added), len(removed), len(changed)))
+        return apply_queue_delta(queue, added, removed, changed)
+
+
+class PushListener(threading.Thread):
+    """Server-Sent Events client for instant queue updates
+    
+    Holds a streaming ``api.php?action=events`` request open and queues each
+    event's JSON payload (a fetch-style snapshot or delta) for the sync
+    thread to apply. If the server doesn't offer an event stream the listener
+    stays quiet for `unsupported_retry` seconds before trying again, and
+    polling carries on as usual in the meantime.
+    """
+    
+    def __init__(self, api, params_provider, on_event=None, read_timeout=45,
+                 unsupported_retry=300.0, max_backoff=60.0):
+        super().__init__(daemon=True, name='hwgdreqs-push')
+        self.api = api
+        self.params_provider = params_provider
+        self.on_event = on_event
+        self.read_timeout = read_timeout
+        self.unsupported_retry = unsupported_retry
+        self.max_backoff = max_backoff
+        self.events = queue.Queue()
+        self.connected = False
+        self.supported = None
+        self.received = 0
+        self.stop_event = threading.Event()
+    
+    def run(self):
+        failures = 0
+        while not self.stop_event.is_set():
+            params = self.params_provider()
+            if params is None:
+                self.stop_event.wait(3)
+                continue
+            try:
+                self.listen(params)
+                failures = 0
+            except Exception:
+                failures += 1
+            self.connected = False
+            
+            if self.supported is False:
+                delay = self.unsupported_retry
+            else:
+                delay = min(self.max_backoff, 2 ** failures) * random.uniform(0.5, 1.0)
+            self.stop_event.wait(delay)
+    
+    def listen(self, params):
+        """Hold one event stream open until it ends or fails"""
+        response = self.api.get(
+            'events',
+            params={**params, 'action': 'events'},
+            headers={'Accept': 'text/event-stream', 'Accept-Encoding': 'identity'},
+            stream=True,
+            timeout=(3.05, self.read_timeout)
+        )
+        try:
+            content_type = response.headers.get('Content-Type', '')
+            if response.status_code != 200 or not content_type.startswith('text/event-stream'):
+                self.supported = False
+                return
+            self.supported = True
+            self.connected = True
+            
+            data_lines = []
+            for line in self.iter_stream_lines(response):
+                if self.stop_event.is_set():
+                    break
+                if not line:
+                    # Blank line dispatches the buffered event
+                    if data_lines:
+                        self.dispatch('\n'.join(data_lines))
+                        data_lines = []
+                elif line.startswith(':'):
+                    continue  # keep-alive comment
+                elif line.startswith('data:'):
+                    data_lines.append(line[5:].lstrip(' '))
+        finally:
+            response.close()
+    
+    def iter_stream_lines(self, response):
+        """Yield lines as soon as they arrive
+        
+        requests' iter_lines() waits for a full 512 byte chunk, which would
+        hold small events back until the next keep-alive.
+        """
+        read1 = getattr(response.raw, 'read1', None)
+        if read1 is not None:
+            chunks = iter(lambda: read1(8192), b'')
+        else:
+            chunks = response.iter_content(chunk_size=1)
+        
+        buffer = b''
+        for chunk in chunks:
+            buffer += chunk
+            while b'\n' in buffer:
+                line, buffer = buffer.split(b'\n', 1)
+                yield line.rstrip(b'\r').decode('utf-8', 'replace')
+    
+    def dispatch(self, payload):
+        """Queue one event payload and notify the sync thread"""
+        try:
+            with PROFILER.span('push.parse'):
+                data = json.loads(payload)
+        except ValueError:
+            data = {}
+        self.received += 1
+        self.events.put(data)
+        if self.on_event:
+            self.on_event()
+    
+    def stop(self):
+        """Stop listening
+        
+        The open stream isn't closed from here since that would block on the
+        reading thread; the daemon thread exits at the next event or
+        keep-alive instead.
+        """
+        self.stop_event.set()
+
+
+class PollScheduler:
+    """Adaptive timing policy for QueueSyncThread
+    
+    The fetch interval halves (down to `min_interval`) while the queue keeps
+    changing, drifts back to `base_interval` once it settles and stretches
+    towards `idle_interval` after `idle_after` quiet fetches. Errors back off
+    exponentially up to `max_error_interval`. Every delay gets random jitter
+    so many clients don't poll in lockstep. While a push stream is delivering
+    updates, polling drops to `push_interval` as a safety net. Heartbeats run
+    on their own cadence with the same error backoff, and so does delivery
+    of the Outbox, which otherwise goes out as soon as there is something
+    to send.
+    
+    Pass a subclass or a differently tuned instance to QueueSyncThread to
+    change the policy.
+    """
+    
+    def __init__(self, base_interval=3.0, min_interval=1.0, idle_interval=10.0,
+                 idle_after=20, max_error_interval=60.0, heartbeat_interval=3.0,
+                 push_interval=30.0, jitter=0.1, rng=None):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.idle_interval = idle_interval
+        self.idle_after = idle_after
+        self.max_error_interval = max_error_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.push_interval = push_interval
+        self.push_active = False
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.interval = base_interval
+        self.idle_fetches = 0
+        self.fetch_errors = 0
+        self.heartbeat_errors = 0
+        self.outbox_errors = 0
+    
+    def _jittered(self, delay):
+        return delay * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    def _backoff(self, base, errors):
+        # "Full jitter" exponential backoff
+        cap = min(self.max_error_interval, base * 2 ** errors)
+        return self.rng.uniform(base, max(base, cap))
+    
+    def record_fetch(self, changed):
+        """Record a successful fetch and whether it changed the queue"""
+        self.fetch_errors = 0
+        if changed:
+            self.idle_fetches = 0
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.idle_fetches += 1
+            if self.idle_fetches > self.idle_after:
+                self.interval = min(self.idle_interval, self.interval * 1.25)
+            else:
+                self.interval = min(self.base_interval, self.interval * 1.5)
+    
+    def record_fetch_error(self):
+        """Record a failed fetch"""
+        self.fetch_errors += 1
+    
+    def record_heartbeat(self, ok):
+        """Record the outcome of a heartbeat"""
+        self.heartbeat_errors = 0 if ok else self.heartbeat_errors + 1
+    
+    def record_outbox(self, ok):
+        """Record the outcome of sending an outbox batch"""
+        self.outbox_errors = 0 if ok else self.outbox_errors + 1
+    
+    def reset(self):
+        """Return to the base cadence, e.g. after a manual refresh"""
+        self.interval = self.base_interval
+        self.idle_fetches = 0
+    
+    def next_fetch_delay(self):
+        """Seconds to wait before the next fetch"""
+        if self.fetch_errors:
+            return self._backoff(self.base_interval, self.fetch_errors)
+        if self.push_active:
+            return self._jittered(self.push_interval)
+        return self._jittered(self.interval)
+    
+    def next_heartbeat_delay(self):
+        """Seconds to wait before the next heartbeat"""
+        if self.heartbeat_errors:
+            return self._backoff(self.heartbeat_interval, self.heartbeat_errors)
+        return self._jittered(self.heartbeat_interval)
+    
+    def next_outbox_delay(self):
+        """Seconds to wait before sending the next outbox batch"""
+        if self.outbox_errors:
+            return self._backoff(self.base_interval, self.outbox_errors)
+        return 0.0
+
+
+class FetchDecoder:
+    """Decodes fetch response bodies, skipping work the last body already did
+    
+    A body byte-identical to the last one is recognised by its digest and not
+    parsed at all. Snapshot bodies are split into raw queue entries without
+    building them, and each entry is fingerprinted by its bytes: entries the
+    previous snapshot already had reuse their LevelRecord, so only new or
+    edited ones are decoded, and comparing the result with the local queue
+    mostly hits the list's identity shortcut. Entries with nested objects or
+    an envelope the splitter doesn't recognise fall back to json.loads.
+    """
+    
+    QUEUE_START = re.compile(rb'"queue"\s*:\s*\[\s*')
+    # One flat JSON object followed by a comma or the closing bracket
+    ENTRY = re.compile(rb'(\{[^{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}"]*)*\})\s*(?:(,)\s*|\])')
+    
+    def __init__(self):
+        self.digest = None
+        self.revision = None
+        self.records = {}
+        self.skipped = 0
+        self.reused = 0
+        self.decoded = 0
+    
+    @staticmethod
+    def fingerprint(data):
+        return hashlib.blake2b(data, digest_size=16).digest()
+    
+    def unchanged(self, body):
+        """Check whether a body is identical to the last accepted one"""
+        if self.digest is not None and self.fingerprint(body) == self.digest:
+            self.skipped += 1
+            return True
+        return False
+    
+    def accept(self, body, revision):
+        """Remember a body once it has been applied"""
+        self.digest = self.fingerprint(body)
+        self.revision = revision
+    
+    def decode(self, body):
+        """Parse a fetch body, reusing records for known snapshot entries"""
+        start = self.QUEUE_START.search(body)
+        entries = self._split(body, start.end()) if start else None
+        if entries is None:
+            data = json.loads(body)
+            if isinstance(data.get('queue'), list):
+                data['queue'] = LevelRecord.decode(data['queue'])
+                self.records = {}
+            return data
+        
+        raws, end = entries
+        data = json.loads(body[:start.end()] + b']' + body[end:])
+        if data.get('queue') != []:
+            # "queue" matched inside some other value, parse the slow way
+            self.records = {}
+            return json.loads(body)
+        
+        known = self.records
+        records = {}
+        queue = []
+        fingerprint = self.fingerprint
+        for raw in raws:
+            key = fingerprint(raw)
+            record = known.get(key)
+            if record is None:
+                record = LevelRecord(json.loads(raw))
+                self.decoded += 1
+            else:
+                self.reused += 1
+            records[key] = record
+            queue.append(record)
+        self.records = records
+        data['queue'] = queue
+        return data
+    
+    def _split(self, body, pos):
+        """Raw entries of the queue array starting at `pos` and the offset of its end"""
+        if body[pos:pos + 1] == b']':
+            return [], pos + 1
+        raws = []
+        match = self.ENTRY.match
+        while True:
+            entry = match(body, pos)
+            if entry is None:
+                return None
+            raws.append(entry.group(1))
+            pos = entry.end()
+            if entry.group(2) is None:
+                return raws, pos
+
+
+class SyncChannel:
+    """Sync state of one APP-ID: revision tracking, timing and push stream"""
+    
+    def __init__(self, config_manager, scheduler=None):
+        self.config_manager = config_manager
+        self.scheduler = scheduler or PollScheduler()
+        self.change_log = QueueChangeLog()
+        self.decoder = FetchDecoder()
+        self.conditional = ConditionalState()
+        self.synced_changes = None
+        self.next_fetch = 0.0
+        self.next_heartbeat = 0.0
+        self.next_outbox = 0.0
+        self.last_error = ''
+        self.push = None
+        self.push_pending = {}  # push deltas that don't follow on yet: since -> (received, data)
+        self.fetched_at = None  # when the last successful fetch was sent
+    
+    @property
+    def app_id(self):
+        return self.config_manager.config.get('app_id')
+    
+    def push_params(self):
+        """Event stream parameters, or None while not authenticated"""
+        if not self.app_id:
+            return None
+        return {
+            'id': self.app_id,
+            'fields': QUEUE_FIELDS,
+            **self.change_log.fetch_params()
+        }
+
+
+class QueueSyncThread(QThread):
+    """Background thread syncing one or more channels' queues with the server
+    
+    Each channel (APP-ID) keeps its own revision, adaptive PollScheduler and
+    push stream, but all of them share this one thread and the ApiClient's
+    connection pool. Heartbeats that fall due together go out as a single
+    batched request when the server supports it. Before each fetch a
+    channel's Outbox is sent, so the fetch already reflects local deletes;
+    fetched queues are resolved against the outbox's tombstones. The
+    channel passed to the constructor is the primary one, reported through
+    `queue_updated`; every channel is reported through `channel_updated`.
+    """
+    
+    queue_updated = Signal(list)
+    channel_updated = Signal(str, list)
+    
+    MAX_PUSH_PENDING = 100
+    MAX_PUSH_AGE = 60.0
+    
+    def __init__(self, config_manager, api, scheduler=None):
+        super().__init__()
+        self.api = api
+        self.channels = [SyncChannel(config_manager, scheduler)]
+        config_manager.outbound_listener = self.wake_outbox
+        self.channels_lock = threading.Lock()
+        self.dropped = []  # removed channels to close once no tick uses them
+        self.ticking = False
+        self.heartbeat_future = None
+        self.heartbeat_channels = []
+        self.batch_heartbeats = True
+        self.batch_ops = True
+        self.wake_event = threading.Event()
+        self.running = True
+    
+    @property
+    def primary(self):
+        return self.channels[0]
+    
+    @property
+    def config_manager(self):
+        return self.primary.config_manager
+    
+    @property
+    def scheduler(self):
+        return self.primary.scheduler
+    
+    @property
+    def change_log(self):
+        return self.primary.change_log
+    
+    @property
+    def push(self):
+        return self.primary.push
+    
+    @property
+    def last_error(self):
+        return self.primary.last_error
+    
+    def add_channel(self, config_manager, scheduler=None):
+        """Start syncing another channel"""
+        channel = SyncChannel(config_manager, scheduler)
+        config_manager.outbound_listener = self.wake_outbox
+        with self.channels_lock:
+            self.channels.append(channel)
+        if self.isRunning():
+            self.start_push(channel)
+        self.wake_event.set()
+        return channel
+    
+    def remove_channel(self, app_id, close=False):
+        """Stop syncing an extra channel
+        
+        With `close` its ConfigManager is closed too, by the sync thread
+        once the tick that may still be using it is over, or right away
+        when the thread isn't running.
+        """
+        close_now = None
+        with self.channels_lock:
+            for channel in self.channels[1:]:
+                if channel.app_id == app_id:
+                    self.channels.remove(channel)
+                    if channel.push is not None:
+                        channel.push.stop()
+                    if close and self.ticking:
+                        self.dropped.append(channel)
+                    elif close:
+                        close_now = channel
+                    break
+        if close_now is not None:
+            close_now.config_manager.close()
+        self.wake_event.set()
+    
+    def close_dropped(self, channels):
+        """Close the ConfigManagers of removed channels"""
+        for channel in channels:
+            try:
+                channel.config_manager.close()
+            except Exception as e:
+                self.primary.last_error = str(e)
+    
+    def start_push(self, channel):
+        """Open a channel's push stream if push updates are enabled"""
+        if channel.push is None and channel.config_manager.config.get('push_updates', True):
+            channel.push = PushListener(self.api, channel.push_params, on_event=self.wake_event.set)
+            channel.push.start()
+    
+    def run(self):
+        """Poll server for new submissions on each channel's cadence"""
+        with self.channels_lock:
+            channels = list(self.channels)
+            self.ticking = True
+        for channel in channels:
+            self.start_push(channel)
+        
+        while self.running:
+            now = time.monotonic()
+            with self.channels_lock:
+                channels = list(self.channels)
+                dropped = self.dropped
+                self.dropped = []
+            # Channels removed during the last tick are no longer in use
+            self.close_dropped(dropped)
+            
+            due_heartbeats = []
+            wake_at = now + self.scheduler.base_interval
+            for channel in channels:
+                if not self.running:
+                    break
+                if channel.push is not None:
+                    channel.scheduler.push_active = channel.push.connected
+                    self.apply_push_events(channel)
+                if not channel.app_id:
+                    continue
+                
+                if now >= channel.next_heartbeat:
+                    due_heartbeats.append(channel)
+                
+                if len(channel.config_manager.outbox) and now >= channel.next_outbox:
+                    try:
+                        channel.scheduler.record_outbox(self.send_outbox(channel))
+                    except Exception as e:
+                        channel.last_error = str(e)
+                        channel.scheduler.record_outbox(False)
+                    channel.next_outbox = time.monotonic() + channel.scheduler.next_outbox_delay()
+                
+                if now >= channel.next_fetch:
+                    try:
+                        changed = self.sync_once(channel)
+                        channel.scheduler.record_fetch(changed)
+                        if channel.scheduler.outbox_errors:
+                            # The server is reachable again, don't wait out the backoff
+                            channel.next_outbox = 0.0
+                    except Exception as e:
+                        channel.last_error = str(e)
+                        channel.scheduler.record_fetch_error()
+                    channel.next_fetch = time.monotonic() + channel.scheduler.next_fetch_delay()
+            
+            if due_heartbeats:
+                try:
+                    self.send_heartbeats(due_heartbeats)
+                except Exception:
+                    for channel in due_heartbeats:
+                        channel.scheduler.record_heartbeat(False)
+                for channel in due_heartbeats:
+                    channel.next_heartbeat = now + channel.scheduler.next_heartbeat_delay()
+            
+            for channel in channels:
+                if channel.app_id:
+                    wake_at = min(wake_at, channel.next_fetch, channel.next_heartbeat)
+                    if len(channel.config_manager.outbox):
+                        wake_at = min(wake_at, channel.next_outbox)
+            
+            # Sleep until something is due, waking early on stop() or wake()
+            self.wake_event.wait(max(0.05, wake_at - time.monotonic()))
+            self.wake_event.clear()
+        
+        with self.channels_lock:
+            self.ticking = False
+            dropped = self.dropped
+            self.dropped = []
+        self.close_dropped(dropped)
+    
+    def apply_push_events(self, channel=None):
+        """Apply queued push events in revision order, fetching to fill any gap"""
+        channel = channel or self.primary
+        buffered = False
+        while True:
+            try:
+                data = channel.push.events.get_nowait()
+            except queue.Empty:
+                break
+            
+            if 'queue' in data:
+                self.apply_push_data(channel, data)
+            elif data.get('revision') is None or data.get('since') is None:
+                # Bare notification or a delta we can't place, go and fetch the changes
+                channel.next_fetch = 0.0
+            elif len(channel.push_pending) < self.MAX_PUSH_PENDING:
+                channel.push_pending[data['since']] = (time.monotonic(), data)
+                buffered = True
+            else:
+                # Too far behind to catch up from events, start over from a snapshot
+                channel.push_pending.clear()
+                channel.change_log.reset()
+                channel.next_fetch = 0.0
+        self.apply_push_pending(channel)
+        if buffered and channel.push_pending:
+            # Events are missing or out of order, fetch the changes since our revision
+            channel.next_fetch = 0.0
+    
+    def apply_push_pending(self, channel):
+        """Apply buffered push deltas that follow on from the current revision
+        
+        Deltas the queue has already moved past are dropped, and so are those
+        received before a fetch that has since completed, as that fetch
+        brought their changes. A delta that can't be ordered against the
+        current revision, or has waited longer than MAX_PUSH_AGE, is dropped
+        in favour of a fetch.
+        """
+        pending = channel.push_pending
+        while channel.change_log.revision is not None and channel.change_log.revision in pending:
+            received, data = pending.pop(channel.change_log.revision)
+            self.apply_push_data(channel, data)
+        
+        revision = channel.change_log.revision
+        expired = time.monotonic() - self.MAX_PUSH_AGE
+        for since, (received, data) in list(pending.items()):
+            if channel.fetched_at is not None and received <= channel.fetched_at:
+                del pending[since]  # covered by the fetch
+                continue
+            try:
+                stale = since < revision
+                covered = data['revision'] <= revision
+            except TypeError:
+                stale, covered = True, False  # no revision yet, or revisions that don't order
+            if stale or received < expired:
+                del pending[since]
+                if not covered:
+                    channel.next_fetch = 0.0
+    
+    def apply_push_data(self, channel, data):
+        """Apply one push snapshot, or a delta that follows on from the current revision"""
+        config_manager = channel.config_manager
+        with config_manager.lock:
+            data = config_manager.outbox.resolve(data)
+            with PROFILER.span('sync.apply'):
+                new_queue = channel.change_log.apply(config_manager.queue, data)
+            if new_queue is not None:
+                PROFILER.count('sync.changes')
+                config_manager.update_queue(new_queue, channel.change_log.last_delta)
+        if new_queue is not None:
+            self.emit_update(channel, new_queue)
+            channel.scheduler.record_fetch(True)
+    
+    def sync_once(self, channel=None):
+        """Fetch queue changes from the server, returning True if the queue changed"""
+        channel = channel or self.primary
+        started = time.monotonic()
+        with PROFILER.span('sync.tick'):
+            changed = self._sync_once(channel)
+        channel.fetched_at = started
+        return changed
+    
+    def _sync_once(self, channel):
+        params = {
+            'id': channel.app_id,
+            'action': 'fetch',
+            'fields': QUEUE_FIELDS,
+            **channel.change_log.fetch_params()
+        }
+        decoder = channel.decoder
+        config_manager = channel.config_manager
+        # Without local edits, the server's copy being unchanged means ours is current
+        in_sync = config_manager.changes == channel.synced_changes
+        headers = channel.conditional.headers(params) if in_sync else {}
+        response = self.api.get('fetch', params=params, headers=headers)
+        if response.status_code == 304:
+            if not headers:
+                raise ValueError("Unexpected 304 for an unconditional fetch")
+            self.api.record_not_modified('fetch', channel.conditional.size)
+            channel.change_log.revision = decoder.revision
+            PROFILER.count('sync.not_modified')
+            return False
+        response.raise_for_status()
+        body = response.content
+        
+        # Same bytes as last time: nothing can have changed
+        if in_sync and decoder.unchanged(body):
+            channel.change_log.revision = decoder.revision
+            channel.conditional.update(params, response)
+            PROFILER.count('sync.unchanged')
+            return False
+        
+        with PROFILER.span('sync.parse'):
+            data = decoder.decode(body)
+        if not data.get('success'):
+            raise ValueError(data.get('error', 'Server rejected fetch'))
+        
+        # Deletes made while the fetch was in flight must not be undone by it
+        with config_manager.lock:
+            data = config_manager.outbox.resolve(data)
+            with PROFILER.span('sync.apply'):
+                new_queue = channel.change_log.apply(config_manager.queue, data)
+            if new_queue is not None:
+                PROFILER.count('sync.changes')
+                config_manager.update_queue(new_queue, channel.change_log.last_delta)
+        decoder.accept(body, channel.change_log.revision)
+        channel.conditional.update(params, response)
+        channel.synced_changes = config_manager.changes
+        if new_queue is None:
+            return False
+        self.emit_update(channel, new_queue)
+        return True
+    
+    def emit_update(self, channel, new_queue):
+        """Report a changed channel queue"""
+        if channel is self.primary:
+            self.queue_updated.emit(new_queue)
+        self.channel_updated.emit(channel.app_id, new_queue)
+    
+    def send_heartbeats(self, channels):
+        """Send heartbeats on the API worker pool to show the app is online"""
+        previous = self.heartbeat_future
+        if previous is not None:
+            if not previous.done():
+                return
+            ok = previous.exception() is None and previous.result()
+            for channel in self.heartbeat_channels:
+                channel.scheduler.record_heartbeat(ok)
+        
+        self.heartbeat_channels = list(channels)
+        self.heartbeat_future = self.api.submit(
+            self.post_heartbeats, [channel.app_id for channel in channels])
+    
+    def post_heartbeats(self, app_ids):
+        """One batched heartbeat, or one per APP-ID on servers without batching
+        
+        Runs on the API worker pool. A server supports batching when it
+        answers an `ids` heartbeat with the list of ids it recorded.
+        """
+        if len(app_ids) > 1 and self.batch_heartbeats:
+            response = self.api.post('heartbeat', data={'ids': ','.join(app_ids), 'action': 'heartbeat'})
+            try:
+                if response.status_code < 400 and 'ids' in response.json():
+                    return True
+            except ValueError:
+                pass
+            self.batch_heartbeats = False
+        
+        ok = True
+        for app_id in app_ids:
+            response = self.api.post('heartbeat', data={'id': app_id, 'action': 'heartbeat'})
+            ok = ok and response.status_code < 400
+        return ok
+    
+    def send_outbox(self, channel):
+        """Send the next batch of a channel's outbox, returning True if the server answered any of it"""
+        entries = channel.config_manager.outbox.batch()
+        if not entries:
+            return True
+        applied, rejected = self.post_ops(entries)
+        channel.config_manager.outbound_done(applied, rejected)
+        if applied:
+            channel.next_fetch = 0.0
+        return bool(applied or rejected)
+    
+    def post_ops(self, entries):
+        """Send outbox entries in one request, or one by one on servers without batching
+        
+        Returns the keys the server applied and the keys it rejected. Servers
+        that don't know action=ops get each entry on its own endpoint; there,
+        an entry counts as applied only when the reply says success, a
+        client error or unsuccessful reply counts as a rejection, and
+        anything else stops the batch so the rest are retried later, in order.
+        """
+        if self.batch_ops:
+            response = self.api.post('ops', data={
+                'id': entries[0]['app_id'],
+                'action': 'ops',
+                'ops': json.dumps([{'key': entry['key'], 'op': entry['kind'],
+                                    'created_at': entry['created_at'], 'ids': entry['ids'],
+                                    **entry['data']} for entry in entries], separators=(',', ':'))
+            })
+            if response.status_code not in (400, 404, 501):
+                response.raise_for_status()
+                try:
+                    data = response.json()
+                except ValueError:
+                    data = None  # e.g. a host's HTML page, not api.php
+                if isinstance(data, dict) and data.get('success') and 'applied' in data:
+                    return data['applied'], data.get('rejected') or []
+            self.batch_ops = False
+        
+        applied = []
+        rejected = []
+        for entry in entries:
+            response = self.post_op(entry)
+            if response.status_code >= 500 or response.status_code in (408, 429):
+                break
+            try:
+                ok = response.status_code < 400 and response.json().get('success') is True
+            except (ValueError, AttributeError):
+                ok = False  # not a JSON object, so not an api.php success
+            (applied if ok else rejected).append(entry['key'])
+        return applied, rejected
+    
+    def post_op(self, entry):
+        """Send one outbox entry to its own endpoint"""
+        data = {**entry['data'], 'key': entry['key']}
+        if entry['kind'] == 'report':
+            return self.api.post('report', path='fuck-it.php', data=data)
+        if entry['kind'] == 'clear':
+            data['ids'] = ','.join(entry['ids'])
+        return self.api.post(entry['kind'], data={**data, 'id': entry['app_id'], 'action': entry['kind']})
+    
+    def wake_outbox(self):
+        """Send the outboxes as soon as possible, even while backing off"""
+        with self.channels_lock:
+            for channel in self.channels:
+                channel.next_outbox = 0.0
+        self.wake_event.set()
+    
+    def resync(self, config_manager):
+        """Forget a channel's revision after its queue was replaced outside the sync thread
+        
+        A delta since the old revision would re-add levels the new queue
+        already has, so the channel's next fetch asks for a full snapshot.
+        """
+        with self.channels_lock:
+            for channel in self.channels:
+                if channel.config_manager is config_manager:
+                    channel.change_log.reset()
+    
+    def wake(self):
+        """Fetch as soon as possible instead of waiting for the next tick"""
+        with self.channels_lock:
+            for channel in self.channels:
+                channel.next_fetch = 0.0
+        self.wake_event.set()
+    
+    def stop(self):
+        """Stop the sync thread"""
+        self.running = False
+        with self.channels_lock:
+            for channel in self.channels:
+                if channel.push is not None:
+                    channel.push.stop()
+        self.wake_event.set()
+
+
+# Normalized difficultyFace -> icon file in icons/
+DIFFICULTY_ICONS = {
+    '': 'na',
+    'na': 'na',
+    'n/a': 'na',
+    'auto': 'auto',
+    'unrated': 'unrated',
+    'easy': 'easy',
+    'normal': 'normal',
+    'hard': 'hard',
+    'harder': 'harder',
+    'insane': 'insane',
+    'demon': 'demon',
+    'easy demon': 'demon',
+    'medium demon': 'demon',
+    'hard demon': 'demon',
+    'insane demon': 'demon',
+    'extreme demon': 'demon',
+}
+
+
+class DifficultyIcons:
+    """Process-wide cache of pre-scaled difficulty face icons
+    
+    Every PNG in icons/ is read and scaled once; after that each distinct
+    difficultyFace string resolves to its icon with a single dict lookup.
+    """
+    
+    SIZE = 24
+    _instance = None
+    
+    def __init__(self, size=SIZE):
+        self.size = size
+        self.icons = {}
+        for name in set(DIFFICULTY_ICONS.values()):
+            path = self.get_resource_path(f'icons/{name}.png')
+            if os.path.exists(path):
+                pixmap = QPixmap(path).scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                self.icons[name] = QIcon(pixmap)
+        self.by_face = {face: self.icons.get(name) for face, name in DIFFICULTY_ICONS.items()}
+    
+    @classmethod
+    def instance(cls):
+        """The shared cache, loaded on first use (needs a QApplication)"""
+        if cls._instance is None:
+            cls._instance = DifficultyIcons()
+        return cls._instance
+    
+    def get_resource_path(self, relative_path):
+        """Get absolute path to resource"""
+        if hasattr(sys, '_MEIPASS'):
+            return os.path.join(sys._MEIPASS, relative_path)
+        return os.path.join(os.path.dirname(__file__), relative_path)
+    
+    def icon_for(self, level):
+        """Icon for a level's difficultyFace"""
+        face = level.get('difficultyFace', 'na')
+        try:
+            return self.by_face[face]
+        except (KeyError, TypeError):
+            return self._resolve(face)
+    
+    def _resolve(self, face):
+        # First sighting of this spelling, normalize and remember it
+        normalized = str(face).strip().lower()
+        if normalized in DIFFICULTY_ICONS:
+            name = DIFFICULTY_ICONS[normalized]
+        elif 'demon' in normalized:
+            name = 'demon'
+        else:
+            name = 'na'
+        icon = self.icons.get(name)
+        try:
+            self.by_face[face] = icon
+        except TypeError:
+            pass
+        return icon
+
+
+class FilterEngine:
+    """Client-side copy of the server's submission filters
+    
+    Every level reduces to an integer code with exactly one bit set per
+    category (difficulty, length, rated status) and the filter config
+    compiles to a mask of allowed bits, so a level passes when
+    `code & mask == code`: one AND and one compare. Codes are memoized per
+    distinct (difficulty, length, stars) combination. Values the engine
+    doesn't recognise map to bits that are always allowed, so unfamiliar
+    data is never filtered out.
+    """
+    
+    DIFFICULTIES = ('NA', 'Easy', 'Normal', 'Hard', 'Harder', 'Insane',
+                    'Easy Demon', 'Medium Demon', 'Hard Demon', 'Insane Demon', 'Extreme Demon')
+    LENGTHS = ('Tiny', 'Short', 'Medium', 'Long', 'XL')
+    
+    def __init__(self, filters=None):
+        bit = 0
+        self.difficulty_bits = {}
+        for name in self.DIFFICULTIES:
+            self.difficulty_bits[name.lower()] = 1 << bit
+            bit += 1
+        self.unknown_difficulty = 1 << bit
+        bit += 1
+        self.length_bits = {}
+        for name in self.LENGTHS:
+            self.length_bits[name.lower()] = 1 << bit
+            bit += 1
+        self.unknown_length = 1 << bit
+        self.rated_bit = 1 << (bit + 1)
+        self.unrated_bit = 1 << (bit + 2)
+        self.unknown_rated = 1 << (bit + 3)
+        
+        self.codes = {}
+        self.mask = 0
+        self.compile(filters or {})
+    
+    def compile(self, filters):
+        """Build the allowed-bits mask from a config['filters'] dict"""
+        mask = self.unknown_difficulty | self.unknown_length | self.unknown_rated
+        for name in filters.get('difficulty', self.DIFFICULTIES):
+            mask |= self.difficulty_bits.get(str(name).lower(), 0)
+        for name in filters.get('length', self.LENGTHS):
+            mask |= self.length_bits.get(str(name).lower(), 0)
+        rated = filters.get('rated', 'both')
+        if rated in ('both', 'rated'):
+            mask |= self.rated_bit
+        if rated in ('both', 'unrated'):
+            mask |= self.unrated_bit
+        self.mask = mask
+        return mask
+    
+    def _encode(self, difficulty, length, stars):
+        code = self.difficulty_bits.get(str(difficulty).lower(), self.unknown_difficulty)
+        code |= self.length_bits.get(str(length).lower(), self.unknown_length)
+        try:
+            code |= self.rated_bit if int(stars) > 0 else self.unrated_bit
+        except (TypeError, ValueError):
+            code |= self.unknown_rated
+        return code
+    
+    def code(self, level):
+        """The category bits of one level"""
+        key = (level.get('difficulty'), level.get('length'), level.get('stars'))
+        try:
+            return self.codes[key]
+        except KeyError:
+            code = self.codes[key] = self._encode(*key)
+            return code
+        except TypeError:
+            return self._encode(*key)
+    
+    def accepts(self, level):
+        """Check one level against the compiled filters"""
+        code = self.code(level)
+        return code & self.mask == code
+    
+    def encode(self, levels):
+        """Codes for many levels, inlining the memo lookup"""
+        codes = self.codes
+        result = []
+        append = result.append
+        for level in levels:
+            code = codes.get((level.get('difficulty'), level.get('length'), level.get('stars')))
+            append(self.code(level) if code is None else code)
+        return result
+    
+    def check(self, codes):
+        """Pass/fail for already encoded levels, the cheap part of a filter change"""
+        mask = self.mask
+        return [code & mask == code for code in codes]
+    
+    def evaluate(self, levels):
+        """Pass/fail for every level, in order"""
+        return self.check(self.encode(levels))
+
+
+class RowFilter:
+    """Keeps a QListView's hidden rows in step with a FilterEngine
+    
+    Hidden rows are tracked by the model's stable row keys, so each pass
+    only touches rows whose visibility actually changed; the view itself
+    keeps hidden rows attached to their levels when rows move. Row codes
+    are cached until the model changes, so a filter change only re-runs the
+    mask check.
+    """
+    
+    def __init__(self, view, model, engine):
+        self.view = view
+        self.model = model
+        self.engine = engine
+        self.hidden = set()
+        self.codes = []
+        self.generation = None
+    
+    def apply(self, hide=True):
+        """Re-evaluate every row, hiding rejected ones (or showing all if not `hide`)"""
+        keys = self.model.row_keys()
+        rejected = {}
+        if hide:
+            if self.generation != self.model.generation:
+                self.codes = self.engine.encode(self.model.levels())
+                self.generation = self.model.generation
+            mask = self.engine.mask
+            for row, code in enumerate(self.codes):
+                if code & mask != code:
+                    rejected[keys[row]] = row
+        
+        for key, row in rejected.items():
+            if key not in self.hidden:
+                self.view.setRowHidden(row, True)
+        shown = self.hidden.difference(rejected)
+        if shown:
+            for row, key in enumerate(keys):
+                if key in shown:
+                    self.view.setRowHidden(row, False)
+        self.hidden = set(rejected)
+        return len(rejected)
+
+
+class FenwickTree:
+    """Prefix sums with O(log n) point updates, grown by doubling"""
+    
+    def __init__(self, size=0):
+        self.size = size
+        self.tree = [0] * (size + 1)
+    
+    def add(self, slot, delta):
+        """Add `delta` to the value at a 0-based slot"""
+        i = slot + 1
+        tree = self.tree
+        while i <= self.size:
+            tree[i] += delta
+            i += i & -i
+    
+    def total(self):
+        """Sum of every value"""
+        i = self.size
+        result = 0
+        while i > 0:
+            result += self.tree[i]
+            i -= i & -i
+        return result
+    
+    def grow(self, values):
+        """Rebuild in O(n) over a longer list of values"""
+        self.size = len(values)
+        tree = [0] + list(values)
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                tree[parent] += tree[i]
+        self.tree = tree
+
+
+class LevelPicker:
+    """Random level selection with pluggable strategies
+    
+    Rows are tracked by the model's stable (id, occurrence) keys in fixed
+    slots of two Fenwick trees: one counting eligible rows, one summing
+    their submission times. A sync only touches the slots of rows that
+    appeared, vanished or changed, and every pick is an O(log n) descent:
+    
+    - 'uniform': every eligible row equally likely
+    - 'wait': weighted by time waited, now * count - sum(submitted) per node
+    - 'fair': a uniformly chosen submitter, then one of their rows
+    
+    `eligible(level)` decides which rows can be picked at all, e.g. to skip
+    already played or filtered out levels.
+    """
+    
+    STRATEGIES = ('uniform', 'wait', 'fair')
+    
+    def __init__(self, eligible=None, clock=time.time, rng=None):
+        self.eligible = eligible or (lambda level: True)
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.epoch = clock()
+        self.counts = FenwickTree()
+        self.times = FenwickTree()
+        self.slot_keys = []
+        self.slot_levels = []
+        self.slot_times = []
+        self.slot_submitters = []
+        self.slot_of = {}
+        self.free = []
+        self.rows = {}
+        self.bulk = False
+        # Eligible slots grouped by submitter, with swap-remove positions
+        self.members = {}
+        self.member_pos = {}
+        self.submitters = []
+        self.submitter_pos = {}
     
-    def load_queue(self):
-        """Load queue from file"""
-        if self.queue_file.exists():
-            try:
-                with open(self.queue_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
+    def __len__(self):
+        return len(self.member_pos)
     
-    def save_queue(self):
-        """Save queue to file"""
-        with open(self.queue_file, 'w') as f:
-            json.dump(self.queue, f, indent=2)
+    def sync(self, keys, levels, recheck=False):
+        """Follow the queue, re-testing every row's eligibility if `recheck`"""
+        current = dict(zip(keys, levels))
+        for key in [key for key in self.slot_of if key not in current]:
+            self._release(self.slot_of.pop(key))
+        # Past a few thousand changed rows one O(n) rebuild beats per-row updates
+        self.bulk = recheck or len(current) - len(self.slot_of) > len(self.slot_keys) // 8
+        for key, level in current.items():
+            slot = self.slot_of.get(key)
+            if slot is None:
+                self._place(key, level)
+            elif recheck or self.slot_levels[slot] is not level:
+                self._set(slot, level)
+        if self.bulk:
+            self.bulk = False
+            self._rebuild()
+        self.rows = {key: row for row, key in enumerate(keys)}
     
-    def load_history(self):
-        """Load history from file"""
-        if self.history_file.exists():
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
+    def pick(self, strategy='uniform'):
+        """Row of a randomly picked eligible level, or -1 if there is none"""
+        if not self.member_pos:
+            return -1
+        if strategy == 'fair':
+            members = self.members[self.rng.choice(self.submitters)]
+            slot = self.rng.choice(members)
+        elif strategy == 'wait':
+            slot = self._pick_waited()
+        else:
+            slot = self._descend(self.rng.randrange(len(self.member_pos)))
+        return self.rows.get(self.slot_keys[slot], -1)
+    
+    def _pick_waited(self):
+        now = self.clock() - self.epoch
+        total = now * self.counts.total() - self.times.total()
+        if total <= 0:
+            return self._descend(self.rng.randrange(len(self.member_pos)))
+        slot = self._descend(self.rng.random() * total, now)
+        if slot not in self.member_pos:
+            # Float rounding ran past the last weighted slot
+            slot = self._descend(self.rng.randrange(len(self.member_pos)))
+        return slot
+    
+    def _descend(self, target, now=None):
+        """Slot where the running weight passes `target`, counts when `now` is None"""
+        counts = self.counts.tree
+        times = self.times.tree
+        size = self.counts.size
+        pos = 0
+        step = 1 << (size.bit_length() - 1) if size else 0
+        while step:
+            node = pos + step
+            if node <= size:
+                weight = counts[node] if now is None else now * counts[node] - times[node]
+                if weight <= target:
+                    pos = node
+                    target -= weight
+            step >>= 1
+        return min(pos, size - 1)
+    
+    def _place(self, key, level):
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        self.slot_of[key] = slot
+        self.slot_keys[slot] = key
+        self.slot_times[slot] = self.clock() - self.epoch
+        self._set(slot, level)
+    
+    def _grow(self):
+        old = len(self.slot_keys)
+        size = max(16, old * 2)
+        self.slot_keys.extend([None] * (size - old))
+        self.slot_levels.extend([None] * (size - old))
+        self.slot_times.extend([0.0] * (size - old))
+        self.slot_submitters.extend([None] * (size - old))
+        self.free.extend(range(size - 1, old - 1, -1))
+        if not self.bulk:
+            self._rebuild()
     
-    def save_history(self):
-        """Save history to file"""
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
+    def _rebuild(self):
+        member_pos = self.member_pos
+        size = len(self.slot_keys)
+        self.counts.grow([1 if slot in member_pos else 0 for slot in range(size)])
+        self.times.grow([self.slot_times[slot] if slot in member_pos else 0.0
+                         for slot in range(size)])
+    
+    def _release(self, slot):
+        self._exclude(slot)
+        self.slot_keys[slot] = None
+        self.slot_levels[slot] = None
+        self.free.append(slot)
+    
+    def _set(self, slot, level):
+        self._exclude(slot)
+        self.slot_levels[slot] = level
+        if not self.eligible(level):
+            return
+        try:
+            submitted = float(level.get('submitted_at'))
+        except (TypeError, ValueError):
+            # Without a submission time, wait from when the row first showed up
+            submitted = self.slot_times[slot] + self.epoch
+        self.slot_times[slot] = min(submitted, self.clock()) - self.epoch
+        self.slot_submitters[slot] = level.get('submitter')
+        self._include(slot)
+    
+    def _include(self, slot):
+        submitter = self.slot_submitters[slot]
+        members = self.members.get(submitter)
+        if members is None:
+            members = self.members[submitter] = []
+            self.submitter_pos[submitter] = len(self.submitters)
+            self.submitters.append(submitter)
+        self.member_pos[slot] = len(members)
+        members.append(slot)
+        if not self.bulk:
+            self.counts.add(slot, 1)
+            self.times.add(slot, self.slot_times[slot])
+    
+    def _exclude(self, slot):
+        position = self.member_pos.pop(slot, None)
+        if position is None:
+            return
+        submitter = self.slot_submitters[slot]
+        members = self.members[submitter]
+        last = members.pop()
+        if last != slot:
+            members[position] = last
+            self.member_pos[last] = position
+        if not members:
+            del self.members[submitter]
+            index = self.submitter_pos.pop(submitter)
+            moved = self.submitters.pop()
+            if moved != submitter:
+                self.submitters[index] = moved
+                self.submitter_pos[moved] = index
+        if not self.bulk:
+            self.counts.add(slot, -1)
+            self.times.add(slot, -self.slot_times[slot])
 
 
-class QueueSyncThread(QThread):
-    """Background thread for syncing queue with server"""
+def level_keys(levels):
+    """Build stable row keys for a list of levels
     
-    queue_updated = Signal(list)
+    Keys are (id, occurrence) pairs so the same level submitted twice still
+    gets two distinct rows.
+    """
+    seen = {}
+    keys = []
+    for level in levels:
+        level_id = level.get('id')
+        occurrence = seen.get(level_id, 0)
+        seen[level_id] = occurrence + 1
+        keys.append((level_id, occurrence))
+    return keys
+
+
+class QueueModel(QAbstractListModel):
+    """List model for the level queue with incremental, id-keyed updates"""
     
-    def __init__(self, config_manager):
-        super().__init__()
-        self.config_manager = config_manager
-        self.running = True
+    LevelRole = Qt.UserRole + 1
     
-    def run(self):
-        """Poll server for new submissions every 3 seconds"""
-        while self.running:
-            if self.config_manager.config.get('app_id'):
-                try:
-                    # Fetch queue from server
-                    response = requests.get(
-                        f"https://hwgdreqs.rf.gd/api.php",
-                        params={
-                            'id': self.config_manager.config['app_id'],
-                            'action': 'fetch'
-                        },
-                        timeout=5
-                    )
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get('success'):
-                            server_queue = data.get('queue', [])
-                            if server_queue != self.config_manager.queue:
-                                self.config_manager.queue = server_queue
-                                self.config_manager.save_queue()
-                                self.queue_updated.emit(server_queue)
-                    
-                    # Send heartbeat to show app is online
-                    requests.post(
-                        f"https://hwgdreqs.rf.gd/api.php",
-                        data={
-                            'id': self.config_manager.config['app_id'],
-                            'action': 'heartbeat'
-                        },
-                        timeout=5
-                    )
-                except:
-                    pass
+    def __init__(self, icon_provider=None, level_index=None, filter_engine=None, parent=None):
+        super().__init__(parent)
+        self.icon_provider = icon_provider
+        self.level_index = level_index
+        self.filter_engine = filter_engine
+        self.generation = 0
+        self._levels = []
+        self._keys = []
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._levels)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._levels):
+            return None
+        
+        level = self._levels[index.row()]
+        if role == Qt.DisplayRole:
+            text = f"{level.get('name', 'Unknown Level')} (ID: {level.get('id', 'Unknown')})"
+            if level.get('flagged', False):
+                text = f"⚠️ {text}"
+            for note in self.notes(level):
+                text += f" [{note}]"
+            return text
+        if role == Qt.DecorationRole and self.icon_provider:
+            return self.icon_provider(level)
+        if role == Qt.ToolTipRole:
+            tips = []
+            if level.get('flagged', False):
+                tips.append(level.get('flag_reason', 'Flagged level'))
+            tips.extend(note.capitalize() for note in self.notes(level))
+            return '\n'.join(tips) or None
+        if role == self.LevelRole:
+            return level
+        return None
+    
+    def notes(self, level):
+        """Duplicate / already-played / filtered-out markers for a level"""
+        notes = []
+        if self.filter_engine is not None and not self.filter_engine.accepts(level):
+            notes.append('filtered out')
+        if self.level_index is not None:
+            level_id = level.get('id')
+            if self.level_index.is_duplicate(level_id):
+                notes.append('duplicate')
+            if self.level_index.played_before(level_id):
+                notes.append('played before')
+        return notes
+    
+    def refresh_notes(self):
+        """Repaint rows after duplicate or played-before state changed"""
+        if self._levels:
+            self.dataChanged.emit(self.index(0), self.index(len(self._levels) - 1),
+                                  [Qt.DisplayRole, Qt.ToolTipRole])
+    
+    def levels(self):
+        """The levels currently shown, in row order"""
+        return self._levels
+    
+    def row_keys(self):
+        """Stable (id, occurrence) keys of the rows, in row order"""
+        return self._keys
+    
+    def level_at(self, row):
+        """Return the level at a row, or None if out of range"""
+        if 0 <= row < len(self._levels):
+            return self._levels[row]
+        return None
+    
+    def set_levels(self, levels):
+        """Sync the model with a new queue using minimal row operations
+        
+        Rows are matched by level id: vanished levels are removed, new ones
+        inserted, reordered ones moved and edited ones reported through
+        dataChanged, so the view keeps its selection and scroll position.
+        """
+        self.generation += 1
+        new_levels = list(levels)
+        new_keys = level_keys(new_levels)
+        new_key_set = set(new_keys)
+        
+        # Remove vanished rows bottom-up, one contiguous run at a time
+        row = len(self._keys) - 1
+        while row >= 0:
+            if self._keys[row] in new_key_set:
+                row -= 1
+                continue
+            end = row
+            while row > 0 and self._keys[row - 1] not in new_key_set:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row, end)
+            del self._keys[row:end + 1]
+            del self._levels[row:end + 1]
+            self.endRemoveRows()
+            row -= 1
+        
+        # Walk the new order inserting, moving and refreshing rows in place
+        current = set(self._keys)
+        changed_start = None
+        i = 0
+        while i < len(new_keys):
+            key = new_keys[i]
+            if i < len(self._keys) and self._keys[i] == key:
+                if self._levels[i] is not new_levels[i] and self._levels[i] != new_levels[i]:
+                    self._levels[i] = new_levels[i]
+                    if changed_start is None:
+                        changed_start = i
+                else:
+                    self._levels[i] = new_levels[i]
+                    changed_start = self._flush_changed(changed_start, i)
+                i += 1
+                continue
             
-            time.sleep(3)
+            changed_start = self._flush_changed(changed_start, i)
+            if key not in current:
+                end = i
+                while end + 1 < len(new_keys) and new_keys[end + 1] not in current:
+                    end += 1
+                self.beginInsertRows(QModelIndex(), i, end)
+                self._keys[i:i] = new_keys[i:end + 1]
+                self._levels[i:i] = new_levels[i:end + 1]
+                self.endInsertRows()
+                current.update(new_keys[i:end + 1])
+                i = end + 1
+            else:
+                source = self._keys.index(key, i)
+                self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), i)
+                self._keys.insert(i, self._keys.pop(source))
+                self._levels.insert(i, self._levels.pop(source))
+                self.endMoveRows()
+        self._flush_changed(changed_start, len(new_keys))
     
-    def stop(self):
-        """Stop the sync thread"""
-        self.running = False
+    def _flush_changed(self, start, end):
+        """Emit dataChanged for a pending run of edited rows"""
+        if start is not None and end > start:
+            self.dataChanged.emit(self.index(start), self.index(end - 1))
+        return None
 
 
 class SettingsDialog(QDialog):
@@ -182,6 +3541,16 @@ class SettingsDialog(QDialog):
         name_group.setLayout(name_layout)
         layout.addWidget(name_group)
         
+        # Extra channels synced by this app
+        channels_group = QGroupBox("Channels")
+        channels_layout = QVBoxLayout()
+        self.channels_input = QLineEdit(', '.join(self.config_manager.config.get('channels', [])))
+        self.channels_input.setPlaceholderText("Extra APP-IDs, separated by commas")
+        channels_layout.addWidget(QLabel("Additional APP-IDs:"))
+        channels_layout.addWidget(self.channels_input)
+        channels_group.setLayout(channels_layout)
+        layout.addWidget(channels_group)
+        
         # Filters Group
         filters_group = QGroupBox("Level Filters")
         filters_layout = QVBoxLayout()
@@ -233,9 +3602,27 @@ class SettingsDialog(QDialog):
             self.rated_combo.setCurrentIndex(2)
         filters_layout.addWidget(self.rated_combo)
         
+        self.hide_filtered_check = QCheckBox("Hide queued levels that don't match (otherwise mark them)")
+        self.hide_filtered_check.setChecked(self.config_manager.config.get('filter_mode', 'hide') == 'hide')
+        filters_layout.addWidget(self.hide_filtered_check)
+        
         filters_group.setLayout(filters_layout)
         layout.addWidget(filters_group)
         
+        # Random pick
+        random_group = QGroupBox("Random Pick")
+        random_layout = QVBoxLayout()
+        self.random_combo = QComboBox()
+        self.random_combo.addItems(['Any level', 'Favor levels waiting longest', 'Fair per submitter'])
+        self.random_combo.setCurrentIndex(
+            LevelPicker.STRATEGIES.index(self.config_manager.config.get('random_mode', 'uniform')))
+        random_layout.addWidget(self.random_combo)
+        self.skip_played_check = QCheckBox("Skip levels that were already played")
+        self.skip_played_check.setChecked(self.config_manager.config.get('random_skip_played', False))
+        random_layout.addWidget(self.skip_played_check)
+        random_group.setLayout(random_layout)
+        layout.addWidget(random_group)
+        
         # Background Customization
         bg_group = QGroupBox("Website Background")
         bg_layout = QVBoxLayout()
@@ -310,6 +3697,9 @@ class SettingsDialog(QDialog):
         """Save all settings"""
         # Update config
         self.config_manager.config['streamer_name'] = self.name_input.text()
+        self.config_manager.config['channels'] = [
+            app_id.strip() for app_id in self.channels_input.text().split(',') if app_id.strip()
+        ]
         
         # Update filters
         self.config_manager.config['filters']['length'] = [
@@ -321,6 +3711,9 @@ class SettingsDialog(QDialog):
         
         rated_map = {0: 'both', 1: 'rated', 2: 'unrated'}
         self.config_manager.config['filters']['rated'] = rated_map[self.rated_combo.currentIndex()]
+        self.config_manager.config['filter_mode'] = 'hide' if self.hide_filtered_check.isChecked() else 'mark'
+        self.config_manager.config['random_mode'] = LevelPicker.STRATEGIES[self.random_combo.currentIndex()]
+        self.config_manager.config['random_skip_played'] = self.skip_played_check.isChecked()
         
         # Update background
         bg_type_map = {'Gradient': 'gradient', 'Solid Color': 'color', 'Image': 'image'}
@@ -335,35 +3728,24 @@ class SettingsDialog(QDialog):
         
         self.config_manager.save_config()
         
-        # Sync settings to server
+        # Sync settings to server through the outbox, newest settings win
         if self.config_manager.config.get('app_id'):
-            try:
-                # Upload image if needed
-                bg_image_url = ''
-                if self.config_manager.config['bg_type'] == 'image' and self.config_manager.config['bg_image']:
-                    # TODO: Upload image to server
-                    bg_image_url = self.config_manager.config['bg_image']
-                
-                requests.post(
-                    f"https://hwgdreqs.rf.gd/api.php",
-                    data={
-                        'id': self.config_manager.config['app_id'],
-                        'action': 'update_config',
-                        'config': json.dumps({
-                            'streamer_name': self.config_manager.config['streamer_name'],
-                            'filters': self.config_manager.config['filters'],
-                            'bg_type': self.config_manager.config['bg_type'],
-                            'bg_color1': self.config_manager.config['bg_color1'],
-                            'bg_color2': self.config_manager.config['bg_color2'],
-                            'bg_image': bg_image_url,
-                            'submit_message': self.config_manager.config['submit_message'],
-                            'offline_message': self.config_manager.config['offline_message']
-                        })
-                    },
-                    timeout=5
-                )
-            except:
-                pass
+            # Upload image if needed
+            bg_image_url = ''
+            if self.config_manager.config['bg_type'] == 'image' and self.config_manager.config['bg_image']:
+                # TODO: Upload image to server
+                bg_image_url = self.config_manager.config['bg_image']
+            
+            self.config_manager.record_outbound('update_config', config=json.dumps({
+                'streamer_name': self.config_manager.config['streamer_name'],
+                'filters': self.config_manager.config['filters'],
+                'bg_type': self.config_manager.config['bg_type'],
+                'bg_color1': self.config_manager.config['bg_color1'],
+                'bg_color2': self.config_manager.config['bg_color2'],
+                'bg_image': bg_image_url,
+                'submit_message': self.config_manager.config['submit_message'],
+                'offline_message': self.config_manager.config['offline_message']
+            }))
         
         self.accept()
 
@@ -468,16 +3850,340 @@ class AboutDialog(QDialog):
         self.accept()
 
 
+class ExportDialog(QDialog):
+    """Export the queue or play history in the background"""
+    
+    def __init__(self, config_manager, detail_loader=None, parent=None):
+        super().__init__(parent)
+        self.config_manager = config_manager
+        self.detail_loader = detail_loader
+        self.export_thread = None
+        self.setWindowTitle("Export")
+        self.setMinimumWidth(420)
+        self.init_ui()
+    
+    def init_ui(self):
+        """Initialize export UI"""
+        layout = QVBoxLayout()
+        
+        grid = QGridLayout()
+        grid.addWidget(QLabel("Export:"), 0, 0)
+        self.source_combo = QComboBox()
+        self.source_combo.addItems(["Queue", "History"])
+        self.source_combo.currentTextChanged.connect(self.update_filters)
+        grid.addWidget(self.source_combo, 0, 1)
+        
+        grid.addWidget(QLabel("Format:"), 1, 0)
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(list(EXPORT_FORMATS))
+        grid.addWidget(self.format_combo, 1, 1)
+        
+        grid.addWidget(QLabel("Difficulty:"), 2, 0)
+        self.difficulty_combo = QComboBox()
+        self.difficulty_combo.addItem("All")
+        self.difficulty_combo.addItems(['NA', 'Easy', 'Normal', 'Hard', 'Harder', 'Insane',
+                                        'Easy Demon', 'Medium Demon', 'Hard Demon', 'Insane Demon',
+                                        'Extreme Demon'])
+        grid.addWidget(self.difficulty_combo, 2, 1)
+        
+        # Played date range, history only
+        self.since_check = QCheckBox("Played from:")
+        self.since_edit = QDateEdit(QDate.currentDate().addDays(-7))
+        self.since_edit.setCalendarPopup(True)
+        grid.addWidget(self.since_check, 3, 0)
+        grid.addWidget(self.since_edit, 3, 1)
+        
+        self.until_check = QCheckBox("Played until:")
+        self.until_edit = QDateEdit(QDate.currentDate())
+        self.until_edit.setCalendarPopup(True)
+        grid.addWidget(self.until_check, 4, 0)
+        grid.addWidget(self.until_edit, 4, 1)
+        layout.addLayout(grid)
+        
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+        self.progress_label = QLabel()
+        layout.addWidget(self.progress_label)
+        
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        self.export_btn = QPushButton("Export")
+        self.export_btn.clicked.connect(self.start_export)
+        btn_layout.addWidget(self.export_btn)
+        
+        self.close_btn = QPushButton("Close")
+        self.close_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+        
+        self.setLayout(layout)
+        self.update_filters()
+    
+    def update_filters(self):
+        """Date filters only apply to the history"""
+        history = self.source_combo.currentText() == "History"
+        for widget in (self.since_check, self.since_edit, self.until_check, self.until_edit):
+            widget.setEnabled(history)
+    
+    def history_filters(self):
+        """HistoryStore filters for the chosen difficulty and date range"""
+        filters = {}
+        if self.difficulty_combo.currentIndex() > 0:
+            filters['difficulty'] = self.difficulty_combo.currentText()
+        if self.since_check.isChecked():
+            filters['since'] = self.since_edit.date().startOfDay().toSecsSinceEpoch()
+        if self.until_check.isChecked():
+            filters['until'] = self.until_edit.date().addDays(1).startOfDay().toSecsSinceEpoch()
+        return filters
+    
+    def make_source(self):
+        """Build the record source for the export thread
+        
+        Entries are completed from the level store. Full-entry exports of the
+        queue first load the details the store is missing, in batches.
+        """
+        config_manager = self.config_manager
+        
+        def enriched(records):
+            store = config_manager.level_store
+            return records if store is None else store.enrich(records)
+        
+        if self.source_combo.currentText() == "History":
+            filters = self.history_filters()
+            
+            def history_source():
+                config_manager.flush()  # include plays still waiting to be written
+                return (enriched(config_manager.history.iter_entries(**filters)),
+                        config_manager.history.count(**filters))
+            return history_source
+        
+        levels = list(config_manager.queue)
+        if self.difficulty_combo.currentIndex() > 0:
+            difficulty = self.difficulty_combo.currentText()
+            levels = [level for level in levels if level.get('difficulty') == difficulty]
+        detail_loader = self.detail_loader if self.format_combo.currentText() == 'JSON Lines' else None
+        
+        def queue_source():
+            if detail_loader is not None:
+                try:
+                    detail_loader.load([level.get('id') for level in levels])
+                except Exception:
+                    pass  # export what the store already has
+            return enriched(levels), len(levels)
+        return queue_source
+    
+    def start_export(self):
+        """Ask for a destination and start exporting"""
+        title = self.source_combo.currentText()
+        extension, file_filter, writer = EXPORT_FORMATS[self.format_combo.currentText()]
+        filename, _ = QFileDialog.getSaveFileName(self, f"Export {title}",
+                                                  f"hwgdreqs-{title.lower()}.{extension}", file_filter)
+        if not filename:
+            return
+        
+        self.export_thread = ExportThread(filename, writer, title, self.make_source(), self)
+        self.export_thread.progress.connect(self.on_progress)
+        self.export_thread.exported.connect(self.on_exported)
+        self.export_thread.failed.connect(self.on_failed)
+        self.export_btn.setEnabled(False)
+        self.close_btn.setText("Cancel")
+        self.progress_label.setText("Exporting...")
+        self.export_thread.start()
+    
+    def on_progress(self, written, total):
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(min(written, max(total, 1)))
+        self.progress_label.setText(f"{written} / {total} levels")
+    
+    def on_exported(self, filename, written):
+        self.finish_export()
+        QMessageBox.information(self, "Exported", f"Exported {written} levels to {filename}")
+    
+    def on_failed(self, error):
+        self.finish_export()
+        self.progress_label.setText(error)
+        if error != "Export cancelled":
+            QMessageBox.warning(self, "Error", f"Failed to export: {error}")
+    
+    def finish_export(self):
+        self.export_thread.wait()
+        self.export_thread = None
+        self.export_btn.setEnabled(True)
+        self.close_btn.setText("Close")
+    
+    def reject(self):
+        """Cancel a running export, otherwise close"""
+        if self.export_thread is not None:
+            self.export_thread.requestInterruption()
+            return
+        super().reject()
+    
+    def closeEvent(self, event):
+        if self.export_thread is not None:
+            self.export_thread.requestInterruption()
+            self.export_thread.wait()
+        event.accept()
+
+
+class ProfilerDialog(QDialog):
+    """Debug view of the profiler's rolling timings"""
+    
+    def __init__(self, config_manager, profiler=PROFILER, parent=None):
+        super().__init__(parent)
+        self.config_manager = config_manager
+        self.profiler = profiler
+        self.setWindowTitle("Profiler")
+        self.setMinimumSize(640, 480)
+        self.init_ui()
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(1000)
+        self.refresh()
+    
+    def init_ui(self):
+        """Initialize profiler UI"""
+        layout = QVBoxLayout()
+        
+        top_layout = QHBoxLayout()
+        self.enabled_check = QCheckBox("Enable profiling")
+        self.enabled_check.setChecked(self.profiler.enabled)
+        self.enabled_check.toggled.connect(self.set_enabled)
+        top_layout.addWidget(self.enabled_check)
+        top_layout.addStretch()
+        top_layout.addWidget(QLabel("Histogram:"))
+        self.span_combo = QComboBox()
+        self.span_combo.currentTextChanged.connect(lambda _: self.refresh())
+        top_layout.addWidget(self.span_combo)
+        layout.addLayout(top_layout)
+        
+        self.stats_text = QTextEdit()
+        self.stats_text.setReadOnly(True)
+        self.stats_text.setFont(QFont("Courier New", 9))
+        layout.addWidget(self.stats_text)
+        
+        btn_layout = QHBoxLayout()
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset)
+        btn_layout.addWidget(reset_btn)
+        
+        export_btn = QPushButton("Export Trace")
+        export_btn.clicked.connect(self.export_trace)
+        btn_layout.addWidget(export_btn)
+        
+        btn_layout.addStretch()
+        
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(close_btn)
+        
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+    
+    def set_enabled(self, enabled):
+        """Turn profiling on or off and remember the choice"""
+        self.profiler.enabled = enabled
+        self.config_manager.config['profiling'] = enabled
+        self.config_manager.save_config()
+        self.refresh()
+    
+    def reset(self):
+        """Clear all recorded timings"""
+        self.profiler.reset()
+        self.refresh()
+    
+    def refresh(self):
+        """Redraw the span table, counters and the selected histogram"""
+        summary = self.profiler.summary()
+        selected = self.span_combo.currentText()
+        names = list(summary)
+        if names != [self.span_combo.itemText(i) for i in range(self.span_combo.count())]:
+            self.span_combo.blockSignals(True)
+            self.span_combo.clear()
+            self.span_combo.addItems(names)
+            if selected in summary:
+                self.span_combo.setCurrentText(selected)
+            self.span_combo.blockSignals(False)
+            selected = self.span_combo.currentText()
+        
+        if not self.profiler.enabled and not summary:
+            self.stats_text.setPlainText("Profiling is off. Enable it to start collecting timings.")
+            return
+        
+        lines = [f"{'span':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for name, stats in summary.items():
+            lines.append(f"{name:<24}{stats['count']:>8}{stats['p50']:>10.2f}"
+                         f"{stats['p95']:>10.2f}{stats['max']:>10.2f}")
+        
+        with self.profiler.lock:
+            counters = dict(self.profiler.counters)
+        if counters:
+            lines.append("")
+            lines.extend(f"{name:<24}{value:>8}" for name, value in sorted(counters.items()))
+        
+        if selected:
+            counts = self.profiler.histogram(selected)
+            peak = max(counts) or 1
+            labels = [f"<= {bound:g} ms" for bound in self.profiler.BUCKETS]
+            labels.append(f"> {self.profiler.BUCKETS[-1]:g} ms")
+            lines.append("")
+            lines.append(f"{selected} (last {sum(counts)} samples)")
+            for label, count in zip(labels, counts):
+                lines.append(f"{label:>12} {'#' * round(count / peak * 40):<40} {count}")
+        
+        self.stats_text.setPlainText('\n'.join(lines))
+    
+    def export_trace(self):
+        """Save recorded events as Chrome trace JSON"""
+        filename, _ = QFileDialog.getSaveFileName(self, "Export Trace", "hwgdreqs-trace.json",
+                                                  "Chrome Trace (*.json)")
+        if filename:
+            try:
+                self.profiler.export_chrome_trace(filename)
+                QMessageBox.information(self, "Exported",
+                                        f"Trace exported to {filename}\nOpen it in chrome://tracing or Perfetto.")
+            except Exception as e:
+                QMessageBox.warning(self, "Error", f"Failed to export: {str(e)}")
+
+
 class MainWindow(QMainWindow):
     """Main application window"""
     
+    data_loaded = Signal()
+    
+    # Rows after the selected one whose details are fetched along with it
+    DETAIL_PREFETCH = 3
+    
     def __init__(self, config_manager):
         super().__init__()
         self.config_manager = config_manager
+        self.channel = config_manager  # the channel whose queue is shown
+        self.channels = {}  # extra APP-ID -> its ConfigManager
+        self.refresh_state = {}  # APP-ID -> (ConditionalState, channel.changes) of the last refresh
+        self.api = ApiClient()
+        self.tasks = TaskRunner(self.api.submit, self)
         self.sync_thread = None
+        self.difficulty_icons = DifficultyIcons.instance()
+        self.detail_cache = DetailCache()
+        self.detail_loader = DetailLoader(self.api, self.detail_cache, self.detail_params,
+                                          lambda: self.config_manager.level_store)
+        self.filter_engine = FilterEngine(self.config_manager.config.get('filters'))
+        self.picker = LevelPicker(self.can_pick)
+        self.picker_stale = False
         self.init_ui()
         self.check_authentication()
         
+        # Queue and history load off the GUI thread once the window is up
+        if not self.config_manager.loaded.is_set():
+            self.status_label.setText("Loading queue...")
+            QTimer.singleShot(0, self.load_data)
+        
+        # Keep per-endpoint network counters visible on the status label
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_network_stats)
+        self.stats_timer.start(5000)
+        
         # Show donation dialog on first run
         if self.config_manager.config.get('show_donate', True) and not self.config_manager.config.get('donate_shown'):
             self.config_manager.config['donate_shown'] = True
@@ -512,6 +4218,16 @@ class MainWindow(QMainWindow):
         self.link_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
         top_layout.addWidget(self.link_label)
         
+        # Busy indicator while network tasks are in flight
+        self.busy_bar = QProgressBar()
+        self.busy_bar.setRange(0, 0)
+        self.busy_bar.setMaximumWidth(100)
+        self.busy_bar.setMaximumHeight(12)
+        self.busy_bar.setTextVisible(False)
+        self.busy_bar.hide()
+        top_layout.addWidget(self.busy_bar)
+        self.tasks.busy_changed.connect(self.update_busy_indicator)
+        
         main_layout.addLayout(top_layout)
         
         # Content area - split view
@@ -525,8 +4241,21 @@ class MainWindow(QMainWindow):
         queue_label.setFont(QFont("Arial", 12, QFont.Bold))
         left_layout.addWidget(queue_label)
         
-        self.queue_list = QListWidget()
-        self.queue_list.itemClicked.connect(self.show_level_details)
+        self.channel_combo = QComboBox()
+        self.channel_combo.currentIndexChanged.connect(self.switch_channel)
+        self.channel_combo.hide()
+        left_layout.addWidget(self.channel_combo)
+        
+        self.queue_model = QueueModel(self.difficulty_icons.icon_for, self.channel.index,
+                                      self.filter_engine, self)
+        self.queue_list = QListView()
+        self.queue_list.setModel(self.queue_model)
+        self.queue_list.setIconSize(QSize(DifficultyIcons.SIZE, DifficultyIcons.SIZE))
+        self.queue_list.setUniformItemSizes(True)
+        self.queue_list.setLayoutMode(QListView.Batched)
+        self.queue_list.setBatchSize(200)
+        self.queue_list.clicked.connect(self.show_level_details)
+        self.row_filter = RowFilter(self.queue_list, self.queue_model, self.filter_engine)
         left_layout.addWidget(self.queue_list)
         
         # Queue action buttons
@@ -552,8 +4281,8 @@ class MainWindow(QMainWindow):
         self.clear_btn.clicked.connect(self.clear_queue)
         queue_btn_layout.addWidget(self.clear_btn, 2, 0)
         
-        self.export_btn = QPushButton("Export Queue")
-        self.export_btn.clicked.connect(self.export_queue)
+        self.export_btn = QPushButton("Export...")
+        self.export_btn.clicked.connect(self.show_export)
         queue_btn_layout.addWidget(self.export_btn, 2, 1)
         
         left_layout.addLayout(queue_btn_layout)
@@ -595,6 +4324,9 @@ class MainWindow(QMainWindow):
         
         bottom_layout.addStretch()
         
+        # Hidden debug panel
+        QShortcut(QKeySequence("Ctrl+Shift+P"), self, self.show_profiler)
+        
         refresh_btn = QPushButton("Refresh Queue")
         refresh_btn.clicked.connect(self.refresh_queue)
         bottom_layout.addWidget(refresh_btn)
@@ -641,51 +4373,175 @@ class MainWindow(QMainWindow):
             self.status_label.setText("Not authenticated")
             self.link_label.setText("")
     
+    def update_busy_indicator(self, in_flight):
+        """Show the busy bar while background tasks are running"""
+        self.busy_bar.setVisible(in_flight > 0)
+        self.busy_bar.setToolTip(f"{in_flight} network task(s) in progress")
+    
+    def update_network_stats(self):
+        """Show API latency, failure and disk write counters as the status tooltip"""
+        store = self.config_manager.level_store
+        self.status_label.setToolTip(
+            f"{self.api.stats_summary()}\n{self.detail_cache.summary()}\n"
+            + (f"{store.summary()}\n" if store is not None else "")
+            + f"{self.channel.outbox.summary()}\n"
+            + self.config_manager.persistence_summary())
+    
+    def load_data(self):
+        """Load the saved queue and history in the background"""
+        self.tasks.run(
+            'load_data',
+            self.config_manager.load_data,
+            on_success=lambda _: self.on_data_loaded(),
+            on_error=lambda e: QMessageBox.warning(self, "Error", f"Failed to load saved queue: {str(e)}")
+        )
+    
+    def on_data_loaded(self):
+        """Show the loaded queue and start syncing"""
+        self.update_status()
+        self.update_queue_display()
+        if self.config_manager.config.get('app_id'):
+            self.start_sync()
+        self.data_loaded.emit()
+    
     def start_sync(self):
-        """Start background sync thread"""
-        if not self.sync_thread:
-            self.sync_thread = QueueSyncThread(self.config_manager)
-            self.sync_thread.queue_updated.connect(self.update_queue_display)
+        """Start background sync thread once the saved queue is loaded"""
+        if not self.sync_thread and self.config_manager.loaded.is_set():
+            self.sync_channels()
+            self.sync_thread = QueueSyncThread(self.config_manager, self.api)
+            for channel in self.channels.values():
+                self.sync_thread.add_channel(channel)
+            self.sync_thread.channel_updated.connect(self.on_channel_updated)
             self.sync_thread.start()
     
+    def sync_channels(self):
+        """Open and close extra channels to match config['channels']"""
+        main_id = self.config_manager.config.get('app_id')
+        wanted = [app_id for app_id in self.config_manager.config.get('channels', [])
+                  if app_id and app_id != main_id]
+        
+        for app_id in list(self.channels):
+            if app_id not in wanted:
+                channel = self.channels.pop(app_id)
+                if channel is self.channel:
+                    self.channel = self.config_manager
+                    self.queue_model.level_index = self.channel.index
+                    self.update_queue_display()
+                if self.sync_thread:
+                    # Closed by the sync thread once its current tick is done with it
+                    self.sync_thread.remove_channel(app_id, close=True)
+                else:
+                    channel.close()
+        for app_id in wanted:
+            if app_id not in self.channels:
+                self.channels[app_id] = self.config_manager.open_channel(app_id)
+                if self.sync_thread:
+                    self.sync_thread.add_channel(self.channels[app_id])
+        self.refresh_channel_combo()
+    
+    def refresh_channel_combo(self):
+        """List every channel with its queue length, shown only with extra channels"""
+        managers = [self.config_manager] + list(self.channels.values())
+        self.channel_combo.blockSignals(True)
+        self.channel_combo.clear()
+        for manager in managers:
+            app_id = manager.config.get('app_id') or 'Not authenticated'
+            self.channel_combo.addItem(f"{app_id} ({len(manager.queue)} queued)")
+        self.channel_combo.setCurrentIndex(managers.index(self.channel))
+        self.channel_combo.blockSignals(False)
+        self.channel_combo.setVisible(bool(self.channels))
+    
+    def switch_channel(self, index):
+        """Show another channel's queue"""
+        managers = [self.config_manager] + list(self.channels.values())
+        if 0 <= index < len(managers) and managers[index] is not self.channel:
+            self.channel = managers[index]
+            self.queue_model.level_index = self.channel.index
+            self.picker_stale = True
+            self.details_text.clear()
+            self.update_queue_display()
+    
+    def on_channel_updated(self, app_id, new_queue):
+        """Refresh the view when the shown channel changed, and the queue counts"""
+        if app_id == self.channel.config.get('app_id'):
+            self.update_queue_display()
+        if self.channels:
+            self.refresh_channel_combo()
+    
     def update_queue_display(self):
         """Update queue list display"""
-        self.queue_list.clear()
+        with PROFILER.span('view.refresh'):
+            self.queue_model.set_levels(self.channel.queue)
+            self.apply_filters()
+            self.queue_model.refresh_notes()
+            self.picker.sync(self.queue_model.row_keys(), self.queue_model.levels())
+    
+    def apply_filters(self):
+        """Hide (or just mark) queued levels the current filters reject"""
+        with PROFILER.span('view.filter'):
+            self.row_filter.apply(self.config_manager.config.get('filter_mode', 'hide') == 'hide')
+    
+    def can_pick(self, level):
+        """Whether choose_random may land on a level"""
+        config = self.config_manager.config
+        if config.get('filter_mode', 'hide') == 'hide' and not self.filter_engine.accepts(level):
+            return False
+        if config.get('random_skip_played') and self.channel.index.played_before(level.get('id')):
+            return False
+        return True
+    
+    def current_row(self):
+        """Get the selected queue row, or -1 if nothing is selected"""
+        index = self.queue_list.currentIndex()
+        return index.row() if index.isValid() else -1
+    
+    def show_level_details(self, index):
+        """Show details for selected level, loading the full entry in the background"""
+        row = index.row()
+        level = self.queue_model.level_at(row)
+        if level is not None:
+            loading = self.load_level_details(row)
+            self.render_level_details(level, loading)
+    
+    def detail_params(self):
+        """Parameters identifying this app to action=details"""
+        if not self.channel.config.get('app_id'):
+            return None
+        return {'id': self.channel.config['app_id']}
+    
+    def load_level_details(self, row):
+        """Fetch details for a row and prefetch the next few, True if the row itself is loading"""
+        queue = self.queue_model.levels()
+        ids = [level.get('id') for level in queue[row:row + 1 + self.DETAIL_PREFETCH]]
+        pending = self.detail_loader.pending(ids)
+        if not pending:
+            return False
+        level_id = ids[0]
+        self.tasks.run(
+            'details',
+            lambda: self.detail_loader.load(ids),
+            on_success=lambda _: self.on_level_details_loaded(level_id),
+            on_error=lambda _: self.on_level_details_loaded(level_id),
+            replace=True
+        )
+        return level_id in pending
+    
+    def on_level_details_loaded(self, level_id):
+        """Re-render the detail pane if the loaded level is still selected"""
+        level = self.queue_model.level_at(self.current_row())
+        if level is not None:
+            if level.get('id') == level_id:
+                self.render_level_details(level)
+    
+    def render_level_details(self, level, loading=False):
+        """Fill the detail pane from a queue entry and any cached details"""
+        details = self.detail_cache.get(level.get('id'))
+        if details:
+            level = {**details, **level}
+        elif loading and 'description' not in level:
+            level = {**level, 'description': 'Loading...'}
         
-        for level in self.config_manager.queue:
-            level_id = level.get('id', 'Unknown')
-            level_name = level.get('name', 'Unknown Level')
-            difficulty = level.get('difficultyFace', 'na').lower()
-            is_flagged = level.get('flagged', False)
-            
-            # Get difficulty icon
-            icon_name = difficulty if difficulty != 'extreme demon' else 'demon'
-            if 'demon' in difficulty and difficulty != 'demon':
-                icon_name = 'demon'
-            
-            icon_path = self.get_resource_path(f'icons/{icon_name}.png')
-            
-            item_text = f"{level_name} (ID: {level_id})"
-            if is_flagged:
-                item_text = f"⚠️ {item_text}"
-            
-            item = self.queue_list.addItem(item_text)
-            
-            # Try to set icon
-            if os.path.exists(icon_path):
-                try:
-                    icon = QIcon(icon_path)
-                    self.queue_list.item(self.queue_list.count() - 1).setIcon(icon)
-                except:
-                    pass
-    
-    def show_level_details(self, item):
-        """Show details for selected level"""
-        index = self.queue_list.row(item)
-        if 0 <= index < len(self.config_manager.queue):
-            level = self.config_manager.queue[index]
-            
-            details = f"""
+        details = f"""
 <h2>{level.get('name', 'Unknown')}</h2>
 <p><b>ID:</b> {level.get('id', 'N/A')}</p>
 <p><b>Author:</b> {level.get('author', 'Unknown')}</p>
@@ -696,145 +4552,183 @@ class MainWindow(QMainWindow):
 <p><b>Likes:</b> {level.get('likes', 0)}</p>
 <p><b>Description:</b> {level.get('description', 'No description')}</p>
 """
-            
-            if level.get('flagged'):
-                details += f"\n<p style='color: red;'><b>⚠️ WARNING:</b> {level.get('flag_reason', 'Flagged level')}</p>"
-            
-            self.details_text.setHtml(details)
+        
+        if level.get('flagged'):
+            details += f"\n<p style='color: red;'><b>⚠️ WARNING:</b> {level.get('flag_reason', 'Flagged level')}</p>"
+        
+        self.details_text.setHtml(details)
     
     def copy_level_id(self):
         """Copy selected level ID to clipboard"""
-        current = self.queue_list.currentRow()
-        if 0 <= current < len(self.config_manager.queue):
-            level_id = self.config_manager.queue[current].get('id', '')
+        level = self.queue_model.level_at(self.current_row())
+        if level is not None:
+            level_id = level.get('id', '')
             QApplication.clipboard().setText(str(level_id))
             QMessageBox.information(self, "Copied", f"Level ID {level_id} copied to clipboard!")
     
+    def queue_position(self, channel, row, level):
+        """Where a model row's level is in the channel queue now, or -1
+        
+        Prefers the very same entry; an entry the server has edited since is
+        matched by its (id, occurrence) row key, so duplicates stay apart.
+        Call with the channel lock held.
+        """
+        positions = channel.index.rows(level.get('id'))
+        for position in positions:
+            if channel.queue[position] is level:
+                return position
+        _, occurrence = self.queue_model.row_keys()[row]
+        return positions[occurrence] if occurrence < len(positions) else -1
+    
     def delete_level(self):
         """Delete selected level from queue"""
-        current = self.queue_list.currentRow()
-        if 0 <= current < len(self.config_manager.queue):
-            level = self.config_manager.queue[current]
+        # The row is the model's, the sync thread may have replaced the queue since
+        row = self.current_row()
+        level = self.queue_model.level_at(row)
+        if level is not None:
             reply = QMessageBox.question(self, "Delete Level", 
                                         f"Delete '{level.get('name')}' from queue?",
                                         QMessageBox.Yes | QMessageBox.No)
             if reply == QMessageBox.Yes:
-                # Add to history
-                self.config_manager.history.append(level)
-                self.config_manager.save_history()
-                
-                # Remove from queue
-                del self.config_manager.queue[current]
-                self.config_manager.save_queue()
+                channel = self.channel
+                with channel.lock:
+                    position = self.queue_position(channel, row, level)
+                    if position >= 0:
+                        # Add to history, remove from queue here and on the server
+                        level = channel.remove_from_queue(position)
+                        channel.add_history([level])
+                        channel.record_outbound('delete', ids=[level.get('id')], level_id=level.get('id'))
+                self.picker_stale = True
                 self.update_queue_display()
                 self.details_text.clear()
     
     def choose_random(self):
         """Choose a random level from queue"""
-        if self.config_manager.queue:
-            random_level = random.choice(self.config_manager.queue)
+        if self.picker_stale:
+            # History or filters changed, so eligibility may have too
+            self.picker.sync(self.queue_model.row_keys(), self.queue_model.levels(), recheck=True)
+            self.picker_stale = False
+        row = self.picker.pick(self.config_manager.config.get('random_mode', 'uniform'))
+        if row >= 0:
+            random_level = self.queue_model.level_at(row)
             QMessageBox.information(self, "Random Level", 
                                   f"Random pick: {random_level.get('name')} (ID: {random_level.get('id')})")
             # Select it in the list
-            for i, level in enumerate(self.config_manager.queue):
-                if level.get('id') == random_level.get('id'):
-                    self.queue_list.setCurrentRow(i)
-                    self.show_level_details(self.queue_list.item(i))
-                    break
+            index = self.queue_model.index(row)
+            self.queue_list.setCurrentIndex(index)
+            self.queue_list.scrollTo(index)
+            self.show_level_details(index)
+        elif self.channel.queue:
+            QMessageBox.information(self, "Random Level", "No queued level matches the random pick settings!")
         else:
             QMessageBox.information(self, "Empty Queue", "No levels in queue!")
     
     def report_level(self):
         """Report selected level"""
-        current = self.queue_list.currentRow()
-        if 0 <= current < len(self.config_manager.queue):
-            level = self.config_manager.queue[current]
+        level = self.queue_model.level_at(self.current_row())
+        if level is not None:
             reason, ok = QInputDialog.getText(self, "Report Level", 
                                              f"Why are you reporting '{level.get('name')}'?")
             if ok and reason:
-                try:
-                    requests.post(
-                        "https://hwgdreqs.rf.gd/fuck-it.php",
-                        data={
-                            'level_id': level.get('id'),
-                            'reason': reason
-                        },
-                        timeout=5
-                    )
-                    QMessageBox.information(self, "Reported", "Level has been reported for review.")
-                except:
-                    QMessageBox.warning(self, "Error", "Failed to report level. Check your connection.")
+                # Sent by the sync thread, retried until the server has it
+                self.channel.record_outbound('report', level_id=level.get('id'), reason=reason)
+                QMessageBox.information(self, "Reported", "Level has been reported for review.")
     
     def clear_queue(self):
         """Clear entire queue"""
-        if self.config_manager.queue:
+        if self.channel.queue:
             reply = QMessageBox.question(self, "Clear Queue", 
                                         "Are you sure you want to clear the entire queue?",
                                         QMessageBox.Yes | QMessageBox.No)
             if reply == QMessageBox.Yes:
                 # Add all to history
-                self.config_manager.history.extend(self.config_manager.queue)
-                self.config_manager.save_history()
+                levels = list(self.channel.queue)
+                self.channel.add_history(levels)
                 
-                # Clear queue
-                self.config_manager.queue = []
-                self.config_manager.save_queue()
+                # Clear queue, on the server only the levels cleared here
+                self.channel.clear_queue()
+                self.channel.record_outbound('clear', ids=[level.get('id') for level in levels])
                 self.update_queue_display()
                 self.details_text.clear()
     
-    def export_queue(self):
-        """Export queue to text file"""
-        filename, _ = QFileDialog.getSaveFileName(self, "Export Queue", "", "Text Files (*.txt)")
-        if filename:
-            try:
-                with open(filename, 'w') as f:
-                    f.write("HwGDReqs Queue Export\n")
-                    f.write("=" * 50 + "\n\n")
-                    for i, level in enumerate(self.config_manager.queue, 1):
-                        f.write(f"{i}. {level.get('name')} (ID: {level.get('id')})\n")
-                        f.write(f"   Author: {level.get('author')}\n")
-                        f.write(f"   Difficulty: {level.get('difficulty')}\n")
-                        f.write(f"   Length: {level.get('length')}\n\n")
-                QMessageBox.information(self, "Exported", f"Queue exported to {filename}")
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Failed to export: {str(e)}")
+    def show_export(self):
+        """Show export dialog for the queue and history"""
+        dialog = ExportDialog(self.channel, self.detail_loader, self)
+        dialog.exec()
     
     def refresh_queue(self):
         """Manually refresh queue from server"""
-        if self.config_manager.config.get('app_id'):
-            try:
-                response = requests.get(
-                    f"https://hwgdreqs.rf.gd/api.php",
-                    params={
-                        'id': self.config_manager.config['app_id'],
-                        'action': 'fetch'
-                    },
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('success'):
-                        self.config_manager.queue = data.get('queue', [])
-                        self.config_manager.save_queue()
-                        self.update_queue_display()
-                        QMessageBox.information(self, "Refreshed", "Queue refreshed from server!")
-                    else:
-                        QMessageBox.warning(self, "Error", "Failed to fetch queue from server.")
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Connection error: {str(e)}")
+        channel = self.channel
+        if channel.config.get('app_id'):
+            params = {
+                'id': channel.config['app_id'],
+                'action': 'fetch',
+                'fields': QUEUE_FIELDS
+            }
+            # Ask for the body only if the queue moved since the last manual refresh
+            conditional, changes = self.refresh_state.get(params['id'], (ConditionalState(), None))
+            headers = conditional.headers(params) if channel.changes == changes else {}
+            self.tasks.run(
+                'refresh',
+                lambda: self.fetch_queue_data(params, conditional, headers),
+                on_success=lambda data: self.on_queue_refreshed(data, channel, conditional),
+                on_error=lambda e: QMessageBox.warning(self, "Error", f"Connection error: {str(e)}")
+            )
+    
+    def fetch_queue_data(self, params, conditional=None, headers=None):
+        """Fetch the full queue, runs on a worker thread"""
+        response = self.api.get('fetch', params=params, headers=headers or {})
+        if response.status_code == 304 and headers:
+            self.api.record_not_modified('fetch', conditional.size)
+            return {'success': True, 'not_modified': True}
+        if response.status_code == 200:
+            if conditional is not None:
+                conditional.update(params, response)
+            return response.json()
+        return None
+    
+    def on_queue_refreshed(self, data, channel=None, conditional=None):
+        """Apply a manually refreshed queue to the channel it was fetched for"""
+        if data is None:
+            return
+        channel = channel or self.config_manager
+        if data.get('not_modified'):
+            QMessageBox.information(self, "Refreshed", "Queue is already up to date!")
+        elif data.get('success'):
+            data = channel.outbox.resolve(data)
+            channel.update_queue(LevelRecord.decode(data.get('queue', [])))
+            if self.sync_thread is not None:
+                self.sync_thread.resync(channel)
+            if conditional is not None:
+                self.refresh_state[channel.config.get('app_id')] = (conditional, channel.changes)
+            if channel is self.channel:
+                self.update_queue_display()
+            QMessageBox.information(self, "Refreshed", "Queue refreshed from server!")
+        else:
+            QMessageBox.warning(self, "Error", "Failed to fetch queue from server.")
     
     def show_settings(self):
         """Show settings dialog"""
         dialog = SettingsDialog(self.config_manager, self)
         if dialog.exec():
             self.update_status()
+            self.sync_channels()
+            # Re-check the queue against the new filters without refetching
+            self.filter_engine.compile(self.config_manager.config['filters'])
+            self.apply_filters()
+            self.queue_model.refresh_notes()
+            self.picker_stale = True
     
     def show_about(self):
         """Show about dialog"""
         dialog = AboutDialog(self.config_manager, self)
         dialog.exec()
     
+    def show_profiler(self):
+        """Show profiler debug dialog"""
+        dialog = ProfilerDialog(self.config_manager, parent=self)
+        dialog.exec()
+    
     def open_url(self, url):
         """Open URL in browser"""
         import webbrowser
@@ -844,32 +4738,332 @@ class MainWindow(QMainWindow):
         """Handle window close"""
         if self.sync_thread:
             self.sync_thread.stop()
+        # Closing the client first cuts short retries the sync thread may be waiting in
+        self.api.close()
+        if self.sync_thread:
             self.sync_thread.wait()
+        self.tasks.cancel_all()
+        for channel in self.channels.values():
+            channel.close()
+        self.config_manager.close()
         event.accept()
 
 
+class StartupProbe(QObject):
+    """Reports startup milestones as one JSON line on stdout, then quits
+    
+    Used by `benchmark.py startup`; timestamps are wall clock seconds so the
+    launching process can subtract its own spawn time.
+    """
+    
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.marks = {'window_created': time.time()}
+        window.installEventFilter(self)
+        window.data_loaded.connect(self.on_data_loaded)
+    
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and 'first_paint' not in self.marks:
+            self.marks['first_paint'] = time.time()
+        return False
+    
+    def on_data_loaded(self):
+        self.marks['data_loaded'] = time.time()
+        # Let the refreshed queue paint before reporting
+        QTimer.singleShot(0, self.report)
+    
+    def report(self):
+        self.marks.setdefault('first_paint', time.time())
+        print(json.dumps(self.marks), flush=True)
+        self.window.close()
+
+
+class HeadlessService:
+    """Runs the sync engine and persistence with no GUI, behind a control API
+    
+    Owns the same QueueSyncThread and ConfigManagers the main window would,
+    plus the extra channels from config['channels']. handle() answers the
+    local control requests (list, pop, random, delete, status) with the same
+    {'success': ...} JSON shape as api.php. Requests arrive on server threads,
+    so every read-modify-write of a queue holds that channel's lock, as does
+    the sync thread while it applies a fetch, and a delete is tombstoned in
+    the outbox before the lock is released.
+    """
+    
+    def __init__(self, config_manager, api=None, token=None):
+        self.config_manager = config_manager
+        self.api = api or ApiClient()
+        self.token = token
+        self.channels = {}
+        self.pickers = {}
+        self.sync_thread = None
+    
+    def start(self):
+        """Open the extra channels and start syncing all of them"""
+        main_id = self.config_manager.config.get('app_id')
+        for app_id in self.config_manager.config.get('channels', []):
+            if app_id and app_id != main_id and app_id not in self.channels:
+                self.channels[app_id] = self.config_manager.open_channel(app_id)
+        self.sync_thread = QueueSyncThread(self.config_manager, self.api)
+        for channel in self.channels.values():
+            self.sync_thread.add_channel(channel)
+        self.sync_thread.start()
+    
+    def stop(self):
+        """Stop syncing and flush every channel to disk"""
+        if self.sync_thread:
+            self.sync_thread.stop()
+        self.api.close()
+        if self.sync_thread:
+            self.sync_thread.wait()
+            self.sync_thread = None
+        for channel in self.channels.values():
+            channel.close()
+        self.config_manager.close()
+    
+    def channel(self, app_id=None):
+        """ConfigManager for an APP-ID, the main one by default"""
+        if not app_id or app_id == self.config_manager.config.get('app_id'):
+            return self.config_manager
+        return self.channels.get(app_id)
+    
+    def pop_level(self, channel):
+        """Remove the next level and mark it played"""
+        with channel.lock:
+            if not channel.queue:
+                return None
+            level = channel.remove_from_queue(0)
+            channel.add_history([level])
+            # Tombstoned before the lock is released, so no fetch can bring it back
+            channel.record_outbound('delete', ids=[level.get('id')], level_id=level.get('id'))
+        return level
+    
+    def random_level(self, channel, strategy=None):
+        """Pick a random queued level without removing it"""
+        config = self.config_manager.config
+        picker = self.pickers.get(id(channel))
+        if picker is None:
+            picker = self.pickers[id(channel)] = LevelPicker(
+                lambda level: not (config.get('random_skip_played')
+                                   and channel.index.played_before(level.get('id'))))
+        with channel.lock:
+            # The queue list is replaced or edited in place, so always recheck played state
+            picker.sync(level_keys(channel.queue), channel.queue, recheck=config.get('random_skip_played'))
+            row = picker.pick(strategy or config.get('random_mode', 'uniform'))
+            return channel.queue[row] if row >= 0 else None
+    
+    def delete_level(self, channel, level_id):
+        """Remove a level by id and mark it played, like the Delete button"""
+        with channel.lock:
+            for row, level in enumerate(channel.queue):
+                if str(level.get('id')) == str(level_id):
+                    channel.remove_from_queue(row)
+                    channel.add_history([level])
+                    channel.record_outbound('delete', ids=[level.get('id')], level_id=level.get('id'))
+                    return level
+        return None
+    
+    def status(self):
+        """Queue sizes and sync state of every channel"""
+        channels = []
+        for channel in [self.config_manager] + list(self.channels.values()):
+            channels.append({'app_id': channel.config.get('app_id'), 'queued': len(channel.queue),
+                             'outbox': len(channel.outbox)})
+        return {
+            'success': True,
+            'channels': channels,
+            'sync_error': self.sync_thread.last_error if self.sync_thread else '',
+            'disk': self.config_manager.persistence_summary(),
+            'network': self.api.stats_summary()
+        }
+    
+    def handle(self, method, path, params, token=None):
+        """Answer one control request, returning (HTTP status, JSON body)"""
+        if self.token and token != self.token:
+            return 401, {'success': False, 'error': 'Invalid token'}
+        action = path.strip('/') or 'status'
+        if action == 'status':
+            return 200, self.status()
+        
+        channel = self.channel(params.get('channel'))
+        if channel is None:
+            return 404, {'success': False, 'error': 'Unknown channel'}
+        if action == 'queue':
+            with channel.lock:
+                return 200, {'success': True, 'queue': list(channel.queue)}
+        if action == 'random':
+            strategy = params.get('mode')
+            if strategy is not None and strategy not in LevelPicker.STRATEGIES:
+                return 400, {'success': False, 'error': 'Unknown mode'}
+            level = self.random_level(channel, strategy)
+        elif action in ('pop', 'delete') and method != 'POST':
+            return 405, {'success': False, 'error': 'Use POST'}
+        elif action == 'pop':
+            level = self.pop_level(channel)
+        elif action == 'delete':
+            level = self.delete_level(channel, params.get('id'))
+            if level is None:
+                return 404, {'success': False, 'error': 'Level not in queue'}
+        else:
+            return 404, {'success': False, 'error': 'Unknown action'}
+        return 200, {'success': True, 'level': level}
+
+
+def is_loopback(host):
+    """Whether an address only accepts connections from this machine"""
+    import ipaddress
+    
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve_control(service, host='127.0.0.1', port=8766):
+    """Start the headless control API on a background thread
+    
+    Listening beyond loopback requires a token, as the API can pop and
+    delete levels.
+    """
+    # Only headless mode pays for importing the HTTP server
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+    
+    if not service.token and not is_loopback(host):
+        raise ValueError(f"Refusing to serve the control API on {host} without a token")
+    
+    class ControlHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+        
+        def log_message(self, format, *args):
+            pass
+        
+        def do_GET(self):
+            self.dispatch('GET')
+        
+        def do_POST(self):
+            self.dispatch('POST')
+        
+        def dispatch(self, method):
+            try:
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    params.update(parse_qs(self.rfile.read(length).decode('utf-8')))
+                params = {key: values[-1] for key, values in params.items()}
+            except ValueError:
+                self.close_connection = True  # the body may not have been read
+                status, data = 400, {'success': False, 'error': 'Malformed request'}
+            else:
+                token = self.headers.get('Authorization', '').removeprefix('Bearer ') or None
+                try:
+                    status, data = service.handle(method, url.path, params, token)
+                except Exception as e:
+                    status, data = 500, {'success': False, 'error': str(e)}
+            body = json.dumps(data, default=json_default).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+    
+    server = ThreadingHTTPServer((host, port), ControlHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_headless(args):
+    """Sync and persist the queue without a GUI until interrupted"""
+    import signal
+    
+    token = args.control_token or os.getenv('HWGDREQS_CONTROL_TOKEN')
+    if not token and not is_loopback(args.control_host):
+        print(f"Refusing to expose the control API on {args.control_host} without a token, "
+              "pass --control-token or set HWGDREQS_CONTROL_TOKEN", file=sys.stderr)
+        return 2
+    
+    app = QCoreApplication(sys.argv[:1])
+    app.setApplicationName("HwGDReqs")
+    
+    config_manager = ConfigManager()
+    if args.app_id:
+        config_manager.config['app_id'] = args.app_id
+        config_manager.save_config()
+    if not config_manager.config.get('app_id'):
+        print("No APP-ID configured, pass --app-id or authenticate in the GUI first", file=sys.stderr)
+        return 2
+    config_manager.start_persistence()
+    PROFILER.enabled = bool(config_manager.config.get('profiling') or os.getenv('HWGDREQS_PROFILE'))
+    
+    service = HeadlessService(config_manager, token=token)
+    service.start()
+    server = serve_control(service, args.control_host, args.control_port)
+    host, port = server.server_address[:2]
+    print(f"Syncing {len(service.channels) + 1} channel(s), control API on http://{host}:{port}", flush=True)
+    
+    # Qt's event loop never returns to Python on its own, poll so Ctrl+C gets through
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    signal.signal(signal.SIGTERM, lambda *_: app.quit())
+    ticker = QTimer()
+    ticker.timeout.connect(lambda: None)
+    ticker.start(250)
+    
+    try:
+        return app.exec()
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+
 def main():
     """Main application entry point"""
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="HwGDReqs - GD Level Request Manager")
+    parser.add_argument('--startup-probe', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--headless', action='store_true',
+                        help="sync without a window, controlled over a local HTTP API")
+    parser.add_argument('--app-id', help="APP-ID to sync in headless mode")
+    parser.add_argument('--control-host', default='127.0.0.1',
+                        help="address the headless control API listens on, "
+                             "anything but loopback needs --control-token")
+    parser.add_argument('--control-port', type=int, default=8766)
+    parser.add_argument('--control-token',
+                        help="require this bearer token on control requests")
+    args, qt_args = parser.parse_known_args()
+    
+    if args.headless:
+        sys.exit(run_headless(args))
+    
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setApplicationName("HwGDReqs")
     
-    # Show splash screen
+    # Show splash screen until the window is up
+    splash = None
     splash_path = os.path.join(os.path.dirname(__file__), 'icon.png')
-    if os.path.exists(splash_path):
+    if os.path.exists(splash_path) and not args.startup_probe:
         splash_pix = QPixmap(splash_path).scaled(256, 256, Qt.KeepAspectRatio, Qt.SmoothTransformation)
         splash = QSplashScreen(splash_pix)
         splash.show()
         app.processEvents()
-        time.sleep(1)
     
-    # Initialize config manager
-    config_manager = ConfigManager()
+    # Only the config is read here, the queue and history load after first paint
+    config_manager = ConfigManager(load_data=False)
+    config_manager.start_persistence()
+    PROFILER.enabled = bool(config_manager.config.get('profiling') or os.getenv('HWGDREQS_PROFILE'))
     
     # Create and show main window
     window = MainWindow(config_manager)
+    if args.startup_probe:
+        StartupProbe(window)
     window.show()
     
-    if os.path.exists(splash_path):
+    if splash is not None:
         splash.finish(window)
     
     sys.exit(app.exec())
@@ -0,0 +1,103 @@
+"""
+Streaming queue and history exports
+
+    python -m unittest discover tests
+"""
+
+import csv
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main
+
+
+LEVELS = [
+    {'id': 1, 'name': 'First', 'author': 'A', 'difficulty': 'Easy', 'length': 'Short'},
+    {'id': 2, 'name': '<b>Second</b>', 'author': 'B, C', 'difficulty': 'Hard', 'length': 'XL',
+     'played_at': 86400.0},
+]
+
+
+class ExportWriterTest(unittest.TestCase):
+    """Each writer yields its file in chunks, one per level plus framing"""
+    
+    def export(self, writer, records=LEVELS):
+        return ''.join(writer(iter(records), 'Queue'))
+    
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export(main.export_csv))))
+        self.assertEqual(rows[0], ['position', *main.EXPORT_COLUMNS])
+        self.assertEqual(rows[1], ['1', '1', 'First', 'A', 'Easy', 'Short', ''])
+        self.assertEqual(rows[2][3], 'B, C')
+        self.assertEqual(rows[2][6], main.format_timestamp(86400.0))
+    
+    def test_jsonl_keeps_full_entries(self):
+        records = main.LevelRecord.decode(LEVELS)
+        lines = self.export(main.export_jsonl, records).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], LEVELS)
+    
+    def test_html_escapes_values(self):
+        text = self.export(main.export_html)
+        self.assertIn('<td>&lt;b&gt;Second&lt;/b&gt;</td>', text)
+        self.assertEqual(text.count('<tr>'), 3)
+        self.assertTrue(text.rstrip().endswith('</html>'))
+    
+    def test_text(self):
+        text = self.export(main.export_text)
+        self.assertIn('1. First (ID: 1)', text)
+        self.assertIn('Played: ', text)
+        self.assertEqual(text.count('Played: '), 1)
+    
+    def test_writers_stream_lazily(self):
+        for name, (_, _, writer) in main.EXPORT_FORMATS.items():
+            consumed = []
+            
+            def records():
+                for level in LEVELS:
+                    consumed.append(level)
+                    yield level
+            
+            chunks = writer(records(), 'Queue')
+            next(chunks)
+            self.assertLessEqual(len(consumed), 1, name)
+
+
+class ExportThreadTest(unittest.TestCase):
+    """ExportThread.run writes through a .part file"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / 'queue.csv'
+    
+    def run_export(self, source):
+        thread = main.ExportThread(self.path, main.export_csv, 'Queue', source)
+        results = []
+        thread.exported.connect(lambda path, written: results.append(('exported', written)))
+        thread.failed.connect(lambda error: results.append(('failed', error)))
+        thread.run()
+        return results
+    
+    def test_writes_the_file(self):
+        self.assertEqual(self.run_export(lambda: (iter(LEVELS), len(LEVELS))), [('exported', 2)])
+        self.assertEqual(len(self.path.read_text().splitlines()), 3)
+        self.assertFalse(self.path.with_name('queue.csv.part').exists())
+    
+    def test_failure_leaves_no_file(self):
+        def records():
+            yield LEVELS[0]
+            raise OSError('source went away')
+        
+        self.assertEqual(self.run_export(lambda: (records(), 2)), [('failed', 'source went away')])
+        self.assertFalse(self.path.exists())
+        self.assertFalse(self.path.with_name('queue.csv.part').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Headless control API
+
+    python -m unittest discover tests
+"""
+
+import http.client
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main
+
+
+class ControlApiTest(unittest.TestCase):
+    """serve_control in front of a HeadlessService that isn't syncing"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.config_manager = main.ConfigManager(config_dir=self.tmp.name)
+        self.config_manager.config['app_id'] = 'test'
+        self.config_manager.update_queue(main.LevelRecord.decode([{'id': 1}, {'id': 2}]))
+        self.service = main.HeadlessService(self.config_manager, main.ApiClient('http://127.0.0.1:9'))
+        self.addCleanup(self.service.stop)
+    
+    def serve(self, service=None):
+        server = main.serve_control(service or self.service, port=0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server.server_address[:2]
+    
+    def request(self, address, method, path, body=None, headers=None):
+        conn = http.client.HTTPConnection(*address, timeout=5)
+        self.addCleanup(conn.close)
+        conn.request(method, path, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    
+    def test_pop_and_list(self):
+        address = self.serve()
+        status, data = self.request(address, 'POST', '/pop')
+        self.assertEqual((status, data['level']['id']), (200, 1))
+        status, data = self.request(address, 'GET', '/queue')
+        self.assertEqual([level['id'] for level in data['queue']], [2])
+    
+    def test_refuses_other_hosts_without_a_token(self):
+        self.assertTrue(main.is_loopback('127.0.0.1'))
+        self.assertTrue(main.is_loopback('::1'))
+        self.assertFalse(main.is_loopback('0.0.0.0'))
+        with self.assertRaises(ValueError):
+            main.serve_control(self.service, host='0.0.0.0', port=0)
+    
+    def test_token_is_required_when_set(self):
+        self.service.token = 'secret'
+        address = self.serve()
+        self.assertEqual(self.request(address, 'POST', '/pop')[0], 401)
+        status, _ = self.request(address, 'POST', '/pop', headers={'Authorization': 'Bearer secret'})
+        self.assertEqual(status, 200)
+    
+    def test_bad_content_length_is_a_400(self):
+        address = self.serve()
+        status, data = self.request(address, 'POST', '/pop', headers={'Content-Length': 'many'})
+        self.assertEqual(status, 400)
+        self.assertFalse(data['success'])
+        self.assertEqual(len(self.config_manager.queue), 2)
+    
+    def test_handler_errors_are_a_500(self):
+        def fail(channel):
+            raise RuntimeError('disk full')
+        self.service.pop_level = fail
+        address = self.serve()
+        status, data = self.request(address, 'POST', '/pop')
+        self.assertEqual((status, data['error']), (500, 'disk full'))
+        self.assertEqual(self.request(address, 'GET', '/status')[0], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
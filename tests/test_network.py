@@ -0,0 +1,273 @@
+"""
+Level details, fetch decoding and conditional requests against devserver.py
+
+    python -m unittest discover tests
+"""
+
+import functools
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import devserver
+import main
+
+
+class QuietFileHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class UnavailableHandler(BaseHTTPRequestHandler):
+    """Every request is a 503, so GETs go through their retries"""
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        self.send_response(503)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class DetailCacheTest(unittest.TestCase):
+    """DetailCache eviction order and expiry"""
+    
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = main.DetailCache(max_entries=2, ttl=10, clock=self.clock)
+    
+    def test_evicts_least_recently_used(self):
+        self.cache.put(1, {'id': 1})
+        self.cache.put(2, {'id': 2})
+        self.assertEqual(self.cache.get('1'), {'id': 1})  # 2 is now the oldest
+        self.cache.put(3, {'id': 3})
+        
+        self.assertIsNone(self.cache.get(2))
+        self.assertEqual(self.cache.missing([1, 2, 3]), [2])
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.evictions), (1, 1, 1))
+    
+    def test_entries_expire(self):
+        self.cache.put(1, {'id': 1})
+        self.clock.now = 10
+        self.assertIsNotNone(self.cache.get(1))
+        self.clock.now = 10.5
+        self.assertEqual(self.cache.missing([1]), [1])
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.expirations, 1)
+
+
+class DetailLoaderTest(unittest.TestCase):
+    """DetailLoader batching, LevelStore reuse and unsupported servers"""
+    
+    def setUp(self):
+        self.server = devserver.DevServer(push_enabled=False).start()
+        self.addCleanup(self.server.stop)
+        self.api = main.ApiClient(self.server.base_url)
+        self.addCleanup(self.api.close)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = main.LevelStore(Path(self.tmp.name) / 'levels.db')
+        self.addCleanup(self.store.close)
+        for level_id in range(5):
+            self.server.queue.add(devserver.make_level(level_id))
+    
+    def loader(self, store=None):
+        return main.DetailLoader(self.api, main.DetailCache(), lambda: {'id': 'test'}, lambda: store)
+    
+    def test_loads_in_batches_and_skips_cached_ids(self):
+        loader = self.loader()
+        loader.BATCH_SIZE = 2
+        requests = self.server.queue.requests
+        self.assertEqual(loader.load([0, 1, 2, 3, 4, 99]), 5)
+        self.assertEqual(self.server.queue.requests - requests, 3)
+        self.assertEqual(loader.cache.get(3)['description'], 'A level submitted by the dev server')
+        
+        self.assertEqual(loader.pending([0, 1, 99]), [99])
+        self.assertEqual(loader.load([0, 1]), 0)
+        self.assertEqual(self.server.queue.requests - requests, 3)
+    
+    def test_stored_details_skip_the_server(self):
+        self.loader(self.store).load([0, 1])
+        requests = self.server.queue.requests
+        
+        fresh = self.loader(self.store)
+        self.assertEqual(fresh.load([0, 1]), 2)
+        self.assertEqual(self.server.queue.requests, requests)
+        self.assertEqual(fresh.cache.get(1)['name'], 'Level 1')
+    
+    def test_unsupported_server_is_remembered(self):
+        # A plain file server, where api.php is a 404
+        server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                     functools.partial(QuietFileHandler, directory=self.tmp.name))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        api = main.ApiClient('http://%s:%d' % server.server_address[:2])
+        self.addCleanup(api.close)
+        
+        loader = main.DetailLoader(api, main.DetailCache(), lambda: {'id': 'test'})
+        self.assertEqual(loader.load([0]), 0)
+        self.assertFalse(loader.supported)
+        self.assertEqual(loader.pending([0]), [])
+
+
+class FetchDecoderTest(unittest.TestCase):
+    """FetchDecoder body skipping and record reuse"""
+    
+    LEVELS = [{'id': 1, 'name': 'A "quoted" name'}, {'id': 2, 'name': 'B'}, {'id': 3, 'name': 'C'}]
+    
+    @staticmethod
+    def body(levels, revision=1):
+        return json.dumps({'success': True, 'revision': revision, 'queue': levels}).encode('utf-8')
+    
+    def test_unchanged_body_is_recognised(self):
+        decoder = main.FetchDecoder()
+        body = self.body(self.LEVELS)
+        self.assertFalse(decoder.unchanged(body))
+        decoder.accept(body, 1)
+        self.assertTrue(decoder.unchanged(body))
+        self.assertFalse(decoder.unchanged(self.body(self.LEVELS, 2)))
+        self.assertEqual((decoder.skipped, decoder.revision), (1, 1))
+    
+    def test_known_entries_reuse_their_records(self):
+        decoder = main.FetchDecoder()
+        first = decoder.decode(self.body(self.LEVELS))
+        self.assertEqual(first['queue'], self.LEVELS)
+        self.assertEqual(first['revision'], 1)
+        
+        edited = [self.LEVELS[0], {'id': 2, 'name': 'Renamed'}, self.LEVELS[2], {'id': 4}]
+        second = decoder.decode(self.body(edited, 2))
+        self.assertEqual(second['queue'], edited)
+        self.assertIs(second['queue'][0], first['queue'][0])
+        self.assertIs(second['queue'][2], first['queue'][2])
+        self.assertIsNot(second['queue'][1], first['queue'][1])
+        self.assertEqual((decoder.decoded, decoder.reused), (5, 2))
+    
+    def test_unusual_bodies_fall_back_to_json_loads(self):
+        decoder = main.FetchDecoder()
+        nested = [{'id': 1, 'meta': {'tags': ['a']}}, {'id': 2}]
+        self.assertEqual(decoder.decode(self.body(nested))['queue'], nested)
+        
+        delta = {'success': True, 'since': 1, 'revision': 2, 'added': [{'id': 5}], 'removed': []}
+        self.assertEqual(decoder.decode(json.dumps(delta).encode('utf-8')), delta)
+        
+        trap = {'success': True, 'error': '"queue": [', 'queue': [{'id': 1}]}
+        self.assertEqual(decoder.decode(json.dumps(trap).encode('utf-8'))['queue'], [{'id': 1}])
+        self.assertEqual(decoder.decode(self.body([]))['queue'], [])
+
+
+class ConditionalRequestTest(unittest.TestCase):
+    """ConditionalState validators replayed against the devserver's 304s"""
+    
+    def setUp(self):
+        self.server = devserver.DevServer(push_enabled=False).start()
+        self.addCleanup(self.server.stop)
+        self.api = main.ApiClient(self.server.base_url)
+        self.addCleanup(self.api.close)
+        self.server.queue.add(devserver.make_level(1))
+        self.params = {'id': 'test', 'action': 'fetch', 'fields': main.QUEUE_FIELDS}
+    
+    def test_validators_only_replay_for_the_same_params(self):
+        state = main.ConditionalState()
+        self.assertEqual(state.headers(self.params), {})
+        response = self.api.get('fetch', params=self.params)
+        state.update(self.params, response)
+        self.assertGreater(state.size, 0)
+        
+        headers = state.headers(dict(self.params))
+        self.assertEqual(set(headers), {'If-None-Match', 'If-Modified-Since'})
+        self.assertEqual(self.api.get('fetch', params=self.params, headers=headers).status_code, 304)
+        self.assertEqual(state.headers({**self.params, 'since': 1}), {})
+        
+        self.server.queue.add(devserver.make_level(2))
+        self.assertEqual(self.api.get('fetch', params=self.params, headers=headers).status_code, 200)
+        state.clear()
+        self.assertEqual(state.headers(self.params), {})
+    
+    def test_sync_sends_conditional_fetches_until_a_local_edit(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config_manager = main.ConfigManager(config_dir=tmp.name)
+        config_manager.config['app_id'] = 'test'
+        self.addCleanup(config_manager.close)
+        sync = main.QueueSyncThread(config_manager, self.api)
+        
+        self.assertTrue(sync.sync_once())
+        self.assertFalse(sync.sync_once())  # first delta fetch, new params
+        self.assertFalse(sync.sync_once())
+        self.assertEqual(self.server.queue.not_modified, 1)
+        self.assertEqual(self.api.stats['fetch'].not_modified, 1)
+        
+        config_manager.add_history([{'id': 9}])  # a local edit, the server's answer may differ now
+        self.assertFalse(sync.sync_once())
+        self.assertEqual(self.server.queue.not_modified, 1)
+        self.assertFalse(sync.sync_once())
+        self.assertEqual(self.server.queue.not_modified, 2)
+
+
+class ApiClientCloseTest(unittest.TestCase):
+    """Closing the ApiClient cuts short retries and new requests"""
+    
+    def setUp(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), UnavailableHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.api = main.ApiClient('http://%s:%d' % server.server_address[:2])
+        self.addCleanup(self.api.close)
+    
+    def test_close_interrupts_retry_backoff(self):
+        finished = []
+        
+        def fetch():
+            try:
+                self.api.get('fetch', params={'action': 'fetch'})
+            except Exception:
+                pass
+            finished.append(time.monotonic())
+        
+        thread = threading.Thread(target=fetch)
+        thread.start()
+        time.sleep(0.3)  # into the 1 s backoff before the last retry
+        closed = time.monotonic()
+        self.api.close()
+        thread.join(5)
+        self.assertTrue(finished)
+        self.assertLess(finished[0] - closed, 0.5)
+        with self.assertRaises(RuntimeError):
+            self.api.get('fetch')
+    
+    def test_sync_thread_stops_promptly(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config_manager = main.ConfigManager(config_dir=tmp.name)
+        config_manager.config['app_id'] = 'test'
+        config_manager.config['push_updates'] = False
+        self.addCleanup(config_manager.close)
+        sync = main.QueueSyncThread(config_manager, self.api)
+        sync.start()
+        time.sleep(0.3)
+        
+        sync.stop()
+        self.api.close()
+        self.assertTrue(sync.wait(1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Random level selection
+
+    python -m unittest discover tests
+"""
+
+import random
+import sys
+import unittest
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main
+
+
+NOW = 1_000_000.0
+PICKS = 8000
+
+
+class LevelPickerTest(unittest.TestCase):
+    """LevelPicker strategies, eligibility and row tracking, on a seeded RNG"""
+    
+    def picker(self, levels, eligible=None):
+        picker = main.LevelPicker(eligible, clock=lambda: NOW, rng=random.Random(42))
+        picker.sync(main.level_keys(levels), levels)
+        return picker
+    
+    def picked_ids(self, picker, levels, strategy):
+        return Counter(levels[picker.pick(strategy)]['id'] for _ in range(PICKS))
+    
+    def assertShare(self, count, share):
+        self.assertAlmostEqual(count / PICKS, share, delta=0.03)
+    
+    def test_uniform(self):
+        levels = [{'id': level_id} for level_id in range(4)]
+        counts = self.picked_ids(self.picker(levels), levels, 'uniform')
+        for level_id in range(4):
+            self.assertShare(counts[level_id], 0.25)
+    
+    def test_wait_weights_by_time_waited(self):
+        levels = [{'id': 1, 'submitted_at': NOW - 30}, {'id': 2, 'submitted_at': NOW - 10}]
+        counts = self.picked_ids(self.picker(levels), levels, 'wait')
+        self.assertShare(counts[1], 0.75)
+    
+    def test_fair_picks_a_submitter_first(self):
+        levels = [{'id': level_id, 'submitter': 'busy'} for level_id in range(3)]
+        levels.append({'id': 3, 'submitter': 'quiet'})
+        counts = self.picked_ids(self.picker(levels), levels, 'fair')
+        self.assertShare(counts[3], 0.5)
+        self.assertShare(counts[0], 1 / 6)
+    
+    def test_ineligible_rows_are_never_picked(self):
+        played = {1}
+        levels = [{'id': level_id} for level_id in range(3)]
+        picker = self.picker(levels, lambda level: level['id'] not in played)
+        self.assertEqual(len(picker), 2)
+        for strategy in main.LevelPicker.STRATEGIES:
+            self.assertNotIn(1, self.picked_ids(picker, levels, strategy))
+        
+        played.update({0, 2})
+        picker.sync(main.level_keys(levels), levels, recheck=True)
+        self.assertEqual(picker.pick(), -1)
+    
+    def test_follows_queue_changes(self):
+        levels = [{'id': level_id} for level_id in range(40)]
+        picker = self.picker(levels)
+        levels = list(reversed(levels[10:])) + [{'id': 99}]
+        picker.sync(main.level_keys(levels), levels)
+        
+        self.assertEqual(len(picker), 31)
+        counts = self.picked_ids(picker, levels, 'uniform')
+        self.assertEqual(set(counts) - set(range(10, 40)), {99})
+        self.assertEqual(main.LevelPicker().pick(), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Compact level records
+
+    python -m unittest discover tests
+"""
+
+import copy
+import json
+import pickle
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main
+
+
+WIRE = {'id': 12, 'name': 'Level', 'difficulty': 'Hard', 'length': 'Long', 'stars': 0,
+        'flag_reason': None, 'custom': [1, 2]}
+
+
+class LevelRecordTest(unittest.TestCase):
+    """LevelRecord reads like the dict it was decoded from"""
+    
+    def setUp(self):
+        self.record = main.LevelRecord(WIRE)
+    
+    def test_round_trips_to_the_wire_dict(self):
+        self.assertEqual(self.record.to_dict(), WIRE)
+        self.assertEqual(json.loads(json.dumps(self.record, default=main.json_default)), WIRE)
+        self.assertEqual(pickle.loads(pickle.dumps(self.record)), self.record)
+        self.assertEqual(copy.deepcopy(self.record), WIRE)
+        self.assertEqual({**self.record}, WIRE)
+    
+    def test_dict_read_api(self):
+        record = self.record
+        self.assertEqual(record['name'], 'Level')
+        self.assertEqual(record.get('stars'), 0)
+        self.assertEqual(record.get('custom'), [1, 2])
+        self.assertIsNone(record.get('author'))
+        self.assertEqual(record.get('author', 'nobody'), 'nobody')
+        self.assertIn('flag_reason', record)
+        self.assertNotIn('author', record)
+        self.assertEqual(len(record), len(WIRE))
+        with self.assertRaises(KeyError):
+            record['author']
+        self.assertEqual(record.difficulty, 'Hard')
+        self.assertIsNone(record.author)
+    
+    def test_read_only_and_slotted(self):
+        with self.assertRaises(AttributeError):
+            self.record.name = 'Other'
+        self.assertFalse(hasattr(self.record, '__dict__'))
+        with self.assertRaises(TypeError):
+            hash(self.record)
+    
+    def test_interns_shared_values(self):
+        other = main.LevelRecord(json.loads(json.dumps(WIRE)))
+        self.assertIs(other.difficulty, self.record.difficulty)
+        self.assertIs(other.length, self.record.length)
+    
+    def test_decode_passes_records_through(self):
+        records = main.LevelRecord.decode([self.record, WIRE])
+        self.assertIs(records[0], self.record)
+        self.assertEqual(records[1], self.record)
+        self.assertNotEqual(records[1], {**WIRE, 'stars': 1})
+        self.assertIsNone(main.LevelRecord({'id': 1}).extra)
+
+
+if __name__ == '__main__':
+    unittest.main()
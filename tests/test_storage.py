@@ -0,0 +1,476 @@
+"""
+Journaled storage, the history database, write-behind flushing and the outbox
+
+    python -m unittest discover tests
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import devserver
+import main
+
+
+class JournalStoreTest(unittest.TestCase):
+    """JournalStore snapshots and journals of queue operations"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+    
+    def store(self, compact_every=500):
+        return main.JournalStore(self.dir / 'queue.json', self.dir / 'queue.journal.jsonl',
+                                 main.ConfigManager.apply_queue_op, compact_every=compact_every)
+    
+    @staticmethod
+    def add(*level_ids):
+        return {'op': 'delta', 'added': [{'id': level_id} for level_id in level_ids]}
+    
+    @staticmethod
+    def ids(queue):
+        return [level['id'] for level in queue]
+    
+    def test_replays_journal_on_top_of_snapshot(self):
+        store = self.store()
+        store.load([])
+        store.compact([{'id': 1}])
+        store.append([self.add(2), {'op': 'remove', 'index': 0, 'id': 1}], None)
+        
+        reloaded = self.store()
+        self.assertEqual(self.ids(reloaded.load([])), [2])
+        self.assertEqual(reloaded.pending_ops, 2)
+    
+    def test_journal_of_an_older_snapshot_is_skipped(self):
+        store = self.store()
+        store.load([])
+        store.append([self.add(1)], None)
+        # Snapshot replaced but the journal never got truncated
+        (self.dir / 'queue.json').write_text(json.dumps([{'id': 1}, {'id': 2}]))
+        
+        reloaded = self.store()
+        self.assertEqual(self.ids(reloaded.load([])), [1, 2])
+        self.assertEqual(reloaded.pending_ops, 0)
+    
+    def test_torn_tail_is_cut_before_the_next_append(self):
+        store = self.store()
+        store.load([])
+        store.append([self.add(1)], None)
+        with open(self.dir / 'queue.journal.jsonl', 'a', encoding='utf-8') as f:
+            f.write('{"op":"delta","added":[{"id"')  # crash mid-write
+        
+        store = self.store()
+        self.assertEqual(self.ids(store.load([])), [1])
+        store.append([self.add(2), {'op': 'remove', 'index': 0, 'id': 1}], None)
+        
+        self.assertEqual(self.ids(self.store().load([])), [2])
+    
+    def test_unterminated_tail_is_cut(self):
+        store = self.store()
+        store.load([])
+        store.append([self.add(1)], None)
+        with open(self.dir / 'queue.journal.jsonl', 'a', encoding='utf-8') as f:
+            f.write('{"op":"clear"}')  # cut off right before the newline
+        
+        store = self.store()
+        self.assertEqual(self.ids(store.load([])), [1])
+        store.append([self.add(2)], None)
+        
+        self.assertEqual(self.ids(self.store().load([])), [1, 2])
+    
+    def test_compacts_once_the_threshold_is_passed(self):
+        store = self.store(compact_every=3)
+        queue = store.load([])
+        for level_id in range(3):
+            queue = queue + [{'id': level_id}]
+            store.append([self.add(level_id)], queue)
+        self.assertEqual(store.pending_ops, 3)
+        self.assertFalse((self.dir / 'queue.json').exists())
+        
+        queue = queue + [{'id': 3}]
+        self.assertTrue(store.due(1))
+        store.append([self.add(3)], queue)
+        self.assertEqual(store.pending_ops, 0)
+        self.assertFalse((self.dir / 'queue.journal.jsonl').exists())
+        self.assertEqual(self.ids(self.store().load([])), [0, 1, 2, 3])
+
+
+class HistoryImportTest(unittest.TestCase):
+    """HistoryStore.import_legacy from history.json and its journal"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.history_file = self.dir / 'history.json'
+        self.journal_file = self.dir / 'history.journal.jsonl'
+        self.history = main.HistoryStore(self.dir / 'history.db')
+        self.addCleanup(self.history.close)
+    
+    def test_imports_snapshot_and_journal_once(self):
+        raw = json.dumps([{'id': 1, 'name': 'First'}]).encode('utf-8')
+        self.history_file.write_bytes(raw)
+        with open(self.journal_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'base': main.JournalStore.digest(raw)}) + '\n')
+            f.write(json.dumps({'op': 'append', 'levels': [{'id': 2}, {'id': 3}]}) + '\n')
+        
+        self.assertEqual(self.history.import_legacy(self.history_file, self.journal_file), 3)
+        self.assertEqual(len(self.history), 3)
+        self.assertTrue(self.history.has_played(2))
+        self.assertEqual([level['id'] for level in self.history.page(newest_first=False)], [1, 2, 3])
+        self.assertFalse(self.history_file.exists())
+        self.assertTrue((self.dir / 'history.json.imported').exists())
+        self.assertTrue((self.dir / 'history.journal.jsonl.imported').exists())
+        
+        self.assertEqual(self.history.import_legacy(self.history_file, self.journal_file), 0)
+        self.assertEqual(len(self.history), 3)
+    
+    def test_files_left_after_a_committed_import_are_not_imported_again(self):
+        self.history_file.write_text(json.dumps([{'id': 1}, {'id': 2}]))
+        self.assertEqual(self.history.import_legacy(self.history_file, self.journal_file), 2)
+        # As if the process died between the commit and the rename
+        os.replace(self.dir / 'history.json.imported', self.history_file)
+        
+        self.assertEqual(self.history.import_legacy(self.history_file, self.journal_file), 0)
+        self.assertEqual(len(self.history), 2)
+        self.assertFalse(self.history_file.exists())
+        self.assertTrue((self.dir / 'history.json.imported').exists())
+    
+    def test_failed_marker_rolls_back_the_import(self):
+        self.history_file.write_text(json.dumps([{'id': 1}, {'id': 2}]))
+        self.history.conn.execute('DROP TABLE meta')
+        self.assertEqual(len(self.history), 0)
+        
+        with self.assertRaises(sqlite3.OperationalError):
+            self.history.import_legacy(self.history_file, self.journal_file)
+        self.assertEqual(len(self.history), 0)
+        self.assertTrue(self.history_file.exists())
+    
+    def test_nothing_to_import(self):
+        self.assertEqual(self.history.import_legacy(self.history_file, self.journal_file), 0)
+        self.assertEqual(len(self.history), 0)
+    
+    def test_unreadable_history_imports_nothing(self):
+        self.history_file.write_text('{"not": "a list"}')
+        
+        self.assertEqual(self.history.import_legacy(self.history_file, self.journal_file), 0)
+        self.assertEqual(len(self.history), 0)
+        self.assertTrue((self.dir / 'history.json.imported').exists())
+
+
+class PersistenceWorkerTest(unittest.TestCase):
+    """Write-behind flushing of a ConfigManager, including failed writes"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.config_manager = main.ConfigManager(config_dir=self.dir)
+        self.addCleanup(self.config_manager.close)
+    
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail('timed out')
+            time.sleep(0.01)
+    
+    def test_coalesces_changes_into_one_flush(self):
+        self.config_manager.start_persistence(debounce=0.05, max_delay=1.0)
+        worker = self.config_manager.persistence
+        for level_id in range(5):
+            self.config_manager.add_history([{'id': level_id}])
+        
+        self.wait_for(lambda: worker.flushes)
+        self.assertEqual(worker.flushes, 1)
+        self.assertEqual(len(self.config_manager.history), 5)
+    
+    def test_failed_flush_is_restored_and_retried(self):
+        self.config_manager.start_persistence(debounce=0.01, max_delay=0.05)
+        worker = self.config_manager.persistence
+        # A directory in the way makes the snapshot writes fail
+        self.config_manager.config_file.mkdir()
+        self.config_manager.queue_file.mkdir()
+        
+        self.config_manager.config['streamer_name'] = 'Streamer'
+        self.config_manager.save_config()
+        self.config_manager.update_queue(main.LevelRecord.decode([{'id': 1}, {'id': 2}]))
+        self.config_manager.add_history([{'id': 0}])
+        
+        self.wait_for(lambda: worker.errors >= 2)
+        self.assertTrue(worker.is_alive())
+        with self.config_manager.lock:
+            self.assertIsNotNone(self.config_manager.pending_config)
+        
+        self.config_manager.config_file.rmdir()
+        self.config_manager.queue_file.rmdir()
+        self.wait_for(lambda: worker.errors == 0 and self.config_manager.queue_file.exists())
+        
+        self.assertEqual(json.loads(self.config_manager.config_file.read_text())['streamer_name'],
+                         'Streamer')
+        self.assertEqual([level['id'] for level in self.config_manager.load_queue()], [1, 2])
+        self.assertEqual(len(self.config_manager.history), 1)
+
+
+class HtmlOpsHandler(BaseHTTPRequestHandler):
+    """A host that answers action=ops with an HTML page, and the rest like api.php"""
+    
+    posted = []
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_POST(self):
+        params = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        action = params.get('action', [''])[0]
+        self.posted.append(action)
+        if action == 'ops':
+            body, content_type = b'<html>Welcome</html>', 'text/html'
+        else:
+            body, content_type = json.dumps({'success': action == 'delete'}).encode('utf-8'), 'application/json'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class OutboxTest(unittest.TestCase):
+    """Outbox durability, tombstones and at-most-once delivery"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+    
+    def outbox(self):
+        return main.Outbox(self.dir / 'outbox.json', self.dir / 'outbox.journal.jsonl')
+    
+    def test_pending_entries_survive_a_restart(self):
+        outbox = self.outbox()
+        delete = outbox.add('delete', 'test', ids=[5], level_id=5)
+        report = outbox.add('report', 'test', level_id=6, reason='spam')
+        outbox.add('update_config', 'test', config='{}')
+        outbox.add('update_config', 'test', config='{"a":1}')
+        outbox.flush()
+        
+        reloaded = self.outbox()
+        self.assertEqual([entry['key'] for entry in reloaded.batch()[:2]], [delete['key'], report['key']])
+        self.assertEqual(len(reloaded), 3)
+        self.assertEqual(reloaded.batch()[-1]['data'], {'config': '{"a":1}'})
+        self.assertIn('5', reloaded.state['tombstones'])
+        
+        reloaded.done([delete['key']], [report['key']])
+        reloaded.flush()
+        reloaded = self.outbox()
+        self.assertEqual([entry['kind'] for entry in reloaded.batch()], ['update_config'])
+        self.assertNotIn('5', reloaded.state['tombstones'])
+    
+    def test_resolve_hides_deleted_levels_until_resubmitted(self):
+        outbox = self.outbox()
+        deleted_at = outbox.add('delete', 'test', ids=[5], level_id=5)['created_at']
+        data = {
+            'queue': [{'id': 5, 'submitted_at': deleted_at - 10}, {'id': 6}],
+            'added': [{'id': 5}]
+        }
+        
+        resolved = outbox.resolve(data)
+        self.assertEqual([level['id'] for level in resolved['queue']], [6])
+        self.assertEqual(resolved['added'], [])
+        self.assertEqual(len(data['queue']), 2)
+        
+        resubmitted = outbox.resolve({'queue': [{'id': 5, 'submitted_at': deleted_at + 10}]})
+        self.assertEqual([level['id'] for level in resubmitted['queue']], [5])
+        self.assertNotIn('5', outbox.state['tombstones'])
+        self.assertEqual(len(outbox.resolve(data)['queue']), 2)
+    
+    def test_resent_entry_is_applied_once(self):
+        server = devserver.DevServer(push_enabled=False).start()
+        self.addCleanup(server.stop)
+        api = main.ApiClient(server.base_url)
+        self.addCleanup(api.close)
+        config_manager = main.ConfigManager(config_dir=self.dir)
+        config_manager.config['app_id'] = 'test'
+        self.addCleanup(config_manager.close)
+        sync = main.QueueSyncThread(config_manager, api)
+        
+        config_manager.record_outbound('report', level_id=7, reason='spam')
+        # The server applies the batch but its reply never arrives
+        sync.post_ops(config_manager.outbox.batch())
+        
+        self.assertTrue(sync.send_outbox(sync.primary))
+        self.assertEqual(len(config_manager.outbox), 0)
+        self.assertEqual(server.queue.reports, [(7, 'spam')])
+        self.assertEqual(server.queue.duplicate_ops, 1)
+
+    
+    def test_rejected_delete_drops_its_tombstone(self):
+        outbox = self.outbox()
+        delete = outbox.add('delete', 'test', ids=[5], level_id=5)
+        outbox.done([], [delete['key']])
+        self.assertEqual(outbox.state['tombstones'], {})
+        self.assertEqual(len(outbox.resolve({'queue': [{'id': 5}]})['queue']), 1)
+    
+    def test_non_json_ops_reply_falls_back_to_single_posts(self):
+        HtmlOpsHandler.posted = []
+        server = ThreadingHTTPServer(('127.0.0.1', 0), HtmlOpsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        api = main.ApiClient('http://%s:%d' % server.server_address[:2])
+        self.addCleanup(api.close)
+        config_manager = main.ConfigManager(config_dir=self.dir)
+        config_manager.config['app_id'] = 'test'
+        self.addCleanup(config_manager.close)
+        sync = main.QueueSyncThread(config_manager, api)
+        
+        config_manager.record_outbound('delete', ids=[5], level_id=5)
+        config_manager.record_outbound('clear', ids=[6])
+        self.assertTrue(sync.send_outbox(sync.primary))
+        self.assertFalse(sync.batch_ops)
+        self.assertEqual(HtmlOpsHandler.posted, ['ops', 'delete', 'clear'])
+        self.assertEqual(len(config_manager.outbox), 0)
+        self.assertEqual((config_manager.outbox.applied, config_manager.outbox.rejected), (1, 1))
+        self.assertEqual(config_manager.outbox.state['tombstones'], {})
+
+
+class LevelIndexTest(unittest.TestCase):
+    """LevelIndex queue positions and played-before lookups"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.history = main.HistoryStore(Path(self.tmp.name) / 'history.db')
+        self.addCleanup(self.history.close)
+        self.index = main.LevelIndex(self.history)
+    
+    def test_positions_follow_appends_and_removals(self):
+        queue = [{'id': 1}, {'id': 2}, {'id': 1}]
+        self.index.rebuild(queue)
+        self.assertEqual(self.index.rows(1), [0, 2])
+        self.assertEqual(self.index.rows('1'), [0, 2])
+        self.assertTrue(self.index.is_duplicate(1))
+        self.assertEqual(self.index.position(3), -1)
+        
+        added = [{'id': 3}]
+        queue = queue + added
+        self.index.update(queue, {'added': added, 'removed': [], 'changed': []})
+        self.assertFalse(self.index.stale)
+        self.assertEqual(self.index.position(3), 3)
+        
+        queue = [level for level in queue if level['id'] != 2]
+        self.index.update(queue, {'added': [], 'removed': [2], 'changed': []})
+        self.assertTrue(self.index.stale)
+        self.assertEqual(self.index.rows(1), [0, 1])
+        self.assertEqual(self.index.position(3), 2)
+        
+        del queue[0]
+        self.index.invalidate(queue)
+        self.assertFalse(self.index.is_duplicate(1))
+    
+    def test_played_before_caches_history_lookups(self):
+        self.history.extend([{'id': 5}])
+        self.assertTrue(self.index.played_before(5))
+        self.assertFalse(self.index.played_before(6))
+        self.assertEqual(self.index.played, {'5': True, '6': False})
+        
+        self.index.mark_played([{'id': 6}])
+        self.assertTrue(self.index.played_before('6'))
+    
+    def test_no_history_yet(self):
+        self.assertFalse(main.LevelIndex(None).played_before(5))
+
+
+class LevelStoreTest(unittest.TestCase):
+    """LevelStore merges, batched lookups and enrichment"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = main.LevelStore(Path(self.tmp.name) / 'levels.db')
+        self.addCleanup(self.store.close)
+    
+    def test_writes_merge_field_by_field(self):
+        self.store.put_many([{'id': 1, 'name': 'Row', 'stars': 2, 'submitter': 'viewer'}])
+        self.store.put_many([{'id': 1, 'description': 'Full', 'stars': 3, 'name': None}], complete=True)
+        self.store.put_many([{'id': 1, 'likes': 10}])
+        
+        self.assertEqual(self.store.get(1), {'id': 1, 'name': 'Row', 'stars': 3,
+                                             'description': 'Full', 'likes': 10})
+        self.assertIsNotNone(self.store.get('1', complete=True))
+        self.assertEqual(self.store.put_many([{'name': 'no id'}]), 0)
+    
+    def test_complete_only_lookups(self):
+        self.store.put_many([{'id': 1}, {'id': 2}])
+        self.store.put_many([{'id': 2, 'description': 'Full'}], complete=True)
+        self.assertEqual(set(self.store.get_many([1, 2, 3])), {'1', '2'})
+        self.assertEqual(set(self.store.get_many([1, 2, 3], complete=True)), {'2'})
+    
+    def test_batched_lookups_and_enrich(self):
+        self.store.BATCH_SIZE = 3
+        self.store.put_many([{'id': level_id, 'name': f'Stored {level_id}', 'likes': level_id}
+                             for level_id in range(10)])
+        self.assertEqual(len(self.store.get_many(range(20))), 10)
+        self.assertEqual((self.store.hits, self.store.misses), (10, 10))
+        
+        levels = [{'id': 4, 'name': 'Live'}, {'id': 42}]
+        enriched = list(self.store.enrich(iter(levels), batch_size=1))
+        self.assertEqual(enriched[0], {'id': 4, 'name': 'Live', 'likes': 4})
+        self.assertIs(enriched[1], levels[1])
+    
+    def test_backfill_from_history(self):
+        history = main.HistoryStore(Path(self.tmp.name) / 'history.db')
+        self.addCleanup(history.close)
+        history.extend([{'id': 1, 'name': 'Played', 'played_at': 5.0}, {'id': 2}])
+        
+        self.assertEqual(self.store.backfill(history), 2)
+        self.assertEqual(self.store.get(1), {'id': 1, 'name': 'Played'})
+        self.assertEqual(self.store.backfill(history), 0)
+
+
+class ChannelDirTest(unittest.TestCase):
+    """Extra channels each get a directory of their own"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        self.config_manager = main.ConfigManager(config_dir=self.dir)
+        self.addCleanup(self.config_manager.close)
+    
+    def open(self, app_id):
+        channel = self.config_manager.open_channel(app_id)
+        self.addCleanup(channel.close)
+        return channel
+    
+    def test_similar_ids_do_not_share_storage(self):
+        channels = [self.open(app_id) for app_id in ('a/b', 'a.b', 'a_b', 'A_b')]
+        self.assertEqual(len({channel.config_dir for channel in channels}), 4)
+        self.assertTrue(all(channel.config_dir.parent == self.dir / 'channels' for channel in channels))
+        self.assertEqual(self.open('a.b').config_dir, channels[1].config_dir)
+    
+    def test_legacy_directory_is_moved(self):
+        legacy = self.dir / 'channels' / 'a_b'
+        legacy.mkdir(parents=True)
+        (legacy / 'config.json').write_text(json.dumps({'app_id': 'a.b'}))
+        (legacy / 'queue.json').write_text(json.dumps([{'id': 3}]))
+        
+        self.assertEqual([level['id'] for level in self.open('a_b').queue], [])
+        channel = self.open('a.b')
+        self.assertEqual([level['id'] for level in channel.queue], [3])
+        self.assertFalse(legacy.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
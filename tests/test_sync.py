@@ -0,0 +1,213 @@
+"""
+Queue sync against the devserver.py stand-in
+
+    python -m unittest discover tests
+"""
+
+import queue
+import sqlite3
+import sys
+import tempfile
+import time
+import types
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import devserver
+import main
+
+
+class DeltaSyncTest(unittest.TestCase):
+    """QueueSyncThread fetches applied to a ConfigManager, without a GUI"""
+    
+    def setUp(self):
+        self.server = devserver.DevServer(push_enabled=False).start()
+        self.addCleanup(self.server.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        
+        self.config_manager = main.ConfigManager(config_dir=self.tmp.name)
+        self.config_manager.config['app_id'] = 'test'
+        self.addCleanup(self.config_manager.close)
+        self.api = main.ApiClient(self.server.base_url)
+        self.addCleanup(self.api.close)
+        self.sync = main.QueueSyncThread(self.config_manager, self.api)
+        
+        for level_id in range(3):
+            self.server.queue.add(devserver.make_level(level_id))
+    
+    def queue_ids(self):
+        return [level.get('id') for level in self.config_manager.queue]
+    
+    def test_first_fetch_is_a_snapshot(self):
+        self.assertTrue(self.sync.sync_once())
+        self.assertEqual(self.queue_ids(), [0, 1, 2])
+        self.assertIsNone(self.sync.change_log.last_delta)
+        self.assertEqual(self.sync.change_log.revision, self.server.queue.revision)
+    
+    def test_deltas_add_remove_and_change(self):
+        self.sync.sync_once()
+        self.server.queue.add(devserver.make_level(3))
+        self.server.queue.remove_submitted(['1'], time.time())
+        self.server.queue.change({**devserver.make_level(2), 'name': 'Renamed'})
+        
+        self.assertTrue(self.sync.sync_once())
+        self.assertIsNotNone(self.sync.change_log.last_delta)
+        self.assertEqual(self.queue_ids(), [0, 2, 3])
+        self.assertEqual(self.config_manager.queue[1].get('name'), 'Renamed')
+        self.assertFalse(self.sync.sync_once())
+    
+    def test_delta_size_does_not_grow_with_the_queue(self):
+        sent = []
+        for size in (10, 500):
+            while len(self.server.queue.levels) < size:
+                self.server.queue.add(devserver.make_level(len(self.server.queue.levels)))
+            self.sync.sync_once()
+            self.server.queue.add(devserver.make_level(size))
+            before = self.server.queue.bytes_sent
+            self.assertTrue(self.sync.sync_once())
+            sent.append(self.server.queue.bytes_sent - before)
+            self.assertEqual(len(self.config_manager.queue), size + 1)
+        self.assertLess(sent[1], sent[0] * 2)
+    
+    def test_revision_older_than_the_server_history_gets_a_snapshot(self):
+        self.server.queue.max_history = 2
+        self.sync.sync_once()
+        for level_id in range(3, 6):
+            self.server.queue.add(devserver.make_level(level_id))
+        
+        self.assertTrue(self.sync.sync_once())
+        self.assertIsNone(self.sync.change_log.last_delta)
+        self.assertEqual(self.queue_ids(), [0, 1, 2, 3, 4, 5])
+    
+    def test_delta_from_an_unknown_revision_resets_the_log(self):
+        self.sync.sync_once()
+        change_log = self.sync.change_log
+        stale = {'since': change_log.revision - 1, 'revision': change_log.revision + 1,
+                 'added': [devserver.make_level(9)]}
+        
+        self.assertIsNone(change_log.apply(self.config_manager.queue, stale))
+        self.assertEqual(change_log.fetch_params(), {})
+        self.sync.sync_once()
+        self.assertEqual(change_log.revision, self.server.queue.revision)
+        self.assertEqual(self.queue_ids(), [0, 1, 2])
+    
+    def test_manual_refresh_then_delta_has_no_duplicates(self):
+        self.sync.sync_once()
+        self.server.queue.add(devserver.make_level(3))
+        
+        # What MainWindow.on_queue_refreshed does with a manual full fetch
+        response = self.api.get('fetch', params={'id': 'test', 'action': 'fetch',
+                                                 'fields': main.QUEUE_FIELDS})
+        self.config_manager.update_queue(main.LevelRecord.decode(response.json()['queue']))
+        self.sync.resync(self.config_manager)
+        
+        self.sync.sync_once()
+        self.assertEqual(self.queue_ids(), [0, 1, 2, 3])
+        self.server.queue.add(devserver.make_level(4))
+        self.sync.sync_once()
+        self.assertEqual(self.queue_ids(), [0, 1, 2, 3, 4])
+    
+    def test_popped_level_stays_gone_until_the_delete_is_sent(self):
+        self.sync.sync_once()
+        service = main.HeadlessService(self.config_manager, self.api)
+        self.assertEqual(service.pop_level(self.config_manager).get('id'), 0)
+        self.server.queue.add(devserver.make_level(3))
+        
+        # The server still lists level 0, the outbox hasn't been sent yet
+        self.sync.sync_once()
+        self.assertEqual(self.queue_ids(), [1, 2, 3])
+        self.assertEqual(service.pop_level(self.config_manager).get('id'), 1)
+    
+    def test_removed_channel_is_closed_after_the_tick(self):
+        extra = self.config_manager.open_channel('extra')
+        self.sync.add_channel(extra)
+        self.sync.start()
+        self.addCleanup(self.sync.wait)
+        self.addCleanup(self.sync.stop)
+        
+        self.sync.remove_channel('extra', close=True)
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                extra.history.conn.execute('SELECT 1')
+            except sqlite3.ProgrammingError:
+                break  # closed
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual([channel.app_id for channel in self.sync.channels], ['test'])
+    
+    def push_deltas(self, *level_ids):
+        """Server-side deltas for adding each level, as the event stream sends them"""
+        deltas = []
+        for level_id in level_ids:
+            since = self.server.queue.revision
+            self.server.queue.add(devserver.make_level(level_id))
+            deltas.append(self.server.queue.fetch(since, main.QUEUE_FIELDS))
+        return deltas
+    
+    def test_out_of_order_push_events_are_reordered(self):
+        self.sync.sync_once()
+        self.sync.primary.push = types.SimpleNamespace(events=queue.Queue())
+        first, second = self.push_deltas(3, 4)
+        
+        self.sync.primary.push.events.put(second)
+        self.sync.apply_push_events()
+        self.assertEqual(self.queue_ids(), [0, 1, 2])
+        self.sync.primary.push.events.put(first)
+        self.sync.apply_push_events()
+        
+        self.assertEqual(self.queue_ids(), [0, 1, 2, 3, 4])
+        self.assertEqual(self.sync.change_log.revision, self.server.queue.revision)
+        self.assertEqual(self.sync.primary.push_pending, {})
+    
+    def test_push_gap_is_filled_by_a_delta_fetch(self):
+        self.sync.sync_once()
+        self.sync.primary.push = types.SimpleNamespace(events=queue.Queue())
+        _, second, third = self.push_deltas(3, 4, 5)
+        
+        self.sync.primary.next_fetch = float('inf')
+        self.sync.primary.push.events.put(second)
+        self.sync.apply_push_events()
+        self.assertEqual(self.sync.primary.next_fetch, 0.0)
+        self.assertIsNotNone(self.sync.change_log.revision)
+        
+        self.assertTrue(self.sync.sync_once())
+        self.assertIsNotNone(self.sync.change_log.last_delta)
+        self.sync.primary.push.events.put(third)
+        self.sync.apply_push_events()
+        self.assertEqual(self.queue_ids(), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(self.sync.primary.push_pending, {})
+    
+    def test_push_delta_without_since_is_not_buffered(self):
+        self.sync.sync_once()
+        self.sync.primary.push = types.SimpleNamespace(events=queue.Queue())
+        delta, = self.push_deltas(3)
+        del delta['since']
+        
+        self.sync.primary.next_fetch = float('inf')
+        self.sync.primary.push.events.put(delta)
+        self.sync.apply_push_events()
+        self.assertEqual(self.sync.primary.push_pending, {})
+        self.assertEqual(self.sync.primary.next_fetch, 0.0)
+        
+        self.sync.sync_once()
+        self.assertEqual(self.queue_ids(), [0, 1, 2, 3])
+    
+    def test_push_deltas_before_the_first_fetch_are_dropped(self):
+        self.sync.primary.push = types.SimpleNamespace(events=queue.Queue())
+        for delta in self.push_deltas(3, 4):
+            self.sync.primary.push.events.put(delta)
+        self.sync.primary.next_fetch = float('inf')
+        self.sync.apply_push_events()
+        self.assertEqual(self.sync.primary.push_pending, {})
+        self.assertEqual(self.sync.primary.next_fetch, 0.0)
+        
+        self.sync.sync_once()
+        self.assertEqual(self.queue_ids(), [0, 1, 2, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+"""
+Queue model and the window logic around it, on Qt's offscreen platform
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtWidgets import QApplication, QListView
+
+import main
+
+app = QApplication.instance() or QApplication([])
+
+
+class QueuePositionTest(unittest.TestCase):
+    """MainWindow.queue_position maps a model row back into the live queue"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.channel = main.ConfigManager(config_dir=self.tmp.name)
+        self.addCleanup(self.channel.close)
+        self.model = main.QueueModel()
+        self.window = types.SimpleNamespace(queue_model=self.model)
+    
+    def position(self, row):
+        with self.channel.lock:
+            return main.MainWindow.queue_position(self.window, self.channel, row,
+                                                  self.model.level_at(row))
+    
+    def test_duplicate_ids_resolve_to_the_selected_entry(self):
+        queue = main.LevelRecord.decode([{'id': 1}, {'id': 7, 'name': 'a'}, {'id': 7, 'name': 'b'}])
+        self.channel.update_queue(queue)
+        self.model.set_levels(queue)
+        self.assertEqual(self.position(2), 2)
+        self.assertEqual(self.position(1), 1)
+    
+    def test_replaced_queue_is_matched_by_row_key(self):
+        queue = main.LevelRecord.decode([{'id': 7, 'name': 'a'}, {'id': 1}, {'id': 7, 'name': 'b'}])
+        self.model.set_levels(queue)
+        # The sync thread dropped level 1 and re-decoded the rest before the repaint
+        self.channel.update_queue(main.LevelRecord.decode([{'id': 7, 'name': 'a'}, {'id': 7, 'name': 'b'}]))
+        self.assertEqual(self.position(2), 1)
+        self.assertEqual(self.position(1), -1)
+
+
+class QueueModelTest(unittest.TestCase):
+    """QueueModel.set_levels turns queue changes into minimal row operations"""
+    
+    def setUp(self):
+        self.model = main.QueueModel()
+        self.events = []
+        self.model.rowsInserted.connect(lambda parent, first, last: self.events.append(('insert', first, last)))
+        self.model.rowsRemoved.connect(lambda parent, first, last: self.events.append(('remove', first, last)))
+        self.model.rowsMoved.connect(
+            lambda parent, start, end, dest, row: self.events.append(('move', start, row)))
+        self.model.dataChanged.connect(
+            lambda top, bottom, roles: self.events.append(('change', top.row(), bottom.row())))
+    
+    def show(self, levels):
+        self.events.clear()
+        self.model.set_levels(levels)
+        self.assertEqual(self.model.levels(), list(levels))
+        self.assertEqual(self.model.row_keys(), main.level_keys(levels))
+        return self.events
+    
+    @staticmethod
+    def levels(*ids):
+        return [{'id': level_id, 'name': f'Level {level_id}'} for level_id in ids]
+    
+    def test_appends_are_one_insert(self):
+        self.show(self.levels(1, 2))
+        self.assertEqual(self.show(self.levels(1, 2, 3, 4)), [('insert', 2, 3)])
+        self.assertEqual(self.model.rowCount(), 4)
+    
+    def test_removals_are_grouped_in_runs(self):
+        self.show(self.levels(1, 2, 3, 4, 5))
+        self.assertEqual(self.show(self.levels(1, 4)), [('remove', 4, 4), ('remove', 1, 2)])
+    
+    def test_unchanged_queue_emits_nothing(self):
+        levels = self.levels(1, 2)
+        self.show(levels)
+        self.assertEqual(self.show([dict(level) for level in levels]), [])
+    
+    def test_edits_and_moves(self):
+        self.show(self.levels(1, 2, 3))
+        edited = self.levels(1, 2, 3)
+        edited[1]['name'] = 'Renamed'
+        self.assertEqual(self.show(edited), [('change', 1, 1)])
+        self.assertEqual(self.model.data(self.model.index(1)), 'Renamed (ID: 2)')
+        
+        events = self.show([edited[2], edited[0], edited[1]])
+        self.assertTrue(events)
+        self.assertTrue(all(kind == 'move' for kind, *_ in events))
+    
+    def test_duplicates_get_their_own_rows(self):
+        self.show(self.levels(7, 7))
+        self.assertEqual(self.model.row_keys(), [(7, 0), (7, 1)])
+        self.assertEqual(self.show(self.levels(7)), [('remove', 1, 1)])
+    
+    def test_notes_mark_duplicates(self):
+        levels = self.levels(7, 8, 7)
+        index = main.LevelIndex(None)
+        index.rebuild(levels)
+        self.model.level_index = index
+        self.show(levels)
+        self.assertEqual(self.model.data(self.model.index(0)), 'Level 7 (ID: 7) [duplicate]')
+        self.assertEqual(self.model.data(self.model.index(1)), 'Level 8 (ID: 8)')
+
+
+class FilterEngineTest(unittest.TestCase):
+    """FilterEngine bitmask checks against config['filters']"""
+    
+    LEVELS = [
+        {'id': 1, 'difficulty': 'Easy', 'length': 'Short', 'stars': 2},
+        {'id': 2, 'difficulty': 'Extreme Demon', 'length': 'XL', 'stars': 10},
+        {'id': 3, 'difficulty': 'Hard', 'length': 'Long', 'stars': 0},
+        {'id': 4, 'difficulty': 'Mystery', 'length': None, 'stars': 'n/a'},
+    ]
+    
+    def test_default_filters_accept_everything(self):
+        self.assertEqual(main.FilterEngine().evaluate(self.LEVELS), [True] * 4)
+    
+    def test_categories_combine(self):
+        engine = main.FilterEngine({'difficulty': ['easy', 'Hard', 'Extreme Demon'],
+                                    'length': ['Short', 'Long'], 'rated': 'rated'})
+        self.assertEqual(engine.evaluate(self.LEVELS), [True, False, False, True])
+        self.assertTrue(engine.accepts(self.LEVELS[0]))
+        
+        engine.compile({'rated': 'unrated'})
+        self.assertEqual(engine.evaluate(self.LEVELS), [False, False, True, True])
+    
+    def test_codes_are_memoized_and_rechecked(self):
+        engine = main.FilterEngine()
+        codes = engine.encode(self.LEVELS)
+        self.assertEqual(len(engine.codes), 4)
+        self.assertEqual(codes, engine.encode(self.LEVELS))
+        engine.compile({'length': ['XL']})
+        self.assertEqual(engine.check(codes), [False, True, False, True])
+        # Unhashable values still get a code
+        self.assertTrue(engine.accepts({'difficulty': ['Easy'], 'length': 'XL', 'stars': 1}))
+
+
+class RowFilterTest(unittest.TestCase):
+    """RowFilter hides exactly the rows the engine rejects"""
+    
+    def setUp(self):
+        self.model = main.QueueModel()
+        self.view = QListView()
+        self.addCleanup(self.view.deleteLater)
+        self.view.setModel(self.model)
+        self.engine = main.FilterEngine()
+        self.row_filter = main.RowFilter(self.view, self.model, self.engine)
+        self.model.set_levels(FilterEngineTest.LEVELS)
+    
+    def hidden_rows(self):
+        return [row for row in range(self.model.rowCount()) if self.view.isRowHidden(row)]
+    
+    def test_hides_and_shows_rows(self):
+        self.engine.compile({'rated': 'unrated'})
+        self.assertEqual(self.row_filter.apply(), 2)
+        self.assertEqual(self.hidden_rows(), [0, 1])
+        
+        self.engine.compile({'length': ['Short']})
+        self.row_filter.apply()
+        self.assertEqual(self.hidden_rows(), [1, 2])
+        
+        self.assertEqual(self.row_filter.apply(hide=False), 0)
+        self.assertEqual(self.hidden_rows(), [])
+    
+    def test_follows_model_changes(self):
+        self.engine.compile({'rated': 'unrated'})
+        self.row_filter.apply()
+        self.model.set_levels(FilterEngineTest.LEVELS[1:])
+        self.row_filter.apply()
+        self.assertEqual(self.hidden_rows(), [0])
+
+
+if __name__ == '__main__':
+    unittest.main()